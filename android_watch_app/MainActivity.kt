@@ -111,7 +111,17 @@ fun vibrate(context: Context) {
 
 suspend fun sendSignal(btnName: String, onSuccess: () -> Unit, onError: () -> Unit) {
     try {
-        RetrofitClient.api.triggerButton(ControlRequest(btnName))
+        // Persistent socket first; plain HTTP if the bridge's WebSocket is unreachable
+        val viaSocket = try {
+            PuckSocket.triggerButton(btnName).get("status")?.asString == "success"
+        } catch (e: Exception) {
+            null
+        }
+        if (viaSocket == null) {
+            RetrofitClient.api.triggerButton(ControlRequest(btnName))
+        } else if (!viaSocket) {
+            throw IllegalStateException("bridge rejected $btnName")
+        }
         onSuccess()
     } catch (e: Exception) {
         e.printStackTrace()
@@ -1,8 +1,18 @@
 package com.example.puckremote.presentation
 
+import com.google.gson.Gson
+import com.google.gson.JsonObject
+import kotlinx.coroutines.CompletableDeferred
+import kotlinx.coroutines.withTimeout
+import okhttp3.OkHttpClient
+import okhttp3.Request
+import okhttp3.Response
+import okhttp3.WebSocket
+import okhttp3.WebSocketListener
 import retrofit2.Retrofit
 import retrofit2.converter.gson.GsonConverterFactory
 import retrofit2.http.Body
+import retrofit2.http.Headers
 import retrofit2.http.POST
 
 // 1. data class: This matches the JSON you send to the Pi
@@ -19,6 +29,8 @@ data class ControlResponse(
 
 // 3. Interface: Defines the API endpoints
 interface PuckApi {
+    // Taps get the next RF slot ahead of scenes and automations
+    @Headers("X-RF-Client: watch")
     @POST("/api/control")
     suspend fun triggerButton(@Body request: ControlRequest): ControlResponse
 }
@@ -36,3 +48,54 @@ object RetrofitClient {
             .create(PuckApi::class.java)
     }
 }
+
+// 5. Persistent WebSocket: one connection kept open, so a tap skips the HTTP handshake.
+// Replies come back with the id we sent; {"type": "state"} pushes report outlet changes.
+object PuckSocket {
+    // ⚠️ Same host as BASE_URL, port 5001
+    private const val WS_URL = "ws://192.168.1.100:5001/?client=watch"
+
+    private val client = OkHttpClient()
+    private val gson = Gson()
+    private val pending = java.util.concurrent.ConcurrentHashMap<Int, CompletableDeferred<JsonObject>>()
+    private var nextId = 0
+    private var socket: WebSocket? = null
+
+    @Synchronized
+    private fun open(): WebSocket = socket ?: client.newWebSocket(
+        Request.Builder().url(WS_URL).build(),
+        object : WebSocketListener() {
+            override fun onMessage(webSocket: WebSocket, text: String) {
+                val msg = gson.fromJson(text, JsonObject::class.java)
+                if (msg.has("id")) pending.remove(msg.get("id").asInt)?.complete(msg)
+            }
+
+            override fun onFailure(webSocket: WebSocket, t: Throwable, response: Response?) = closed(t)
+
+            override fun onClosed(webSocket: WebSocket, code: Int, reason: String) =
+                closed(IllegalStateException("socket closed: $reason"))
+        }
+    ).also { socket = it }
+
+    @Synchronized
+    private fun closed(t: Throwable) {
+        socket = null
+        pending.values.forEach { it.completeExceptionally(t) }
+        pending.clear()
+    }
+
+    suspend fun triggerButton(button: String): JsonObject {
+        val reply = CompletableDeferred<JsonObject>()
+        val id = synchronized(this) { ++nextId }
+        pending[id] = reply
+        val msg = JsonObject().apply {
+            addProperty("id", id)
+            addProperty("button", button)
+        }
+        if (!open().send(msg.toString())) {
+            pending.remove(id)
+            throw IllegalStateException("socket not open")
+        }
+        return withTimeout(5000) { reply.await() }
+    }
+}
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+from bridge_metrics import percentile
+from pico_link import PicoLink
+from pico_protocol import CMD_BATCH, CMD_TX, pack_tx
+
+# Config
+DEFAULT_PICO_PORT = "/dev/ttyACM0"
+# A code nobody's outlet listens to, so the benchmark doesn't flip lights
+BENCH_CODE = 1234567
+
+def run(link, kind, payload, count, label):
+    """Send one command at a time and collect host and Pico-side timings."""
+    first_edge, round_trip = [], []
+    for i in range(count):
+        started = time.monotonic()
+        result = link.submit(payload, label=f"{label} #{i + 1}", kind=kind,
+                             timeout=30).result(timeout=60)
+        round_trip.append(time.monotonic() - started)
+        if "pico_first_edge" in result["timings"]:
+            first_edge.append(result["timings"]["pico_first_edge"])
+    return first_edge, round_trip
+
+def report(label, size, first_edge, round_trip):
+    def ms(samples, q):
+        value = percentile(samples, q)
+        return "   n/a" if value is None else f"{value * 1000:6.2f}"
+
+    print(f"\n📏 {label} ({size} byte frame)")
+    print(f"   sync byte -> first edge (on Pico):  p50 {ms(first_edge, 50)} ms   "
+          f"p95 {ms(first_edge, 95)} ms   max {ms(first_edge, 100)} ms")
+    print(f"   host write -> ACK (incl. airtime):   p50 {ms(round_trip, 50)} ms   "
+          f"p95 {ms(round_trip, 95)} ms   max {ms(round_trip, 100)} ms")
+    if not first_edge:
+        print("   ⚠️ Pico didn't report first-edge times. Is pico_bridge.py up to date?")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure command-to-first-edge latency of the Pico bridge (stop rf_bridge_service first)')
+    parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="Serial port of the Pico")
+    parser.add_argument('-n', '--count', type=int, default=10, help="Commands per frame size")
+    parser.add_argument('-b', '--batch', type=int, default=36,
+                        help="Codes in the large BATCH frame (max 36)")
+    args = parser.parse_args()
+
+    link = PicoLink(args.port, max_in_flight=1).start()
+    deadline = time.monotonic() + 10
+    while not link.connected:
+        if time.monotonic() > deadline:
+            print(f"❌ Could not connect to the Pico on {args.port}")
+            return
+        time.sleep(0.1)
+
+    try:
+        small = pack_tx(BENCH_CODE, 1, 150)
+        report("Single TX", len(small) + 7, *run(link, CMD_TX, small, args.count, "bench tx"))
+
+        large = b"".join(pack_tx(BENCH_CODE + i, 1, 150) for i in range(min(args.batch, 36)))
+        report(f"BATCH of {len(large) // len(small)}", len(large) + 7,
+               *run(link, CMD_BATCH, large, args.count, "bench batch"))
+    finally:
+        link.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from bridge_metrics import percentile
+
+# Config
+DEFAULT_URL = "http://127.0.0.1:5000"
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+VIRTUAL_LINK = "/tmp/rf_bench_pico"
+
+def post(url, body, timeout=30):
+    """POST JSON. Returns (HTTP status, parsed reply or None)."""
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read())
+        except ValueError:
+            return e.code, None
+    except (urllib.error.URLError, OSError):
+        return None, None
+
+def get(url, timeout=5):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+def client(base, worker, count, buttons, scene_every, results, lock):
+    for i in range(count):
+        if scene_every and i % scene_every == scene_every - 1:
+            kind, path, body = "scene", "/api/scene", {"scene": "All Off"}
+        else:
+            kind, path, body = "control", "/api/control", {"button": buttons[(worker + i) % len(buttons)]}
+        started = time.monotonic()
+        status, reply = post(base + path, body)
+        elapsed = time.monotonic() - started
+        outcome = (reply or {}).get("outcome", "sent" if status == 200 else "error")
+        with lock:
+            results.append((kind, status, outcome, elapsed))
+
+def start_virtual(args):
+    """Start virtual_pico.py and a bridge pointed at it. Returns both processes."""
+    pico_cmd = [sys.executable, os.path.join(FILES_DIR, "virtual_pico.py"), "--link", VIRTUAL_LINK,
+                "--speed", str(args.speed), "--drop", str(args.drop),
+                "--slow", args.slow, "--disconnect-every", str(args.disconnect_every)]
+    pico = subprocess.Popen(pico_cmd, stdout=subprocess.DEVNULL)
+    # Hammering the same buttons looks like retries to the repeat tuner, so give
+    # the bridge a scratch copy of the codes file to raise counts in
+    codes = os.path.join(tempfile.mkdtemp(prefix="rf_bench_"), "remote_codes.json")
+    shutil.copy(CODES_FILE, codes)
+    env = dict(os.environ, RF_BRIDGE_TRANSMITTERS=json.dumps({"main": {"port": VIRTUAL_LINK}}),
+               RF_BRIDGE_CODES_FILE=codes)
+    bridge = subprocess.Popen([sys.executable, os.path.join(FILES_DIR, "rf_bridge_service.py")],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        health = get(args.url + "/health")
+        if health and health.get("serial_connected"):
+            return pico, bridge
+        time.sleep(0.5)
+    pico.terminate()
+    bridge.terminate()
+    print("❌ Bridge didn't come up against the virtual Pico")
+    sys.exit(1)
+
+def ms(value):
+    return "   n/a" if value is None else f"{value * 1000:7.1f}"
+
+def report(results, wall, before, after):
+    print(f"\n📋 {len(results)} requests in {wall:.1f}s = {len(results) / wall:.1f} req/s")
+    for kind in sorted({r[0] for r in results}):
+        latencies = [r[3] for r in results if r[0] == kind]
+        print(f"   {kind:8s} n={len(latencies):4d}  p50 {ms(percentile(latencies, 50))} ms  "
+              f"p95 {ms(percentile(latencies, 95))} ms  p99 {ms(percentile(latencies, 99))} ms  "
+              f"max {ms(max(latencies))} ms")
+
+    errors = [r for r in results if r[1] != 200]
+    print(f"   errors: {len(errors)} ({100 * len(errors) / len(results):.1f}%)  "
+          f"by status: {dict(collections.Counter(r[1] for r in errors))}")
+    print(f"   outcomes: {dict(collections.Counter(r[2] for r in results))}")
+    if before and after:
+        for field in ("coalesced_commands", "skipped_commands", "failovers"):
+            if field in after:
+                print(f"   {field}: {after[field] - before.get(field, 0)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test rf_bridge_service.py with concurrent clients')
+    parser.add_argument('--url', default=DEFAULT_URL, help="Bridge base URL")
+    parser.add_argument('-c', '--clients', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('-n', '--requests', type=int, default=25, help="Requests per client")
+    parser.add_argument('--buttons', nargs='*', help="Buttons to press (default: all in remote_codes.json)")
+    parser.add_argument('--scene-every', type=int, default=0,
+                        help="Make every Nth request of each client an 'All Off' scene")
+    parser.add_argument('--virtual', action='store_true',
+                        help="Start virtual_pico.py and a bridge against it instead of using a running one")
+    parser.add_argument('--speed', type=float, default=1.0, help="(--virtual) radio speed-up")
+    parser.add_argument('--drop', type=float, default=0.0, help="(--virtual) chance a command is dropped")
+    parser.add_argument('--slow', default="0:1", help="(--virtual) RATE:SECONDS slow acks")
+    parser.add_argument('--disconnect-every', type=int, default=0,
+                        help="(--virtual) drop the link after every N commands")
+    args = parser.parse_args()
+
+    buttons = args.buttons
+    if not buttons:
+        with open(CODES_FILE, 'r') as f:
+            buttons = list(json.load(f).keys())
+
+    processes = start_virtual(args) if args.virtual else ()
+    try:
+        before = get(args.url + "/health")
+        if before is None:
+            print(f"❌ No bridge answering at {args.url}")
+            sys.exit(1)
+
+        if not args.virtual:
+            print("⚠️ Repeated presses count as retries: the bridge may raise repeats in remote_codes.json")
+        print(f"🏁 {args.clients} clients x {args.requests} requests against {args.url}")
+        results, lock = [], threading.Lock()
+        threads = [threading.Thread(target=client, args=(args.url, w, args.requests, buttons,
+                                                         args.scene_every, results, lock))
+                   for w in range(args.clients)]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - started
+
+        report(results, wall, before, get(args.url + "/health"))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+import rf_waveform
+from bridge_metrics import percentile
+from tx_backends import BACKENDS, open_backend
+
+# Config
+DEFAULT_PICO_PORT = "/dev/ttyACM0"
+# A code nobody's outlet listens to, so the benchmark doesn't flip lights
+BENCH_CODE = 1234567
+
+def bench_compile(code, protocol, pulse, repeats, count=1000):
+    """Microseconds per burst compile, cold (cache cleared) and cached."""
+    def run(clear):
+        started = time.perf_counter()
+        for _ in range(count):
+            if clear:
+                rf_waveform._cache.clear()
+            rf_waveform.compile_burst(code, protocol, pulse, repeats=repeats)
+        return (time.perf_counter() - started) / count * 1e6
+    return run(True), run(False)
+
+def bench_backend(backend, code, protocol, pulse, repeats, count):
+    elapsed, errors, airtime = [], [], 0
+    for _ in range(count):
+        result = backend.send(code, protocol, pulse, repeats)
+        elapsed.append(result["elapsed"])
+        airtime = result["airtime_us"] / 1e6
+        if result["edge_error_us"]:
+            errors.extend(result["edge_error_us"])
+    return elapsed, errors, airtime
+
+def report(name, elapsed, errors, airtime):
+    total = sum(elapsed)
+    print(f"\n📡 {name}")
+    print(f"   throughput: {len(elapsed) / total:6.1f} bursts/s   "
+          f"burst took {1000 * total / len(elapsed):7.2f} ms for {1000 * airtime:.2f} ms of airtime")
+    if errors:
+        print(f"   edge jitter: p50 {percentile(errors, 50):6.2f} us   p95 {percentile(errors, 95):6.2f} us   "
+              f"p99 {percentile(errors, 99):6.2f} us   max {max(errors):8.2f} us")
+    else:
+        print("   edge jitter: not measurable from the host")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare timing jitter and throughput of the TX backends')
+    parser.add_argument('backends', nargs='*', default=["sim"],
+                        help=f"Backends to try, from {sorted(BACKENDS)} (default: sim)")
+    parser.add_argument('-n', '--count', type=int, default=20, help="Bursts per backend")
+    parser.add_argument('-r', '--repeats', type=int, default=10, help="Frames per burst")
+    parser.add_argument('--code', type=int, default=BENCH_CODE)
+    parser.add_argument('--protocol', type=int, default=1)
+    parser.add_argument('--pulse', type=int, default=150)
+    parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="(pico) serial port")
+    parser.add_argument('-g', '--gpio', type=int, default=17, help="(gpio, lgpio) TX pin")
+    args = parser.parse_args()
+
+    cold, cached = bench_compile(args.code, args.protocol, args.pulse, args.repeats)
+    print(f"🧮 Compiling a {args.repeats}-frame burst: {cold:.1f} us cold, {cached:.1f} us cached")
+
+    options = {"pico": {"port": args.port}, "gpio": {"gpio": args.gpio}, "lgpio": {"gpio": args.gpio}}
+    for name in args.backends:
+        try:
+            backend = open_backend(name, **options.get(name, {}))
+        except (ImportError, RuntimeError, ValueError) as e:
+            print(f"\n⚠️ Skipping {name}: {e}")
+            continue
+        try:
+            report(name, *bench_backend(backend, args.code, args.protocol, args.pulse,
+                                        args.repeats, args.count))
+        finally:
+            backend.close()
+
+if __name__ == "__main__":
+    main()
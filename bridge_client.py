@@ -0,0 +1,62 @@
+"""
+Talks to a running rf_bridge_service.py over its local Unix socket (see bridge_unix.py).
+
+    with BridgeClient() as bridge:
+        bridge.press("1 ON")
+
+BridgeClient() raises BridgeUnavailable when no bridge is listening, so
+CLIs can fall back to driving the hardware themselves.
+"""
+import json
+import socket
+
+SOCKET_PATH = "/tmp/rf_bridge.sock"
+REPLY_TIMEOUT = 20
+
+
+class BridgeUnavailable(Exception):
+    pass
+
+
+class BridgeClient:
+
+    def __init__(self, path=SOCKET_PATH, timeout=REPLY_TIMEOUT):
+        self.path = path
+        self._next_id = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            # A missing file or a stale one from a dead bridge both land here
+            self._sock.connect(path)
+        except OSError as e:
+            self._sock.close()
+            raise BridgeUnavailable(f"No bridge listening on {path} ({e})")
+        self._reader = self._sock.makefile("rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def command(self, **fields):
+        """Send one command and wait for its reply dict."""
+        self._next_id += 1
+        message = dict(fields, id=self._next_id, client="cli")
+        self._sock.sendall(json.dumps(message).encode() + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise BridgeUnavailable("Bridge closed the connection")
+        return json.loads(line)
+
+    def press(self, button, force=False):
+        if force:
+            return self.command(button=button, force=True)
+        return self.command(button=button)
+
+    def scene(self, name):
+        return self.command(scene=name)
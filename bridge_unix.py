@@ -0,0 +1,116 @@
+"""
+Local control socket for the RF bridge, for scripts and CLIs on the same machine.
+
+A Unix domain socket speaking line-delimited JSON, one command per line:
+
+    {"id": 1, "button": "1 ON"}         or simply:  1 ON
+    {"id": 2, "scene": "All Off"}
+
+Each line gets one reply line, in order, carrying the same id. Commands from
+one connection go out one after another, so a script's sequence keeps its
+order. mimic_pico.py and mimic_remote.py use this (through bridge_client.py)
+whenever the bridge is running, instead of opening the hardware themselves.
+"""
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from bridge_ws import parse_message
+
+SOCKET_PATH = "/tmp/rf_bridge.sock"
+REPLY_TIMEOUT = 15
+
+
+class UnixControlServer:
+
+    def __init__(self, handle, path=SOCKET_PATH, timeout=REPLY_TIMEOUT):
+        """handle(data, client) -> concurrent.futures.Future of a reply dict."""
+        self.handle = handle
+        self.path = path
+        self.timeout = timeout
+        self.connections = 0
+        self._loop = None
+        self._stopped = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._claim_path()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),),
+                                        name="unix-control", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set_result, None)
+            self._thread.join(timeout=5)
+
+    def _claim_path(self):
+        """Remove a socket file left behind by a bridge that crashed. One that
+        still answers belongs to a running bridge and is left alone."""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except ConnectionRefusedError:
+            os.unlink(self.path)
+            return
+        except FileNotFoundError:
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"{self.path} belongs to a bridge that's already running")
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = self._loop.create_future()
+        server = await asyncio.start_unix_server(self._connection, self.path)
+        try:
+            print(f"🔌 Local control socket on {self.path}")
+            self._ready.set()
+            async with server:
+                await self._stopped
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._command(line)
+                if reply is not None:
+                    writer.write(json.dumps(reply).encode() + b"\n")
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _command(self, line):
+        data = parse_message(line)
+        if data is None:
+            if not line.strip():
+                return None
+            return {"status": "error", "error": "Expected a button name or a JSON object"}
+        try:
+            future = self.handle(data, data.get("client") or "cli")
+            # shield: giving up on the reply must not cancel the command itself
+            reply = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            reply = {"status": "error", "error": "Timed out waiting for Pico"}
+        except Exception as e:
+            print(f"Socket command failed: {e}")
+            reply = {"status": "error", "error": str(e)}
+        if "id" in data:
+            reply = dict(reply, id=data["id"])
+        return reply
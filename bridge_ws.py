@@ -0,0 +1,125 @@
+"""
+Persistent WebSocket control channel for the RF bridge (next to the Flask API).
+
+A client keeps one connection open and sends one command per message:
+
+    {"id": 7, "button": "1 ON"}         or simply:  1 ON
+    {"id": 8, "scene": "All Off"}
+
+Every command gets a reply carrying the same id. All clients also receive
+{"type": "state", ...} pushes whenever an outlet changes, plus the known
+states right after connecting. Clients identify themselves with
+ws://host:5001/?client=watch (or a "client" field) for scheduling.
+
+All connections share one asyncio event loop on a background thread, so an
+idle client costs a coroutine rather than a thread.
+"""
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import broadcast, serve
+from websockets.exceptions import ConnectionClosed
+
+WS_PORT = 5001
+REPLY_TIMEOUT = 15
+
+
+class ControlSocketServer:
+
+    def __init__(self, handle, snapshot=None, host="0.0.0.0", port=WS_PORT, timeout=REPLY_TIMEOUT):
+        """handle(data, client) -> concurrent.futures.Future of a reply dict.
+        snapshot() -> list of messages to send a client when it connects."""
+        self.handle = handle
+        self.snapshot = snapshot
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.clients = set()
+        self._tasks = set()         # Commands awaiting their ack (keeps them from being GC'd)
+        self._loop = None
+        self._stopped = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),),
+                                        name="ws-control", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set_result, None)
+            self._thread.join(timeout=5)
+
+    def broadcast(self, message):
+        """Push a message to every connected client. Safe to call from any thread."""
+        if self._loop is None:
+            return
+        text = json.dumps(message)
+        self._loop.call_soon_threadsafe(lambda: broadcast(self.clients, text))
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = self._loop.create_future()
+        async with serve(self._connection, self.host, self.port):
+            print(f"🔌 WebSocket control channel on ws://{self.host}:{self.port}/")
+            self._ready.set()
+            await self._stopped
+
+    async def _connection(self, ws):
+        query = parse_qs(urlsplit(ws.request.path).query)
+        client = query.get("client", [None])[0]
+        self.clients.add(ws)
+        try:
+            for message in (self.snapshot() if self.snapshot else []):
+                await ws.send(json.dumps(message))
+            async for text in ws:
+                # Each command runs on its own so a slow burst doesn't hold up the next tap
+                task = asyncio.ensure_future(self._command(ws, text, client))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(ws)
+
+    async def _command(self, ws, text, client):
+        data = parse_message(text)
+        if data is None:
+            reply = {"status": "error", "error": "Expected a button name or a JSON object"}
+        else:
+            try:
+                future = self.handle(data, data.get("client") or client)
+                # shield: giving up on the reply must not cancel the command itself
+                reply = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+            except asyncio.TimeoutError:
+                reply = {"status": "error", "error": "Timed out waiting for Pico"}
+            except Exception as e:
+                print(f"WebSocket command failed: {e}")
+                reply = {"status": "error", "error": str(e)}
+        if data is not None and "id" in data:
+            reply = dict(reply, id=data["id"])
+        try:
+            await ws.send(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+
+
+def parse_message(text):
+    """'1 ON' or '{"button": "1 ON"}' -> {"button": "1 ON"}; None if unusable."""
+    if isinstance(text, bytes):
+        text = text.decode(errors="replace")
+    text = text.strip()
+    if not text:
+        return None
+    if not text.startswith("{"):
+        return {"button": text}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
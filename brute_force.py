@@ -2,7 +2,9 @@
 
 import argparse
 import time
-from rpi_rf import RFDevice
+
+from param_search import ParamSearch, ask_user, load_priors, open_cache, ranked_combos, rfdevice_sender
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
@@ -13,10 +15,38 @@ CODES = [4478225, 4478259]
 def main():
     parser = argparse.ArgumentParser(description='Brute force RF codes.')
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin (Default: 17)")
+    parser.add_argument('codes', type=int, nargs='*', default=CODES, help=f"Codes to try (Default: {CODES})")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old fixed sweep: press Ctrl+C when the outlet turns ON")
+    parser.add_argument('--forget', action='store_true',
+                        help="Clear what earlier runs ruled out for these codes (param_cache.json)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Neither skip nor remember combinations that didn't react")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
 
-    rfdevice = RFDevice(args.gpio)
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
+
+    if not args.linear:
+        # Likeliest code/protocol/pulse first, asking after each block (see param_search.py)
+        print("🚀 Starting Brute Force Search...")
+        print("Put the outlet OFF. After each round, say whether it turned ON.")
+        print("------------------------------------------------")
+        try:
+            cache = open_cache(args.no_cache, args.codes if args.forget else ())
+            search = ParamSearch(rfdevice_sender(rfdevice), ask_user, cache)
+            found = search.run(ranked_combos(args.codes, load_priors()))
+        finally:
+            rfdevice.cleanup()
+        if found is None:
+            print("❌ Nothing confirmed.")
+            return
+        (code, proto, pulse), repeats = found
+        print(f"🎯 Code={code} | Proto={proto} | Pulse={pulse} in {search.rounds} rounds")
+        return
+
     rfdevice.tx_repeat = 15 # Standard repeat
 
     print("🚀 Starting Brute Force Sequence...")
@@ -33,7 +63,7 @@ def main():
         
         for pulse in pulses:
             for proto in protocols:
-                for code in CODES:
+                for code in args.codes:
                     print(f"Testing: Proto={proto} | Pulse={pulse} | Code={code}", end='\r')
                     rfdevice.tx_code(code, proto, pulse)
                     # Tiny sleep to let the outlet react
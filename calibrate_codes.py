@@ -5,29 +5,59 @@ import time
 import json
 import os
 import sys
-from rpi_rf import RFDevice
+
+import code_model
+import rf_waveform
+from group_search import GroupSearch, ask_user, rfdevice_sender
+from sweep_journal import SweepJournal, journal_path, report
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
 
-# Verified settings
+# Fallback for entries saved without protocol/pulse (sniffers now infer them, see rf_infer.py)
 PROTO = 1
 PULSE = 150
 
+def entry_params(entry):
+    return entry.get('protocol') or PROTO, entry.get('pulselength') or PULSE
+
 def save_code(btn_key, code, data):
     print(f"💾 Saving [{btn_key}] with verified code: {code}")
     data[btn_key]['code'] = code
-    data[btn_key]['protocol'] = PROTO
-    data[btn_key]['pulselength'] = PULSE
+    # Keep the inferred protocol/pulse; the code is all that was calibrated
+    data[btn_key].setdefault('protocol', PROTO)
+    data[btn_key].setdefault('pulselength', PULSE)
     
     with open(CODES_FILE, 'w') as f:
         json.dump(data, f, indent=2)
 
-def calibrate_button(rfdevice, btn_key, data):
+def group_calibrate(rfdevice, btn_key, data):
+    # Same range as the sweep below, found with ~8 yes/no rounds (see group_search.py)
+    sniffed_code = data[btn_key]['code']
+    proto, pulse = entry_params(data[btn_key])
+    print(f"\n🎯 Calibrating [{btn_key}] (Sniffed: {sniffed_code}, Proto={proto}, Pulse={pulse})")
+    print("Put the outlet in the opposite state. After each round, say whether it reacted.")
+    print("------------------------------------------------")
+    search = GroupSearch(rfdevice_sender(rfdevice, proto, pulse), ask_user)
+    found = search.run_predicted(code_model.predicted_first(btn_key, CODES_FILE),
+                                 range(sniffed_code - 50, sniffed_code + 101))
+    if found is None:
+        print("❌ No code confirmed. Try again, or use --linear.")
+        return False
+    print(f"✅ Found {found} (Offset: {found - sniffed_code:+d}) in {search.rounds} rounds")
+    save_code(btn_key, found, data)
+    return True
+
+def calibrate_button(rfdevice, btn_key, data, linear=False, resume=False):
+    if not linear:
+        return group_calibrate(rfdevice, btn_key, data)
+
     sniffed_code = data[btn_key]['code']
-    print(f"\n🎯 Calibrating [{btn_key}] (Sniffed: {sniffed_code})")
+    proto, pulse = entry_params(data[btn_key])
+    print(f"\n🎯 Calibrating [{btn_key}] (Sniffed: {sniffed_code}, Proto={proto}, Pulse={pulse})")
     print("Press Ctrl+C IMMEDIATELY when the device reacts!")
     print("------------------------------------------------")
     
@@ -35,25 +65,35 @@ def calibrate_button(rfdevice, btn_key, data):
     # We found OFF was +23, ON was +34. But let's cover more ground.
     start_code = sniffed_code - 50
     end_code = sniffed_code + 100
+
+    # Every code sent goes in the journal, so Ctrl+C can be matched to the code
+    # that was on air a reaction time earlier, and an interrupted sweep resumed
+    journal = SweepJournal(journal_path("calibrate", start_code, end_code), start_code, end_code,
+                           resume=resume)
+    first_code = journal.resume_point()
+    if first_code != start_code:
+        print(f"⏩ Resuming at {first_code}")
     
     last_sent_code = None
     
     try:
         rfdevice.tx_repeat = 10 # Good repeat for reliable triggering
         
-        for code in range(start_code, end_code + 1):
+        for code in range(first_code, end_code + 1):
             last_sent_code = code
+            journal.record(code, proto, pulse)
             print(f"👉 Testing: {code} (Offset: {code - sniffed_code:+d})", end='\r')
-            rfdevice.tx_code(code, PROTO, PULSE)
+            rfdevice.tx_code(code, proto, pulse)
             time.sleep(0.25) # Slow enough to react
             
         print("\n❌ Reached end of range without user interrupt.")
         return False
         
     except KeyboardInterrupt:
-        print(f"\n\n🛑 STOPPED at {last_sent_code}!")
-        
+        interrupted = time.monotonic()
         print(f"\n\n🛑 STOPPED at ~{last_sent_code}!")
+        frame_s = rf_waveform.airtime_us(rf_waveform.frame_timings(first_code, pulse, protocol=proto)) / 1e6
+        ranked = report(journal, interrupted, frame_s)
         print("Entering FINE TUNE mode.")
         print("-----------------------")
         print(" Controls:")
@@ -64,16 +104,16 @@ def calibrate_button(rfdevice, btn_key, data):
         print("  [Enter] SAVE and Exit")
         print("-----------------------")
         
-        current_code = last_sent_code
-        # Backtrack slightly by default since reaction time usually means we overshot
-        current_code -= 2 
+        # Start from the most likely code; without a journal, backtrack slightly
+        # since reaction time usually means we overshot
+        current_code = ranked[0] if ranked else last_sent_code - 2
         
         auto_fire = False
         
         while True:
             # If auto_fire is on, send pulses repeatedly
             if auto_fire:
-                rfdevice.tx_code(current_code, PROTO, PULSE)
+                rfdevice.tx_code(current_code, proto, pulse)
                 status = "🔥 FIRING"
                 time.sleep(0.1)
             else:
@@ -95,14 +135,14 @@ def calibrate_button(rfdevice, btn_key, data):
             elif cmd == 's':
                 print(f" -> Sending {current_code}...", end='', flush=True)
                 rfdevice.tx_repeat = 10
-                rfdevice.tx_code(current_code, PROTO, PULSE)
+                rfdevice.tx_code(current_code, proto, pulse)
                 print(" Sent.")
             elif cmd == 'w':
                 # Since we use blocking input, toggle won't work well for "continuous"
                 # Instead, let's make 'w' a "Sweep small range"
                 print(f" -> Sweeping {current_code-2} to {current_code+2}...")
                 for c in range(current_code-2, current_code+3):
-                    rfdevice.tx_code(c, PROTO, PULSE)
+                    rfdevice.tx_code(c, proto, pulse)
                     time.sleep(0.2)
             elif cmd == '':
                 # Enter check - actually checking for empty string might be annoying
@@ -117,12 +157,20 @@ def calibrate_button(rfdevice, btn_key, data):
             # If user just hit enter hoping to save...
             # We need a robust way.
             # Let's stick to standard input loop.
+    finally:
+        journal.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description='Calibrate RF codes interactively.')
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin")
     parser.add_argument('button', type=str, nargs='?', help="Button to calibrate (e.g. '1 ON'). If empty, lists all.")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old one-code-at-a-time sweep: press Ctrl+C when the device reacts")
+    parser.add_argument('--resume', action='store_true',
+                        help="(--linear) carry on from where the last sweep of this button stopped")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
     
     if not os.path.exists(CODES_FILE):
@@ -132,14 +180,14 @@ def main():
     with open(CODES_FILE, 'r') as f:
         data = json.load(f)
         
-    rfdevice = RFDevice(args.gpio)
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
     
     try:
         if args.button:
             key = args.button.upper()
             if key in data:
-                calibrate_button(rfdevice, key, data)
+                calibrate_button(rfdevice, key, data, args.linear, args.resume)
             else:
                 print(f"Button '{key}' not found.")
         else:
@@ -151,13 +199,13 @@ def main():
             choice = input(f"Enter number (1-{len(keys)}) or 'all': ")
             if choice.lower() == 'all':
                 for k in keys:
-                    if not calibrate_button(rfdevice, k, data):
+                    if not calibrate_button(rfdevice, k, data, args.linear, args.resume):
                         print("Skipping to next...")
             else:
                 try:
                     idx = int(choice) - 1
                     if 0 <= idx < len(keys):
-                        calibrate_button(rfdevice, keys[idx], data)
+                        calibrate_button(rfdevice, keys[idx], data, args.linear, args.resume)
                 except ValueError:
                     print("Invalid selection.")
                     
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+from code_registry import CodeRegistry
+from pico_link import PicoLink
+from pico_protocol import (CMD_RX, DEFAULT_REPEATS, RX_START, RX_STATUS, RX_STOP, pack_tx,
+                           unpack_rx_status)
+
+# Config
+DEFAULT_PICO_PORT = "/dev/ttyACM0"
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+
+# Repeat counts to try, fewest first
+CANDIDATES = [1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25]
+# Plenty of repeats for the "reset" press that puts the outlet in the opposite state
+SETUP_REPEATS = 20
+# A listening Pico has to decode this many copies for a trial to pass
+MIN_COPIES = 2
+
+def wait_connected(link, name):
+    deadline = time.monotonic() + 10
+    while not link.connected:
+        if time.monotonic() > deadline:
+            print(f"❌ Could not connect to the {name} Pico on {link.port}")
+            sys.exit(1)
+        time.sleep(0.1)
+
+def send(link, button, repeats):
+    payload = pack_tx(button.code, button.protocol, button.pulselength, repeats)
+    link.submit(payload, label=f"{button.name} x{repeats}").result(timeout=30)
+
+def rx(link, action):
+    result = link.submit(bytes([action]), kind=CMD_RX, label="rx").result(timeout=10)
+    return unpack_rx_status(result["payload"])
+
+def trial_user(link, button, opposite, repeats):
+    if opposite is not None:
+        send(link, opposite, SETUP_REPEATS)
+        time.sleep(1.0)
+    send(link, button, repeats)
+    if button.outlet and button.state:
+        question = f"Did outlet {button.outlet} turn {button.state}?"
+    else:
+        question = f"Did [{button.name}] work?"
+    return input(f"   {question} [y/n]: ").strip().lower().startswith('y')
+
+def trial_rx(link, listener, button, repeats):
+    rx(listener, RX_START)
+    send(link, button, repeats)
+    time.sleep(0.3)
+    status = rx(listener, RX_STATUS)
+    copies = sum(c["count"] for c in status["codes"] if c["code"] == button.code)
+    print(f"   heard {copies} copies")
+    return copies >= MIN_COPIES
+
+def opposite_of(registry, button):
+    """The press that puts the button's outlet back in the other state, if there is one."""
+    if not (button.outlet and button.state):
+        return None
+    other = "OFF" if button.state == "ON" else "ON"
+    return registry.lookup(f"{button.outlet} {other}")
+
+def calibrate_button(link, listener, registry, button, trials):
+    opposite = opposite_of(registry, button)
+
+    print(f"\n🎯 Calibrating [{button.name}] (currently {button.repeats or 'default'} repeats)")
+    for repeats in CANDIDATES:
+        print(f"👉 Trying {repeats} repeats ({trials} trials)")
+        for _ in range(trials):
+            if listener is not None:
+                passed = trial_rx(link, listener, button, repeats)
+            else:
+                passed = trial_user(link, button, opposite, repeats)
+            if not passed:
+                break
+        else:
+            print(f"✅ [{button.name}] works with {repeats} repeats")
+            registry.update(button.name, repeats=repeats)
+            return repeats
+    print(f"❌ [{button.name}] didn't work reliably even at {CANDIDATES[-1]} repeats. Leaving it alone.")
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find the fewest repeats each button needs (stop rf_bridge_service first)')
+    parser.add_argument('buttons', nargs='*', help="Buttons to calibrate (default: all)")
+    parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="Serial port of the transmitting Pico")
+    parser.add_argument('--rx-port', default=None,
+                        help="Serial port of a second Pico placed next to the outlet. "
+                             "Its receiver confirms each burst instead of asking you.")
+    parser.add_argument('-t', '--trials', type=int, default=3, help="Trials that must all pass")
+    args = parser.parse_args()
+
+    registry = CodeRegistry(CODES_FILE)
+    names = args.buttons or registry.names()
+    buttons = [registry.lookup(name) for name in names]
+    if None in buttons:
+        print(f"Unknown buttons: {[n for n, b in zip(names, buttons) if b is None]}")
+        sys.exit(1)
+    if not args.rx_port:
+        # Without a reset press, a trial after one that worked starts with the outlet
+        # already switched, and "did it turn ON?" says yes whatever was sent
+        unresettable = [b.name for b in buttons if opposite_of(registry, b) is None]
+        if unresettable:
+            print(f"⚠️ Skipping {unresettable}: no opposite button to reset the outlet between trials. "
+                  f"Calibrate them with --rx-port.")
+            buttons = [b for b in buttons if b.name not in unresettable]
+        if not buttons:
+            sys.exit(1)
+
+    link = PicoLink(args.port, max_in_flight=1).start()
+    wait_connected(link, "transmitting")
+    listener = None
+    if args.rx_port:
+        if args.rx_port == args.port:
+            print("⚠️ The transmitting Pico always hears itself. Use a second Pico near the outlet.")
+        listener = PicoLink(args.rx_port, max_in_flight=1).start()
+        wait_connected(listener, "listening")
+
+    results = {}
+    try:
+        for button in buttons:
+            results[button.name] = calibrate_button(link, listener, registry, button, args.trials)
+    except KeyboardInterrupt:
+        print("\nExiting.")
+    finally:
+        if listener is not None:
+            rx(listener, RX_STOP)
+            listener.stop()
+        link.stop()
+
+    print("\n📋 Summary (the bridge adds REPEAT_MARGIN on top):")
+    for name, repeats in results.items():
+        if repeats is None:
+            print(f"   {name}: unchanged")
+        else:
+            share = repeats / DEFAULT_REPEATS
+            print(f"   {name}: {repeats} repeats ({share:.0%} of the airtime of the default {DEFAULT_REPEATS})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Predicts codes for missing or new buttons from the ones in remote_codes.json.
+
+Etekcity-style remotes (PT2262 encoders) send 12 tristate symbols, two bits
+each: 00 = 0, 11 = 1, 01 = F (floating). The known codes split into fields:
+
+    address   symbols that never change (the remote's own house code)
+    channel   symbols that change from button to button
+    command   symbols that differ between a button's ON and OFF codes
+              (here the low nibble: 0x3 = ON, 0xC = OFF)
+
+A missing OFF is its ON with the command swapped. A new button gets a
+channel word in the same style as the known ones: on these remotes every
+channel has exactly one 1, one symbol further along per button number.
+Candidates are ranked by how well they fit, so a search only has to try
+tens of codes instead of thousands.
+
+    python code_model.py             # show the inferred fields
+    python code_model.py "6 ON"      # ranked candidates for a button
+    python code_model.py --check     # leave each button out and see where it ranks
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+BITS = 24
+
+TRISTATE = {"00": "0", "11": "1", "01": "F"}
+TRISTATE_BITS = {symbol: bits for bits, symbol in TRISTATE.items()}
+# Channel words tried when predicting a new button (alphabet ** positions)
+MAX_ENUMERATION = 50000
+DEFAULT_LIMIT = 32
+
+BUTTON_NAME = re.compile(r"^(\w+)\s+(ON|OFF)$", re.IGNORECASE)
+
+
+def parse_name(name):
+    """'3 ON' -> ('3', 'ON'); names that don't look like that -> (name, None)."""
+    match = BUTTON_NAME.match(name.strip())
+    if not match:
+        return name.strip().upper(), None
+    return match.group(1).upper(), match.group(2).upper()
+
+
+class CodeModel:
+
+    def __init__(self, codes, bits=BITS):
+        """codes: {button name: code}"""
+        self.bits = bits
+        self.codes = {name.upper(): code for name, code in codes.items()}
+        self.tristate = bool(self.codes) and all(self._is_tristate(c) for c in self.codes.values())
+        self.width = 2 if self.tristate else 1
+        self.alphabet = "01F" if self.tristate else "01"
+        self.length = bits // self.width
+
+        words = {name: self.symbols(code) for name, code in self.codes.items()}
+        # Group into channels: {"3": {"ON": word, "OFF": word}}
+        self.channels = {}
+        for name, word in words.items():
+            channel, command = parse_name(name)
+            if command:
+                self.channels.setdefault(channel, {})[command] = word
+
+        # Command: positions that differ within ON/OFF pairs
+        self.command_positions = sorted({
+            i for pair in self.channels.values() if len(pair) == 2
+            for i in range(self.length) if pair["ON"][i] != pair["OFF"][i]
+        })
+        self.commands = {}
+        for pair in self.channels.values():
+            for command, word in pair.items():
+                self.commands.setdefault(command, "".join(word[i] for i in self.command_positions))
+
+        # Channel: everything else that varies; address: what never does
+        others = [i for i in range(self.length) if i not in self.command_positions]
+        all_words = list(words.values())
+        varying = [i for i in others if len({w[i] for w in all_words}) > 1]
+        self.channel_positions = list(range(min(varying), max(varying) + 1)) if varying else []
+        self.channel_positions = [i for i in self.channel_positions if i in others]
+        self.address_positions = [i for i in others if i not in self.channel_positions]
+        self.address = {i: all_words[0][i] for i in self.address_positions} if all_words else {}
+        self.channel_words = {
+            channel: {i: next(iter(pair.values()))[i] for i in self.channel_positions}
+            for channel, pair in self.channels.items()
+        }
+
+    # --- symbols <-> codes ---
+
+    def _is_tristate(self, code):
+        text = format(code, f"0{self.bits}b")
+        return all(text[i:i + 2] in TRISTATE for i in range(0, self.bits, 2))
+
+    def symbols(self, code):
+        text = format(code, f"0{self.bits}b")
+        if self.tristate:
+            return [TRISTATE[text[i:i + 2]] for i in range(0, self.bits, 2)]
+        return list(text)
+
+    def code(self, word):
+        if self.tristate:
+            return int("".join(TRISTATE_BITS[s] for s in word), 2)
+        return int("".join(word), 2)
+
+    def describe(self):
+        def field(positions):
+            return f"symbols {positions[0]}-{positions[-1]}" if positions else "none"
+        kind = "tristate (PT2262 style)" if self.tristate else "plain binary"
+        lines = [
+            f"{len(self.codes)} codes, {kind}, {self.length} symbols",
+            f"address: {field(self.address_positions)} = "
+            f"{''.join(self.address[i] for i in self.address_positions)}",
+            f"channel: {field(self.channel_positions)}",
+            f"command: {field(self.command_positions)} = "
+            + ", ".join(f"{c} {w}" for c, w in sorted(self.commands.items())),
+        ]
+        for channel, word in sorted(self.channel_words.items()):
+            lines.append(f"   channel {channel}: {''.join(word.values())}")
+        return "\n".join(lines)
+
+    # --- prediction ---
+
+    def _build(self, channel, command_word):
+        """channel: {position: symbol}, on top of the address."""
+        word = [None] * self.length
+        for i in self.address_positions:
+            word[i] = self.address[i]
+        for i, s in channel.items():
+            word[i] = s
+        for i, s in zip(self.command_positions, command_word):
+            word[i] = s
+        return self.code(word)
+
+    def _one_position(self, word):
+        ones = [i for i, s in word.items() if s == "1"]
+        return ones[0] if len(ones) == 1 else None
+
+    def _predicted_position(self, channel):
+        """Where a one-hot channel's 1 should sit, from the trend of the known ones."""
+        points = []
+        for known, word in self.channel_words.items():
+            position = self._one_position(word)
+            if position is None or not known.isdigit():
+                return None
+            points.append((int(known), position))
+        if len(points) < 2 or not channel.isdigit():
+            return None
+        n = len(points)
+        mx = sum(x for x, _ in points) / n
+        my = sum(y for _, y in points) / n
+        sxx = sum((x - mx) ** 2 for x, _ in points)
+        if not sxx:
+            return None
+        slope = sum((x - mx) * (y - my) for x, y in points) / sxx
+        return my + slope * (int(channel) - mx)
+
+    def _distance(self, word, known):
+        """Symbols that differ from a known channel, after moving its 1 to where word's is."""
+        p, q = self._one_position(known), self._one_position(word)
+        if p is not None and q is not None:
+            known = dict(known)
+            known[p], known[q] = known[q], known[p]
+        return sum(word[i] != known[i] for i in word)
+
+    def channel_candidates(self, channel):
+        """Channel words ({position: symbol}) for a channel we have no code for, most likely first."""
+        predicted = self._predicted_position(channel)
+        positions = list(self.channel_positions)
+        if predicted is not None:
+            # The trend can point past the symbols the known buttons use
+            reach = round(predicted)
+            if 0 <= reach < self.length and reach not in self.command_positions and reach not in positions:
+                positions = sorted(positions + [reach])
+        if not positions or len(self.alphabet) ** len(positions) > MAX_ENUMERATION:
+            return []
+        known = [{i: w.get(i, self.address.get(i)) for i in positions} for w in self.channel_words.values()]
+        ones = {list(w.values()).count("1") for w in known}
+
+        scored = []
+        for symbols in itertools.product(self.alphabet, repeat=len(positions)):
+            word = dict(zip(positions, symbols))
+            if word in known:
+                continue
+            # Same number of 1s as every known channel, if they agree
+            if len(ones) == 1 and symbols.count("1") not in ones:
+                continue
+            distance = min(self._distance(word, k) for k in known) if known else 0
+            trend = 0.0
+            if predicted is not None:
+                # Words that aren't one-hot have no 1 to line up: rank them after those that do
+                position = self._one_position(word)
+                trend = abs(position - predicted) if position is not None else float(self.length)
+            scored.append((trend, distance, symbols, word))
+        scored.sort(key=lambda item: item[:3])
+        return [word for _, _, _, word in scored]
+
+    def candidates(self, name, limit=DEFAULT_LIMIT):
+        """Ranked codes for a button, leaving out its own saved code."""
+        channel, command = parse_name(name)
+        own = self.codes.get(name.upper())
+        commands = [command] if command in self.commands else sorted(self.commands)
+        out = []
+
+        pair = self.channels.get(channel, {})
+        if pair and self.command_positions:
+            # Same channel, other command: only the command symbols change
+            word = self.channel_words[channel]
+            out.extend(self._build(word, self.commands[c]) for c in commands if c in self.commands)
+
+        if not out:
+            for word in self.channel_candidates(channel):
+                out.extend(self._build(word, self.commands[c]) for c in commands)
+                if len(out) >= limit:
+                    break
+
+        ranked = []
+        for code in out:
+            if code != own and code not in ranked:
+                ranked.append(code)
+        return ranked[:limit]
+
+    def new_button_candidates(self, limit=DEFAULT_LIMIT):
+        """Codes for the next button number nobody has saved yet."""
+        numbers = [int(c) for c in self.channels if c.isdigit()]
+        following = str(max(numbers) + 1) if numbers else "1"
+        return self.candidates(f"{following} ON", limit // 2) + self.candidates(f"{following} OFF", limit // 2)
+
+
+def load_model(path=CODES_FILE, exclude=()):
+    """A model of the saved codes, optionally pretending some buttons are unknown."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    skip = {name.upper() for name in exclude}
+    return CodeModel({name: entry["code"] for name, entry in data.items() if name.upper() not in skip})
+
+
+def predicted_first(name, path=CODES_FILE, limit=DEFAULT_LIMIT):
+    """Candidates for a button as the search tools want them: predicted codes, or [] if none."""
+    try:
+        return load_model(path, exclude=[name]).candidates(name, limit)
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def check(path, spread=2000, block=256):
+    """Leave each channel (and each single button) out and see where its real code ranks,
+    and how many yes/no rounds a search takes with and without the prediction."""
+    from group_search import GroupSearch, SimulatedOutlet
+
+    def rounds(code, predicted):
+        outlet = SimulatedOutlet(code)
+        search = GroupSearch(outlet.send, outlet.ask, block=block, log=lambda *_: None)
+        assert search.run_predicted(predicted, range(code - spread // 2, code + spread // 2 + 1)) == code
+        return search.rounds, search.transmitted
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    codes = {name.upper(): entry["code"] for name, entry in data.items()}
+    channels = sorted({parse_name(name)[0] for name in codes})
+    print(f"{'left out':>10} {'button':>8} {'rank':>5} {'rounds':>7} {'sent':>6} "
+          f"{'without':>8} {'sent':>6}")
+    ranks = []
+    for channel in channels:
+        for hidden in ([f"{channel} ON", f"{channel} OFF"], [f"{channel} OFF"]):
+            model = CodeModel({n: c for n, c in codes.items() if n not in hidden})
+            for name in hidden:
+                if name not in codes:
+                    continue
+                ranked = model.candidates(name)
+                rank = ranked.index(codes[name]) + 1 if codes[name] in ranked else None
+                ranks.append(rank)
+                print(f"{'+'.join(hidden):>10} {name:>8} {rank if rank else 'miss':>5} "
+                      f"{'%7d %6d' % rounds(codes[name], ranked)} {'%8d %6d' % rounds(codes[name], [])}")
+    found = [r for r in ranks if r]
+    print(f"found {len(found)}/{len(ranks)}, worst rank {max(found) if found else '-'} "
+          f"(out of {DEFAULT_LIMIT} candidates)")
+    assert len(found) == len(ranks)
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Infer code fields and predict button codes')
+    parser.add_argument('button', nargs='?', help="Button to predict (e.g. '6 ON')")
+    parser.add_argument('-n', '--limit', type=int, default=DEFAULT_LIMIT)
+    parser.add_argument('--check', action='store_true', help="Leave-one-out check on the saved codes")
+    parser.add_argument('--codes', default=CODES_FILE)
+    args = parser.parse_args()
+
+    if args.check:
+        check(args.codes)
+        return
+    model = load_model(args.codes, exclude=[args.button] if args.button else ())
+    print(model.describe())
+    if args.button:
+        print(f"\n🧠 Most likely codes for [{args.button.upper()}]:")
+        for rank, code in enumerate(model.candidates(args.button, args.limit), 1):
+            print(f"   {rank:2d}. {code} ({code:#08x})")
+
+
+if __name__ == "__main__":
+    main()
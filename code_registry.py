@@ -0,0 +1,211 @@
+"""
+In-memory view of remote_codes.json (and rf_scenes.json) for the long-running bridges.
+
+The file is parsed once into an immutable snapshot with a normalized lookup
+index and the Pico command payload already packed for every button. Each lookup
+only stat()s the file; the snapshot is rebuilt when the file actually changes.
+A file that fails to parse leaves the last good snapshot in place.
+"""
+import json
+import os
+import re
+import threading
+
+import pico_protocol
+
+DEFAULT_PROTOCOL = 1
+DEFAULT_PULSE = 150
+
+# "1 ON" -> outlet "1", state "ON"
+OUTLET_RE = re.compile(r"^(.*\S)\s+(ON|OFF)$", re.IGNORECASE)
+
+
+def normalize(name):
+    """'  1   on ' -> '1 on'"""
+    return " ".join(str(name).split()).casefold()
+
+
+class Button:
+    """One entry from remote_codes.json, ready to send."""
+
+    __slots__ = ("name", "code", "protocol", "pulselength", "payload", "entry", "outlet", "state",
+                 "transmitter", "item", "repeats", "send_repeats")
+
+    def __init__(self, name, entry, repeat_margin=0):
+        self.name = name
+        self.entry = entry
+        self.code = int(entry["code"])
+        self.protocol = int(entry.get("protocol", DEFAULT_PROTOCOL))
+        self.pulselength = int(entry.get("pulselength", DEFAULT_PULSE))
+        # Which outlet this button drives and what it sets it to. Explicit
+        # "outlet"/"state" fields win over the "<outlet> ON|OFF" naming convention.
+        match = OUTLET_RE.match(name)
+        self.outlet = entry.get("outlet", match.group(1) if match else None)
+        self.state = entry.get("state", match.group(2).upper() if match else None)
+        # Name of the Pico nearest this outlet (see TRANSMITTERS in rf_bridge_service.py)
+        self.transmitter = entry.get("transmitter")
+        # Fewest repeats that reliably reach the outlet (see calibrate_repeats.py).
+        # None leaves it to the Pico's default. The bridge adds a safety margin.
+        self.repeats = int(entry["repeats"]) if entry.get("repeats") else None
+        self.send_repeats = None
+        if self.repeats is not None:
+            self.send_repeats = min(self.repeats + repeat_margin, pico_protocol.MAX_REPEATS)
+        # Binary TX payload for the Pico (see pico_protocol.py), and the bare
+        # code/protocol/pulse item that goes into batch frames
+        self.item = pico_protocol.pack_tx(self.code, self.protocol, self.pulselength)
+        self.payload = pico_protocol.pack_tx(self.code, self.protocol, self.pulselength,
+                                             self.send_repeats)
+
+
+class Snapshot:
+    """Immutable result of parsing the codes file once."""
+
+    def __init__(self, codes_db, repeat_margin=0):
+        self.buttons = {}
+        self.index = {}
+
+        for name, entry in codes_db.items():
+            try:
+                self.buttons[name] = Button(name, entry, repeat_margin)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                print(f"Skipping malformed entry '{name}': {e}")
+
+        # Weakest keys first so exact names always win a collision
+        for name, button in self.buttons.items():
+            for alias in button.entry.get("aliases", []):
+                self.index[normalize(alias)] = button
+        for name, button in self.buttons.items():
+            folded = normalize(name)
+            self.index[folded.replace(" ", "")] = button
+            self.index[folded] = button
+            self.index[name] = button
+
+    def lookup(self, name):
+        return (self.index.get(name)
+                or self.index.get(normalize(name))
+                or self.index.get(normalize(name).replace(" ", "")))
+
+
+class WatchedJson:
+    """A JSON file parsed into some value, rebuilt only when the file changes."""
+
+    def __init__(self, path, build, empty):
+        self.path = path
+        self.build = build
+        self.value = empty
+        self.error = None
+        self.reloads = 0
+        self._seen = None           # Signature of the last file we attempted to parse
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self):
+        sig = self._signature()
+        if sig == self._seen:
+            return self.value
+
+        with self._lock:
+            if sig == self._seen:
+                return self.value
+            self._seen = sig
+
+            if sig is None:
+                self.error = f"{self.path} not found"
+                print(f"Error: {self.error}. Keeping previous snapshot.")
+                return self.value
+
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("top level must be an object")
+                value = self.build(data)
+            except (OSError, ValueError) as e:
+                self.error = f"Error loading {os.path.basename(self.path)}: {e}"
+                print(f"{self.error}. Keeping previous snapshot.")
+                return self.value
+
+            self.value = value
+            self.error = None
+            self.reloads += 1
+            print(f"📖 Loaded {len(data)} entries from {self.path}")
+            return self.value
+
+
+_write_lock = threading.Lock()
+
+
+def update_entry(path, name, create=False, **fields):
+    """Set fields on one entry of a codes file (adding the entry if create is set).
+    The file is replaced atomically, so a registry watching it reloads the new
+    version and never a half-written one."""
+    with _write_lock:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if create:
+            data.setdefault(name, {})
+        data[name].update(fields)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+
+def build_scenes(data):
+    """{"All Off": ["1 OFF", "2 OFF"]} -> {"all off": ("All Off", ["1 OFF", "2 OFF"])}"""
+    scenes = {}
+    for name, buttons in data.items():
+        if not isinstance(buttons, list) or not buttons:
+            raise ValueError(f"scene '{name}' must be a non-empty list of buttons")
+        scenes[normalize(name)] = (name, [str(b) for b in buttons])
+    return scenes
+
+
+class CodeRegistry:
+    """Thread-safe, change-driven cache of remote_codes.json (plus optional scenes file)."""
+
+    def __init__(self, path, scenes_path=None, repeat_margin=0):
+        self.path = path
+        self._codes = WatchedJson(path, lambda data: Snapshot(data, repeat_margin), Snapshot({}))
+        self._scenes = WatchedJson(scenes_path, build_scenes, {}) if scenes_path else None
+
+    @property
+    def last_error(self):
+        return self._codes.error or (self._scenes.error if self._scenes else None)
+
+    @property
+    def reloads(self):
+        return self._codes.reloads
+
+    def refresh(self):
+        """Reparse the codes file if it changed since the last look. Returns the current snapshot."""
+        return self._codes.get()
+
+    def lookup(self, name):
+        """Resolve a button name (exact, case/space-insensitive or alias). None if unknown."""
+        return self.refresh().lookup(name)
+
+    def update(self, name, create=False, **fields):
+        """Write fields into the codes file for one button (by its exact name)."""
+        update_entry(self.path, name, create, **fields)
+
+    def names(self):
+        return list(self.refresh().buttons.keys())
+
+    def scene_names(self):
+        if self._scenes is None:
+            return []
+        return [name for name, _ in self._scenes.get().values()]
+
+    def scene(self, name):
+        """Return the button names for a scene, or None if there is no such scene."""
+        if self._scenes is None:
+            return None
+        found = self._scenes.get().get(normalize(name))
+        return found[1] if found else None
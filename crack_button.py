@@ -1,20 +1,71 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import time
-from rpi_rf import RFDevice
+
+from code_registry import update_entry
+from param_search import (CODES_FILE, ParamSearch, ask_user, load_priors, open_cache,
+                          ranked_combos, rfdevice_sender)
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 
+def param_search(rfdevice, code, cache):
+    """Most likely protocol/pulse first, asking after each block (see param_search.py)."""
+    verified = load_priors()
+    print(f"🔨 CRACKING Code: {code}")
+    print(f"Trying the likeliest protocol/pulse combinations first ({len(verified)} verified buttons to learn from).")
+    print("Put the outlet in the opposite state. After each round, say whether it reacted.")
+    print("------------------------------------------------")
+    search = ParamSearch(rfdevice_sender(rfdevice), ask_user, cache)
+    found = search.run(ranked_combos([code], verified))
+    if found is None:
+        print("❌ Nothing confirmed. Check the code, or use --linear.")
+        return None
+    (_, proto, pulse), repeats = found
+    print(f"🎯 Proto={proto} | Pulse={pulse} (reacted at {repeats} repeats) "
+          f"in {search.rounds} rounds, {search.airtime:.1f}s of airtime")
+    return proto, pulse
+
+def save_params(code, proto, pulse):
+    """Offer to store the result on the buttons with this code, so later searches learn from it."""
+    try:
+        with open(CODES_FILE, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    for name, entry in data.items():
+        if entry.get('code') == code and input(f"💾 Save to [{name}]? [y/n]: ").strip().lower().startswith('y'):
+            update_entry(CODES_FILE, name, protocol=proto, pulselength=pulse)
+
 def main():
     parser = argparse.ArgumentParser(description='Crack Protocol/Pulse for a specific Code.')
     parser.add_argument('code', type=int, help="Code to crack (e.g. 4478209)")
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old fixed sweep at 25 repeats: press Ctrl+C when the outlet reacts")
+    parser.add_argument('--forget', action='store_true',
+                        help="Clear what earlier runs ruled out for this code (param_cache.json)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Neither skip nor remember combinations that didn't react")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
     
-    rfdevice = RFDevice(args.gpio)
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
+
+    if not args.linear:
+        try:
+            cache = open_cache(args.no_cache, [args.code] if args.forget else ())
+            found = param_search(rfdevice, args.code, cache)
+        finally:
+            rfdevice.cleanup()
+        if found is not None:
+            save_params(args.code, *found)
+        return
     
     print(f"🔨 CRACKING Code: {args.code}")
     print("Sweeping Pulse Lengths 100-600 across Protocols 1-5.")
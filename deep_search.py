@@ -5,21 +5,47 @@ import time
 import json
 import os
 import sys
-from rpi_rf import RFDevice
+
+import code_model
+import rf_waveform
+from calibrate_codes import entry_params
+from group_search import GroupSearch, ask_user, rfdevice_sender
+from sweep_journal import SweepJournal, journal_path, report
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
 
-# Verified settings
-PROTO = 1
-PULSE = 150
+# Search range around the sniffed code, scanned in blocks of SEARCH_BLOCK codes
+# (asking after each) before bisecting the one the outlet reacted to
+SEARCH_RANGE = 2000
+SEARCH_BLOCK = 256
+
+def group_search(rfdevice, key, sniffed_code, proto, pulse):
+    """Find the code with yes/no questions instead of Ctrl+C timing (see group_search.py)."""
+    print(f"Searching +/- {SEARCH_RANGE} in blocks of {SEARCH_BLOCK}.")
+    print("Put the outlet in the opposite state. After each round, say whether it reacted.")
+    search = GroupSearch(rfdevice_sender(rfdevice, proto, pulse), ask_user, block=SEARCH_BLOCK)
+    found = search.run_predicted(code_model.predicted_first(key, CODES_FILE),
+                                 range(sniffed_code - SEARCH_RANGE, sniffed_code + SEARCH_RANGE + 1))
+    if found is None:
+        print("❌ No code confirmed. Try again, or use --linear.")
+    else:
+        print(f"🎯 Found {found} (Offset: {found - sniffed_code:+d}) in {search.rounds} rounds")
+    return found
 
 def main():
     parser = argparse.ArgumentParser(description='Deep Search for lost RF buttons.')
     parser.add_argument('button', type=str, help="Button to search (e.g. '3 ON')")
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old one-code-at-a-time sweep: press Ctrl+C when the outlet reacts")
+    parser.add_argument('--resume', action='store_true',
+                        help="(--linear) carry on from where the last sweep of this range stopped")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
     
     if not os.path.exists(CODES_FILE):
@@ -35,13 +61,27 @@ def main():
         sys.exit(1)
         
     sniffed_code = data[key]['code']
-    rfdevice = RFDevice(args.gpio)
+    # The protocol/pulse sniffed for this button (see rf_infer.py)
+    proto, pulse = entry_params(data[key])
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
     
     print(f"🕵️  DEEP SEARCH for [{key}]")
     print(f"Sniffed Center: {sniffed_code}")
-    print(f"Settings: Proto {PROTO}, Pulse {PULSE}")
+    print(f"Settings: Proto {proto}, Pulse {pulse}")
     print("------------------------------------------------")
+
+    if not args.linear:
+        try:
+            found = group_search(rfdevice, key, sniffed_code, proto, pulse)
+        finally:
+            rfdevice.cleanup()
+        if found is not None and input(f"💾 Save {found} for [{key}]? [y/n]: ").strip().lower().startswith('y'):
+            data[key]['code'] = found
+            with open(CODES_FILE, 'w') as f:
+                json.dump(data, f, indent=2)
+        return
+
     print("Searching wide range (+/- 2000)...")
     print("Press Ctrl+C IMMEDIATELY when the outlet reacts!")
     
@@ -52,23 +92,37 @@ def main():
     step = 1
     # Optimization: Maybe step by 2 if we assume standard spacing? 
     # No, let's overlap to be sure.
+
+    # Logs every code sent, for matching Ctrl+C to a code and for --resume
+    journal = SweepJournal(journal_path("deep", start_code, end_code), start_code, end_code, step,
+                           resume=args.resume)
+    first_code = journal.resume_point()
+    if first_code != start_code:
+        print(f"⏩ Resuming at {first_code} (Offset: {first_code - sniffed_code:+d})")
+
+    last_sent = first_code
     
     try:
         rfdevice.tx_repeat = 5 # Fast repeat to cover ground
         
-        for code in range(start_code, end_code + 1, step):
+        for code in range(first_code, end_code + 1, step):
+            last_sent = code
+            journal.record(code, proto, pulse)
             if code % 10 == 0:
                 print(f"👉 Scanning: {code} (Offset: {code - sniffed_code:+d})", end='\r')
                 
-            rfdevice.tx_code(code, PROTO, PULSE)
+            rfdevice.tx_code(code, proto, pulse)
             # Very short sleep - we relying on user reaction + backtracking
             time.sleep(0.05)
             
     except KeyboardInterrupt:
-        print(f"\n\n🛑 STOPPED at ~{code}!")
+        interrupted = time.monotonic()
+        print(f"\n\n🛑 STOPPED at ~{last_sent}!")
+        frame_s = rf_waveform.airtime_us(rf_waveform.frame_timings(last_sent, pulse, protocol=proto)) / 1e6
+        ranked = report(journal, interrupted, frame_s)
         print("Entering FINE TUNE mode to pinpoint it.")
         
-        current_code = code - 50 # Backtrack 50 to cover reaction time
+        current_code = ranked[0] if ranked else last_sent - 50 # Backtrack 50 to cover reaction time
         
         print(" Controls:")
         print("  [a] -1  (Previous)")
@@ -84,12 +138,12 @@ def main():
             elif cmd == 'd': current_code += 1
             elif cmd == 's': 
                 rfdevice.tx_repeat = 15
-                rfdevice.tx_code(current_code, PROTO, PULSE)
+                rfdevice.tx_code(current_code, proto, pulse)
                 print(" Fired.")
             elif cmd == 'w':
                 print(" Sweeping local...")
                 for c in range(current_code-5, current_code+6):
-                    rfdevice.tx_code(c, PROTO, PULSE)
+                    rfdevice.tx_code(c, proto, pulse)
                     time.sleep(0.1)
             elif cmd == 'y' or cmd == 'save':
                 print(f"💾 Saving {current_code} for [{key}]...")
@@ -99,6 +153,7 @@ def main():
                 return
                 
     finally:
+        journal.close()
         rfdevice.cleanup()
 
 if __name__ == "__main__":
@@ -5,17 +5,21 @@ import time
 import json
 import os
 import sys
-from rpi_rf import RFDevice
+from collections import Counter
+
+import code_model
+import rf_waveform
+from calibrate_codes import PROTO, PULSE, entry_params
+from group_search import GroupSearch, ask_user
+from pico_sweep import PicoSweeper, pico_sender
+from sweep_journal import SweepJournal, journal_path, report
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
 
-# Verified settings (Button 1)
-PROTO = 1
-PULSE = 150
-
 # We know Button 1 is at ~4478259.
 # Sniffer saw Button 4 down at ~4474113.
 # The "Safe Zone" seems to be 4470000 to 4480000.
@@ -25,7 +29,48 @@ PULSE = 150
 START_CODE = 4470000
 END_CODE   = 4480000
 
-def save_code(data, code, btn_hint="UNKNOWN"):
+# The group search scans in blocks of this many codes, asking after each,
+# then bisects the block that made something click (see group_search.py)
+SEARCH_BLOCK = 500
+# Frames per code while sweeping
+SWEEP_REPEATS = 4
+
+class GpioSweeper:
+    """The Pi's own transmitter, with the same sweep()/send() as PicoSweeper."""
+
+    def __init__(self, gpio, backend="gpio"):
+        self.rfdevice = RFTransmitter(gpio, backend)
+        self.rfdevice.enable_tx()
+        self.interrupted_at = None
+
+    def sweep(self, start, end, step=1, repeats=SWEEP_REPEATS, protocol=PROTO, pulse=PULSE,
+              on_code=None):
+        self.rfdevice.tx_repeat = repeats
+        try:
+            for code in range(start, end + 1, step):
+                if on_code is not None:
+                    on_code(code, time.monotonic())
+                self.rfdevice.tx_code(code, protocol, pulse)
+        except KeyboardInterrupt:
+            self.interrupted_at = time.monotonic()
+            raise
+        return end, False
+
+    def send(self, code, repeats=15, protocol=PROTO, pulse=PULSE):
+        self.rfdevice.tx_repeat = repeats
+        self.rfdevice.tx_code(code, protocol, pulse)
+
+    def close(self):
+        self.rfdevice.cleanup()
+
+def sweep_params(data, button=None):
+    """The button's own protocol/pulse, else what most saved buttons of the remote use."""
+    if button and button in data:
+        return entry_params(data[button])
+    counts = Counter(entry_params(entry) for entry in data.values())
+    return counts.most_common(1)[0][0] if counts else (PROTO, PULSE)
+
+def save_code(data, code, proto, pulse, btn_hint="UNKNOWN"):
     # Save as a temporary finding
     key = f"FOUND_{code}"
     print(f"\n💾 Saving recovered code {code} as '{key}'...")
@@ -35,11 +80,12 @@ def save_code(data, code, btn_hint="UNKNOWN"):
     if real_name:
         key = real_name
         
-    data[key] = {
+    # What was swept is what the outlet answered to
+    data.setdefault(key, {}).update({
         "code": code,
-        "protocol": PROTO,
-        "pulselength": PULSE
-    }
+        "protocol": proto,
+        "pulselength": pulse
+    })
     
     with open(CODES_FILE, 'w') as f:
         json.dump(data, f, indent=2)
@@ -49,10 +95,22 @@ def main():
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin")
     parser.add_argument('--start', type=int, default=START_CODE, help=f"Start Code (Def: {START_CODE})")
     parser.add_argument('--end', type=int, default=END_CODE, help=f"End Code (Def: {END_CODE})")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old one-code-at-a-time sweep: press Ctrl+C when an outlet clicks")
+    parser.add_argument('--resume', action='store_true',
+                        help="(--linear) carry on from where the last sweep of this range stopped")
+    parser.add_argument('--pico', metavar='PORT', default=None,
+                        help="Sweep on a Pico (e.g. /dev/ttyACM0) instead of GPIO. "
+                             "It makes the codes itself, so it runs at the radio's full speed.")
+    parser.add_argument('--button', default=None,
+                        help="Button you're looking for (e.g. '6 ON'), to try the codes code_model.py "
+                             "predicts for it first. Default: the next unsaved button number.")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
-    
-    rfdevice = RFDevice(args.gpio)
-    rfdevice.enable_tx()
+
+    # The Pico generates ranges on the device (SWEEP); GPIO goes code by code from Python
+    sweeper = PicoSweeper(args.pico) if args.pico else GpioSweeper(args.gpio, args.backend)
     
     # Load existing to save correctly later
     if os.path.exists(CODES_FILE):
@@ -62,35 +120,70 @@ def main():
         data = {}
 
     print(f"🌌 FULL SPECTRUM SWEEP")
+    proto, pulse = sweep_params(data, args.button.upper() if args.button else None)
     print(f"Scanning from {args.start} to {args.end}")
-    print(f"Est time: {(args.end - args.start) / 40 / 60:.1f} minutes.")
+    print(f"Settings: Proto {proto}, Pulse {pulse}")
+
+    if not args.linear:
+        target = args.button or "the outlet you're looking for"
+        print(f"Sending blocks of {SEARCH_BLOCK} codes. After each, say whether {target} clicked.")
+        print("Ignore the other outlets: codes already saved aren't sent.")
+        print("------------------------------------------------")
+        # A saved code in a block would click its own outlet, and a "yes" to that
+        # would lead the bisection to a button we already have
+        known = {v['code'] for v in data.values()}
+        try:
+            search = GroupSearch(pico_sender(sweeper, proto, pulse), ask_user, block=SEARCH_BLOCK)
+            if args.button:
+                predicted = code_model.predicted_first(args.button, CODES_FILE)
+            else:
+                predicted = code_model.CodeModel({k: v['code'] for k, v in data.items()}).new_button_candidates()
+            predicted = [code for code in predicted if code not in known]
+            found = search.run_predicted(predicted, [code for code in range(args.start, args.end + 1)
+                                                     if code not in known])
+        finally:
+            sweeper.close()
+        if found is None:
+            print("❌ No code confirmed.")
+            return
+        print(f"🎯 Found {found} in {search.rounds} rounds")
+        save_code(data, found, proto, pulse)
+        return
+
+    # Airtime alone; GPIO adds Python's overhead on top
+    per_code = rf_waveform.airtime_us(rf_waveform.frame_timings(args.start, pulse, protocol=proto)) * SWEEP_REPEATS / 1e6
+    print(f"Est time: {(args.end - args.start) * per_code / 60:.1f} minutes or more.")
     print("ALL BUTTONS might activate. Watch EVERYTHING.")
     print("Press Ctrl+C IMMEDIATELY when ANY outlet clicks!")
     print("------------------------------------------------")
     
-    last_sent = 0
+    # Every code goes in the journal with the time it started, so a Ctrl+C can be
+    # matched to what was on air and an interrupted sweep picks up with --resume
+    journal = SweepJournal(journal_path("full", args.start, args.end), args.start, args.end,
+                           resume=args.resume)
+    first_code = journal.resume_point()
+    if first_code != args.start:
+        print(f"⏩ Resuming at {first_code}")
+    last = {"sent": first_code}
+
+    def progress(code, when):
+        journal.record(code, proto, pulse, when)
+        last["sent"] = code
+        if code % 100 == 0:
+            print(f"👉 Scanning: {code} ...", end='\r')
+
     try:
-        # High speed mode
-        rfdevice.tx_repeat = 4 
-        
         # We step by 1 to be thorough.
-        for code in range(args.start, args.end + 1):
-            last_sent = code
-            if code % 100 == 0:
-                 print(f"👉 Scanning: {code} ...", end='\r')
-                 
-            rfdevice.tx_code(code, PROTO, PULSE)
-            # No sleep needed really if tx_repeat is small, the library takes time
-            # But let's add tiny delay to breathe
-            # time.sleep(0.005)
-            
+        sweeper.sweep(first_code, args.end, 1, SWEEP_REPEATS, proto, pulse, on_code=progress)
         print("\n❌ Completed sweep.")
         
     except KeyboardInterrupt:
+        last_sent = last["sent"]
         print(f"\n\n🛑 STOPPED at ~{last_sent}!")
+        ranked = report(journal, sweeper.interrupted_at or time.monotonic(), per_code / SWEEP_REPEATS)
         print("Entering FINE TUNE mode.")
         
-        current_code = last_sent - 10 # Backtrack 
+        current_code = ranked[0] if ranked else last_sent - 10 # Backtrack 
         
         print(" Controls:")
         print("  [a] -1")
@@ -103,15 +196,15 @@ def main():
             if cmd == 'a': current_code -= 1
             elif cmd == 'd': current_code += 1
             elif cmd == 's': 
-                rfdevice.tx_repeat = 15
-                rfdevice.tx_code(current_code, PROTO, PULSE)
+                sweeper.send(current_code, 15, proto, pulse)
                 print(" Fired.")
             elif cmd == 'y' or cmd == 'save':
-                save_code(data, current_code)
+                save_code(data, current_code, proto, pulse)
                 return
                 
     finally:
-        rfdevice.cleanup()
+        journal.close()
+        sweeper.close()
 
 if __name__ == "__main__":
     main()
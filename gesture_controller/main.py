@@ -1,3 +1,4 @@
+import json
 import os
 # Increase FFmpeg network timeout to 30 seconds to prevent drops
 os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "timeout;30000"
@@ -7,12 +8,15 @@ import requests
 import time
 import threading
 import argparse
+from websockets.sync.client import connect
 
 # Configuration
 # IP Webcam URL - Replace with the actual URL from your Android app
 DEFAULT_VIDEO_URL = "http://192.168.1.97:8080/video"
 # Home Automation API URL
 API_URL = "http://puck-server.tailcfee0c.ts.net:5000/api/control"
+# Persistent control channel on the same server (falls back to API_URL if it's down)
+WS_URL = "ws://puck-server.tailcfee0c.ts.net:5001/?client=gesture"
 
 # Constants
 DEBOUNCE_TIME = 2.0  # Seconds between commands
@@ -59,6 +63,38 @@ class ThreadedCamera:
         self.stopped = True
         self.stream.release()
 
+class BridgeSocket:
+    """One long-lived WebSocket to the RF bridge, reopened on the next command if it drops."""
+    def __init__(self, url, on_state=None):
+        self.url = url
+        self.on_state = on_state
+        self.ws = None
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    def send(self, button_name, timeout=5):
+        with self.lock:
+            try:
+                if self.ws is None:
+                    self.ws = connect(self.url, open_timeout=2)
+                self.next_id += 1
+                msg_id = self.next_id
+                self.ws.send(json.dumps({"id": msg_id, "button": button_name}))
+                deadline = time.time() + timeout
+                while True:
+                    reply = json.loads(self.ws.recv(timeout=max(0.1, deadline - time.time())))
+                    if reply.get("type") == "state":
+                        # Outlet changed (maybe by another client); keep our toggles in sync
+                        if self.on_state:
+                            self.on_state(reply)
+                    elif reply.get("id") == msg_id:
+                        return reply
+            except Exception:
+                if self.ws is not None:
+                    self.ws.close()
+                self.ws = None
+                raise
+
 import platform
 # Audio libs removed as per user request
 
@@ -97,6 +133,7 @@ class GestureController:
         
         # Toggle State Tracking (1-5)
         self.light_states = {i: False for i in range(1, 6)}
+        self.bridge = BridgeSocket(WS_URL, on_state=self.on_outlet_state)
 
     def set_torch(self, on):
         """Turn IP Webcam torch ON or OFF"""
@@ -128,9 +165,20 @@ class GestureController:
         button_name = f"{light_id} {suffix}"
         
         def _send():
+            print(f"Sending command: {button_name}...")
+            try:
+                reply = self.bridge.send(button_name)
+                if reply.get("status") == "success":
+                    print(f"Success: {button_name}")
+                else:
+                    print(f"Failed: {reply.get('error')}")
+                return
+            except Exception as e:
+                print(f"WebSocket unavailable ({e}), falling back to HTTP")
             try:
-                print(f"Sending command: {button_name}...")
-                response = requests.post(API_URL, json={'button': button_name}, timeout=5)
+                # Tag ourselves so the bridge schedules gestures as interactive
+                response = requests.post(API_URL, json={'button': button_name},
+                                         headers={'X-RF-Client': 'gesture'}, timeout=5)
                 if response.status_code == 200:
                     print(f"Success: {button_name}")
                 else:
@@ -141,6 +189,14 @@ class GestureController:
         threading.Thread(target=_send, args=(), daemon=True).start()
         return f"{button_name}"
 
+    def on_outlet_state(self, update):
+        try:
+            light_id = int(update["outlet"])
+        except (KeyError, ValueError):
+            return
+        if light_id in self.light_states:
+            self.light_states[light_id] = update["state"] == "ON"
+
     def get_finger_status(self, landmarks):
         # ... (same as before) ...
         """
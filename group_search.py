@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Find which code an outlet answers to by sending groups of codes and asking.
+
+Instead of stepping through a range one code at a time and hoping Ctrl+C
+lands close to the right one, send a whole block of candidates and ask
+"did the outlet react?". Yes keeps that half, no keeps the other half.
+N candidates take about log2(N) questions: ±2000 codes is 12 rounds.
+
+Sending a block costs airtime for every code in it, so long ranges are
+first scanned in blocks of `block` codes, asking after each one, and only
+the block that made the outlet react gets bisected.
+
+    search = GroupSearch(send=rfdevice_sender(rfdevice), ask=ask_user)
+    code = search.run(range(center - 2000, center + 2001))
+
+`python group_search.py --simulate` prints the round counts against a
+simulated outlet; test_group_search.py holds them to log2(N) + 1.
+"""
+import argparse
+import math
+import random
+
+# Repeats per code inside a block. A block is long, so the outlet gets several
+# chances; fewer repeats than a normal press keep the airtime down.
+BLOCK_REPEATS = 5
+CONFIRM_REPEATS = 15
+# Predicted codes (code_model.py) are asked about in small blocks, most likely first
+PREDICTED_BLOCK = 4
+
+
+class GroupSearch:
+
+    def __init__(self, send, ask, block=None, log=print):
+        """send(codes, repeats) transmits codes in order. ask(question) returns
+        True/False, or None to send the same group again."""
+        self.send = send
+        self.ask = ask
+        self.block = block
+        self.log = log
+        self.rounds = 0
+        self.transmitted = 0
+
+    def test(self, codes, repeats=BLOCK_REPEATS):
+        while True:
+            self.rounds += 1
+            self.transmitted += len(codes)
+            if len(codes) == 1:
+                self.log(f"📡 Round {self.rounds}: sending {codes[0]}")
+            else:
+                self.log(f"📡 Round {self.rounds}: sending {len(codes)} codes ({codes[0]} .. {codes[-1]})")
+            self.send(codes, repeats)
+            answer = self.ask("Did the outlet react?")
+            if answer is not None:
+                return answer
+
+    def bisect(self, codes):
+        """Narrow a group known to contain the code down to one."""
+        while len(codes) > 1:
+            half = codes[:len(codes) // 2]
+            codes = half if self.test(half) else codes[len(codes) // 2:]
+        return codes[0]
+
+    def run(self, candidates, block=None, present=True):
+        """Returns the code the outlet reacts to, or None.
+
+        present=False when the code may not be among the candidates at all.
+        """
+        codes = list(candidates)
+        if not codes:
+            return None
+        size = block or self.block or len(codes)
+        for start in range(0, len(codes), size):
+            group = codes[start:start + size]
+            # A single block covering everything needn't be asked about first
+            if (len(group) < len(codes) or not present) and not self.test(group):
+                continue
+            found = self.bisect(group)
+            if self.test([found], CONFIRM_REPEATS):
+                return found
+            self.log(f"🤔 {found} didn't confirm on its own, an answer was probably off")
+            return None
+        return None
+
+    def run_predicted(self, predicted, candidates):
+        """Try the predicted codes first (ranked, see code_model.py), then the rest."""
+        predicted = list(predicted)
+        if predicted:
+            self.log(f"🧠 Trying the {len(predicted)} codes code_model.py predicts first")
+            found = self.run(predicted, block=PREDICTED_BLOCK, present=False)
+            if found is not None:
+                return found
+            self.log("🔎 Not one of those, searching the whole range")
+        tried = set(predicted)
+        return self.run([code for code in candidates if code not in tried])
+
+
+def ask_user(question):
+    """y / n, or r to send the same codes again."""
+    while True:
+        answer = input(f"   {question} [y/n/r=resend]: ").strip().lower()
+        if answer.startswith('y'):
+            input("   Switch the outlet back with the remote, then press Enter...")
+            return True
+        if answer.startswith('n'):
+            return False
+        if answer.startswith('r'):
+            return None
+
+
+def rfdevice_sender(rfdevice, protocol=1, pulse=150):
+    """send() for the Pi's own transmitter (tx_backends.RFTransmitter, or an rpi_rf RFDevice)."""
+    def send(codes, repeats):
+        rfdevice.tx_repeat = repeats
+        for code in codes:
+            rfdevice.tx_code(code, protocol, pulse)
+    return send
+
+
+class SimulatedOutlet:
+    """Reacts when a group contains its code. `miss` is the chance it doesn't."""
+
+    def __init__(self, code, miss=0.0, seed=None):
+        self.code = code
+        self.miss = miss
+        self.random = random.Random(seed)
+        self.reacted = False
+
+    def send(self, codes, repeats):
+        self.reacted = self.code in codes and self.random.random() >= self.miss
+
+    def ask(self, question):
+        reacted, self.reacted = self.reacted, False
+        return reacted
+
+
+def simulate(sizes, trials, block, seed):
+    rng = random.Random(seed)
+    print(f"{'codes':>7} {'block':>6} {'log2':>5} {'max rounds':>11} {'avg rounds':>11} {'avg sent':>9}")
+    for n in sizes:
+        rounds, sent = [], []
+        for _ in range(trials):
+            center = rng.randrange(4_000_000, 5_000_000)
+            candidates = range(center - n // 2, center - n // 2 + n)
+            outlet = SimulatedOutlet(rng.choice(candidates))
+            search = GroupSearch(outlet.send, outlet.ask, block=block, log=lambda *_: None)
+            assert search.run(candidates) == outlet.code
+            rounds.append(search.rounds)
+            sent.append(search.transmitted)
+        bound = math.ceil(math.log2(n)) + 1
+        if not block:
+            # Pure bisection: log2(N) questions plus one to confirm
+            assert max(rounds) <= bound, (n, max(rounds), bound)
+        print(f"{n:7d} {block or '-':>6} {math.log2(n):5.1f} {max(rounds):11d} "
+              f"{sum(rounds) / trials:11.1f} {sum(sent) / trials:9.0f}")
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Group-testing code search (self-check)')
+    parser.add_argument('--simulate', action='store_true', help="Check round counts on a simulated outlet")
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--block', type=int, default=None, help="Scan in blocks of this many codes first")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not args.simulate:
+        parser.print_help()
+        return
+    simulate([16, 151, 256, 4001, 10001], args.trials, args.block, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,48 @@ import json
 import os
 import argparse
 
+from bridge_client import SOCKET_PATH, BridgeClient, BridgeUnavailable
+
 # Config
 DEFAULT_PICO_PORT = "/dev/ttyACM0"
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+REPEAT_MARGIN = 2
+
+def send_via_bridge(buttons, force):
+    """Send through a running rf_bridge_service.py. Returns False if there isn't one."""
+    try:
+        bridge = BridgeClient()
+    except BridgeUnavailable:
+        return False
+
+    print(f"Using the bridge on {SOCKET_PATH}")
+    failed = False
+    with bridge:
+        for name in buttons:
+            reply = bridge.press(name, force=force)
+            if reply.get("status") == "success":
+                print(f"🚀 {reply.get('message')} ({reply.get('outcome')})")
+            else:
+                print(f"Error: {reply.get('error')}")
+                failed = True
+    if failed:
+        sys.exit(1)
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description='Send RF codes via Pi Pico bridge')
-    parser.add_argument('button', type=str, help="Button to fire (e.g. '1 ON')")
+    parser.add_argument('buttons', nargs='+', help="Buttons to fire in order (e.g. '1 ON' '2 OFF')")
     parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="Serial port of the Pico")
+    parser.add_argument('--direct', action='store_true',
+                        help="Open the Pico yourself even if rf_bridge_service.py is running")
+    parser.add_argument('--force', action='store_true',
+                        help="(bridge) send even if the outlet is already in that state")
     args = parser.parse_args()
 
+    if not args.direct and send_via_bridge(args.buttons, args.force):
+        return
+
     # 1. Load the database
     if not os.path.exists(CODES_FILE):
         print(f"Error: {CODES_FILE} not found.")
@@ -24,32 +55,36 @@ def main():
     with open(CODES_FILE, 'r') as f:
         codes_db = json.load(f)
 
-    btn_key = args.button.upper()
-    if btn_key not in codes_db:
-        print(f"Error: Button '{btn_key}' not in database.")
+    unknown = [b for b in args.buttons if b.upper() not in codes_db]
+    if unknown:
+        print(f"Error: Buttons {unknown} not in database.")
         print(f"Available: {list(codes_db.keys())}")
         return
 
-    data = codes_db[btn_key]
-    code = data['code']
-    proto = data.get('protocol', 1)
-    pulse = data.get('pulselength', 150)
-
     # 2. Connect to Pico
     try:
         print(f"Connecting to Pico on {args.port}...")
         ser = serial.Serial(args.port, 115200, timeout=1)
         time.sleep(1) # Wait for handshake
-        
-        # 3. Send the command
-        cmd = f"{code},{proto},{pulse}\n"
-        print(f"🚀 Sending to Pico: {cmd.strip()}")
-        ser.write(cmd.encode())
-        
-        # Wait for feedback
-        response = ser.read_until(b"Done.").decode()
-        print(f"Pico says: {response.strip()}")
-        
+
+        # 3. Send the commands, one at a time
+        for name in args.buttons:
+            data = codes_db[name.upper()]
+            code = data['code']
+            proto = data.get('protocol', 1)
+            pulse = data.get('pulselength', 150)
+
+            cmd = f"{code},{proto},{pulse}\n"
+            if data.get('repeats'):
+                # Learned with calibrate_repeats.py, plus the same margin the bridge adds
+                cmd = f"{code},{proto},{pulse},{data['repeats'] + REPEAT_MARGIN}\n"
+            print(f"🚀 Sending to Pico: {cmd.strip()}")
+            ser.write(cmd.encode())
+
+            # Wait for feedback
+            response = ser.read_until(b"Done.").decode()
+            print(f"Pico says: {response.strip()}")
+
         ser.close()
     except Exception as e:
         print(f"Serial Error: {e}")
@@ -6,23 +6,55 @@ import logging
 import os
 import sys
 import time
-from rpi_rf import RFDevice
+
+from bridge_client import SOCKET_PATH, BridgeClient, BridgeUnavailable
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 CODES_FILE = os.path.join(os.path.dirname(__file__), "remote_codes.json")
+REPEAT_MARGIN = 2
+
+def send_via_bridge(buttons):
+    """Send through a running rf_bridge_service.py. Returns False if there isn't one."""
+    try:
+        bridge = BridgeClient()
+    except BridgeUnavailable:
+        return False
+
+    print(f"📡 Bridge is running, sending through {SOCKET_PATH}")
+    failed = False
+    with bridge:
+        for name in buttons:
+            reply = bridge.press(name)
+            if reply.get("status") == "success":
+                print(f"✅ {reply.get('message')} ({reply.get('outcome')})")
+            else:
+                print(f"Error: {reply.get('error')}")
+                failed = True
+    if failed:
+        sys.exit(1)
+    print("Done.")
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description='Mimic an RF remote button press.')
-    parser.add_argument('button', type=str, help="Button name (e.g., '1 ON', '3 OFF')")
+    parser.add_argument('buttons', nargs='+', help="Button names, sent in order (e.g., '1 ON', '3 OFF')")
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX,
                         help="GPIO pin (Default: 17)")
     parser.add_argument('-r', '--repeat', dest='repeat', type=int, default=20,
                         help="Repeat count (Default: 20)")
     parser.add_argument('--blast', dest='blast', action='store_true',
-                        help="Send a blast of signals with varying pulse lengths to ensure reception.")
+                        help="Send a blast of signals with varying pulse lengths to ensure reception. "
+                             "Always uses the GPIO transmitter.")
+    parser.add_argument('--direct', action='store_true',
+                        help="Use the GPIO transmitter even if rf_bridge_service.py is running")
+    parser.add_argument('--backend', default='gpio', choices=['gpio', 'lgpio'],
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
 
+    if not (args.direct or args.blast) and send_via_bridge(args.buttons):
+        return
+
     # Load codes
     if not os.path.exists(CODES_FILE):
         print(f"Error: Codes file not found at {CODES_FILE}")
@@ -33,39 +65,50 @@ def main():
         codes_db = json.load(f)
 
     # Normalize input
-    btn_key = args.button.upper() 
-    if btn_key not in codes_db:
-        matches = [k for k in codes_db.keys() if k.upper() == btn_key]
-        if matches:
-            btn_key = matches[0]
-        else:
-            print(f"Error: Button '{args.button}' not found in database.")
-            print("Available buttons:", ", ".join(sorted(codes_db.keys())))
-            sys.exit(1)
+    keys = []
+    for button in args.buttons:
+        btn_key = button.upper()
+        if btn_key not in codes_db:
+            matches = [k for k in codes_db.keys() if k.upper() == btn_key]
+            if matches:
+                btn_key = matches[0]
+            else:
+                print(f"Error: Button '{button}' not found in database.")
+                print("Available buttons:", ", ".join(sorted(codes_db.keys())))
+                sys.exit(1)
+        keys.append(btn_key)
 
-    data = codes_db[btn_key]
-    
-    rfdevice = RFDevice(args.gpio)
+    # Only needed (and only installed) on the Pi itself
+    from tx_backends import RFTransmitter
+
+    # Compiled timing tables on the chosen backend, instead of rpi_rf's own loop
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
-    
-    code = data['code']
-    # PRECISE TRANSMISSION MODE
-    # The user has calibrated the codes using calibrate_codes.py.
-    # We trust the JSON file contains the exact integer needed.
-    # No blasts. No sweeps. Just the sniper shot.
-    
-    if args.blast:
-        print(f"⚠️  Note: Blast mode requested, but we are using PRECISE CALIBRATED CODE.")
-        rfdevice.tx_repeat = 30 # Extra repeats just for reliability
-    else:
-        rfdevice.tx_repeat = 15 # Standard
-        
-    logging.info(f"Sending [{btn_key}]...")
-    print(f"📡 Transmitting: Code={code}, Pulse=150, Proto=1, Repeat={rfdevice.tx_repeat}")
-    
-    # Verified: Protocol 1, Pulse 150
-    rfdevice.tx_code(code, 1, 150)
-    
+
+    for btn_key in keys:
+        data = codes_db[btn_key]
+        code = data['code']
+        # Sniffed with the button (see rf_infer.py), like mimic_pico.py
+        proto = data.get('protocol', 1)
+        pulse = data.get('pulselength', 150)
+        # PRECISE TRANSMISSION MODE
+        # The user has calibrated the codes using calibrate_codes.py.
+        # We trust the JSON file contains the exact integer needed.
+        # No blasts. No sweeps. Just the sniper shot.
+
+        if args.blast:
+            print(f"⚠️  Note: Blast mode requested, but we are using PRECISE CALIBRATED CODE.")
+            rfdevice.tx_repeat = 30 # Extra repeats just for reliability
+        elif data.get('repeats'):
+            # Learned with calibrate_repeats.py, plus the same margin the bridge adds
+            rfdevice.tx_repeat = data['repeats'] + REPEAT_MARGIN
+        else:
+            rfdevice.tx_repeat = 15 # Standard
+
+        logging.info(f"Sending [{btn_key}]...")
+        print(f"📡 Transmitting: Code={code}, Pulse={pulse}, Proto={proto}, Repeat={rfdevice.tx_repeat}")
+        rfdevice.tx_code(code, proto, pulse)
+
     rfdevice.cleanup()
     print("Done.")
 
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Find the protocol and pulse length an outlet answers to, most likely first.
+
+The old crackers walked protocol x pulse grids in fixed nested loops at 15-25
+repeats each. This orders the grid by what already works: every verified
+entry in remote_codes.json (one with its own protocol and pulselength)
+makes nearby combinations more likely, and each protocol's standard pulse
+length (rf_waveform.PROTOCOLS) gets a weaker vote. Blocks of combinations
+go out at a few repeats and you say whether the outlet reacted, like
+group_search.py. Only a near-miss costs more airtime: an answer of "sort of"
+or a block that reacted but then lost the code while being split up gets
+sent again with more repeats. Blocks that didn't react are remembered in
+param_cache.json; a combination is skipped once it has missed in two
+separate runs, for DEAD_DAYS, so one click that went unnoticed doesn't
+hide the right answer for good (--forget clears a code, --no-cache ignores
+the file).
+
+    search = ParamSearch(rfdevice_sender(rfdevice), ask_user, ResultCache())
+    found = search.run(ranked_combos([code], load_priors()))
+
+`python param_search.py --simulate` compares it with the old loops on a
+simulated outlet.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+
+import rf_waveform
+
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+CACHE_FILE = os.path.join(FILES_DIR, "param_cache.json")
+
+PROTOCOLS = sorted(rf_waveform.PROTOCOLS)
+# Same grid crack_button.py always swept
+PULSES = list(range(120, 300, 5)) + list(range(300, 600, 10))
+
+# Repeats per combination: a block starts at the first, near-misses climb the ladder
+LADDER = (2, 5, 12)
+CONFIRM_REPEATS = 15
+# First block size; blocks double further down the ranking, where hits are unlikely
+BLOCK = 8
+MAX_BLOCK = 32
+# Spread of a verified pulse length's vote, and of a protocol's standard pulse
+PULSE_BANDWIDTH = 20
+DEFAULT_BANDWIDTH = 80
+DEFAULT_WEIGHT = 0.3
+
+NEAR = "near"
+
+# A combination is only skipped after missing this many runs, and not for ever
+DEAD_STRIKES = 2
+DEAD_DAYS = 30
+
+
+def load_priors(path=CODES_FILE):
+    """[(protocol, pulse)] of every verified entry, i.e. one that sets both itself."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [(int(e["protocol"]), int(e["pulselength"])) for e in data.values()
+            if isinstance(e, dict) and "protocol" in e and "pulselength" in e]
+
+
+def prior(protocol, pulse, verified):
+    def bump(center, width):
+        return math.exp(-0.5 * ((pulse - center) / width) ** 2)
+    score = DEFAULT_WEIGHT * bump(rf_waveform.PROTOCOLS[protocol][0], DEFAULT_BANDWIDTH)
+    score += sum(bump(p, PULSE_BANDWIDTH) for proto, p in verified if proto == protocol)
+    return score
+
+
+def ranked_combos(codes, verified, protocols=PROTOCOLS, pulses=PULSES):
+    """Every (code, protocol, pulse), most likely first."""
+    scores = {(proto, pulse): prior(proto, pulse, verified) for proto in protocols for pulse in pulses}
+    order = sorted(scores, key=lambda combo: -scores[combo])
+    return [(code, proto, pulse) for proto, pulse in order for code in codes]
+
+
+def airtime_s(combos, repeats):
+    return sum(rf_waveform.airtime_us(rf_waveform.frame_timings(code, pulse, protocol=proto))
+               for code, proto, pulse in combos) * repeats / 1e6
+
+
+class ResultCache:
+    """Combinations that didn't react, per code: [runs they missed in, most repeats
+    they were given, when they last missed]."""
+
+    def __init__(self, path=CACHE_FILE, strikes=DEAD_STRIKES, max_age_days=DEAD_DAYS):
+        self.path = path
+        self.strikes = strikes
+        self.max_age = max_age_days * 86400
+        self.dead = {}
+        self._struck = set()        # Combinations already counted this run
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.dead = json.load(f)
+            except (OSError, ValueError):
+                print(f"⚠️ Ignoring unreadable {path}")
+        self._expire()
+
+    @staticmethod
+    def _key(protocol, pulse):
+        return f"{protocol},{pulse}"
+
+    def _expire(self):
+        cutoff = time.time() - self.max_age
+        for code, tried in list(self.dead.items()):
+            # Entries from before strikes were counted (a bare repeat count) start over
+            self.dead[code] = {key: miss for key, miss in tried.items()
+                               if isinstance(miss, list) and miss[2] >= cutoff}
+            if not self.dead[code]:
+                del self.dead[code]
+
+    def is_dead(self, combo, repeats):
+        code, protocol, pulse = combo
+        miss = self.dead.get(str(code), {}).get(self._key(protocol, pulse))
+        return miss is not None and miss[0] >= self.strikes and miss[1] >= repeats
+
+    def mark_dead(self, combos, repeats):
+        """One strike for each combination, at most one per run."""
+        now = time.time()
+        for combo in combos:
+            code, protocol, pulse = combo
+            tried = self.dead.setdefault(str(code), {})
+            key = self._key(protocol, pulse)
+            strikes, most, _ = tried.get(key, (0, 0, now))
+            if combo not in self._struck:
+                self._struck.add(combo)
+                strikes += 1
+            tried[key] = [strikes, max(most, repeats), now]
+        self.save()
+
+    def new_run(self):
+        self._struck = set()
+
+    def forget(self, codes):
+        for code in codes:
+            self.dead.pop(str(code), None)
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.dead, f)
+        os.replace(tmp, self.path)
+
+
+def open_cache(no_cache=False, forget=(), path=CACHE_FILE):
+    """The cache for a CLI run: none with --no-cache, these codes' misses cleared with --forget."""
+    if no_cache:
+        return ResultCache(None)
+    cache = ResultCache(path)
+    if forget:
+        cache.forget(forget)
+    return cache
+
+
+class ParamSearch:
+
+    def __init__(self, send, ask, cache=None, block=BLOCK, ladder=LADDER, log=print):
+        """send(combos, repeats) transmits (code, protocol, pulse) combinations in order.
+        ask(question) returns True, False, NEAR (reacted weakly or only sometimes),
+        or None to send the same group again."""
+        self.send = send
+        self.ask = ask
+        self.cache = cache or ResultCache(None)
+        self.block = block
+        self.ladder = ladder
+        self.log = log
+        self.rounds = 0
+        self.airtime = 0.0
+
+    def test(self, combos, repeats):
+        while True:
+            self.rounds += 1
+            self.airtime += airtime_s(combos, repeats)
+            if len(combos) == 1:
+                code, proto, pulse = combos[0]
+                self.log(f"📡 Round {self.rounds}: protocol {proto}, pulse {pulse} x{repeats}")
+            else:
+                self.log(f"📡 Round {self.rounds}: {len(combos)} combinations x{repeats}")
+            self.send(combos, repeats)
+            answer = self.ask("Did the outlet react?")
+            if answer is not None:
+                return answer
+
+    def narrow(self, combos, level):
+        """Split a group that reacted down to one combination and confirm it.
+        Returns (combo, repeats) or None if it got lost on the way."""
+        repeats = self.ladder[level]
+        while len(combos) > 1:
+            half = combos[:len(combos) // 2]
+            combos = half if self.test(half, repeats) else combos[len(combos) // 2:]
+        if self.test(combos, CONFIRM_REPEATS) is True:
+            return combos[0], repeats
+        return None
+
+    def try_group(self, combos):
+        level = 0
+        while True:
+            repeats = self.ladder[level]
+            answer = self.test(combos, repeats)
+            if answer is False:
+                self.cache.mark_dead(combos, repeats)
+                return None
+            if answer is NEAR and level + 1 < len(self.ladder):
+                level += 1
+                self.log(f"🤏 Near-miss, sending again with {self.ladder[level]} repeats")
+                continue
+            found = self.narrow(combos, level)
+            if found is not None or level + 1 == len(self.ladder):
+                return found
+            # It reacted as a group, so a half must have missed at these repeats
+            level += 1
+            self.log(f"🤏 Lost it while narrowing down, retrying with {self.ladder[level]} repeats")
+
+    def run(self, combos):
+        """Returns ((code, protocol, pulse), repeats that worked) or None."""
+        self.cache.new_run()
+        todo = [c for c in combos if not self.cache.is_dead(c, self.ladder[0])]
+        skipped = len(combos) - len(todo)
+        if skipped:
+            self.log(f"⏭️  Skipping {skipped} combinations that didn't react in {self.cache.strikes} earlier runs")
+        start, size = 0, self.block
+        while start < len(todo):
+            found = self.try_group(todo[start:start + size])
+            if found is not None:
+                return found
+            start += size
+            size = min(size * 2, MAX_BLOCK)
+        return None
+
+
+def ask_user(question):
+    """y / n / m (reacted late or only sometimes), or r to send the same again."""
+    while True:
+        answer = input(f"   {question} [y/n/m=sort of/r=resend]: ").strip().lower()
+        if answer.startswith('y'):
+            input("   Switch the outlet back with the remote, then press Enter...")
+            return True
+        if answer.startswith('n'):
+            return False
+        if answer.startswith('m'):
+            input("   Switch the outlet back with the remote, then press Enter...")
+            return NEAR
+        if answer.startswith('r'):
+            return None
+
+
+def rfdevice_sender(rfdevice):
+    """send() for the Pi's own transmitter (tx_backends.RFTransmitter, or an rpi_rf RFDevice)."""
+    def send(combos, repeats):
+        rfdevice.tx_repeat = repeats
+        for code, proto, pulse in combos:
+            rfdevice.tx_code(code, proto, pulse)
+    return send
+
+
+class SimulatedOutlet:
+    """Decodes frames within `tolerance` of its pulse length, less reliably near the edge.
+    Switches on DECODE_FRAMES good frames; one good frame is a near-miss."""
+
+    DECODE_FRAMES = 2
+
+    def __init__(self, code, protocol, pulse, tolerance=0.2, seed=None):
+        self.code, self.protocol, self.pulse = code, protocol, pulse
+        self.tolerance = tolerance
+        self.random = random.Random(seed)
+        self.heard = 0
+
+    def send(self, combos, repeats):
+        self.heard = 0
+        for code, proto, pulse in combos:
+            if code != self.code or proto != self.protocol:
+                continue
+            fit = 1 - abs(pulse - self.pulse) / (self.tolerance * self.pulse)
+            if fit > 0:
+                self.heard += sum(self.random.random() < fit for _ in range(repeats))
+
+    def ask(self, question):
+        if self.heard >= self.DECODE_FRAMES:
+            return True
+        return NEAR if self.heard else False
+
+
+def linear_airtime(code, protocol, pulse, tolerance=0.2):
+    """Airtime crack_button.py's old loops spent before reaching a working combination."""
+    spent = 0.0
+    for p in PULSES:
+        for proto in [1, 5, 2, 3, 4]:
+            spent += airtime_s([(code, proto, p)], 25) + 0.05
+            if proto == protocol and abs(p - pulse) <= tolerance * pulse / 2:
+                return spent
+    return spent
+
+
+def simulate(trials, seed):
+    rng = random.Random(seed)
+    verified = load_priors()
+    code = 4478259
+    cases = {
+        "like the saved ones": lambda: (1, rng.randint(140, 160)),
+        "new remote": lambda: (rng.choice(PROTOCOLS[:5]), rng.choice(PULSES)),
+    }
+    print(f"{'outlet':>20} {'rounds':>7} {'airtime s':>10} {'old loops s':>12} {'found':>6}")
+    for name, draw in cases.items():
+        rounds, airtime, linear, found = [], [], [], 0
+        for _ in range(trials):
+            protocol, pulse = draw()
+            outlet = SimulatedOutlet(code, protocol, pulse, seed=rng.random())
+            search = ParamSearch(outlet.send, outlet.ask, log=lambda *_: None)
+            result = search.run(ranked_combos([code], verified))
+            if result is not None:
+                (_, proto, p), _ = result
+                found += proto == protocol and abs(p - pulse) <= 0.2 * pulse
+            rounds.append(search.rounds)
+            airtime.append(search.airtime)
+            linear.append(linear_airtime(code, protocol, pulse))
+        print(f"{name:>20} {sum(rounds) / trials:7.1f} {sum(airtime) / trials:10.2f} "
+              f"{sum(linear) / trials:12.1f} {found / trials:6.0%}")
+
+    # A run for the same code skips what two earlier runs ruled out
+    cache = ResultCache(None)
+    runs = []
+    for _ in range(DEAD_STRIKES + 1):
+        search = ParamSearch(lambda *_: None, lambda _: False, cache, log=lambda *_: None)
+        search.run(ranked_combos([code], verified))
+        runs.append(search.rounds)
+    print(f"dead cache: rounds per run {runs}")
+    assert runs[-1] == 0 and runs[-2] > 0
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prior-ordered protocol/pulse search (self-check)')
+    parser.add_argument('--simulate', action='store_true', help="Compare with the old loops on a simulated outlet")
+    parser.add_argument('--trials', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not args.simulate:
+        parser.print_help()
+        return
+    simulate(args.trials, args.seed)
+
+
+if __name__ == "__main__":
+    main()
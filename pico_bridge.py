@@ -1,4 +1,7 @@
 import machine
+import micropython
+import struct
+from array import array
 import utime
 import sys
 import select
@@ -7,78 +10,622 @@ import select
 tx_pin = machine.Pin(15, machine.Pin.OUT)
 rx_pin = machine.Pin(14, machine.Pin.IN)
 
-def transmit_code(code, protocol, pulse_length):
-    p = int(pulse_length)
-    for _ in range(25):
-        for i in range(23, -1, -1):
-            if (code >> i) & 1:
-                tx_pin.value(1); utime.sleep_us(p * 3); tx_pin.value(0); utime.sleep_us(p)
+import rf_waveform
+
+try:
+    import rp2
+except ImportError:
+    rp2 = None
+
+# Frames sent back-to-back for each code per round in a batch. Outlet decoders
+# want consecutive identical frames, so we interleave in pairs, not singles.
+BATCH_CHUNK = 2
+# The PIO plays edges exactly, so far fewer copies reach the outlet than the
+# bit-banged loop needed to ride out its jitter.
+PIO_REPEATS = 10
+BITBANG_REPEATS = 25
+# Clean copies a verified transmit must hear before it stops early
+VERIFY_COPIES = 2
+
+# PIO at 1 MHz: one cycle per microsecond. DMA writes straight into the TX FIFO
+# of PIO0 state machine 0, paced by its data request line.
+PIO_FREQ = 1000000
+PIO0_TXF0 = 0x50200010
+DREQ_PIO0_TX0 = 0
+
+if rp2:
+    @rp2.asm_pio(set_init=rp2.PIO.OUT_LOW)
+    def pulse_train():
+        # Each FIFO word is a delay-loop count: high, low, high, low...
+        # (rf_waveform.PIO_OVERHEAD covers the other 4 cycles per edge)
+        pull(block)
+        set(pins, 1)
+        mov(x, osr)
+        label("high")
+        jmp(x_dec, "high")
+        pull(block)
+        set(pins, 0)
+        mov(x, osr)
+        label("low")
+        jmp(x_dec, "low")
+
+class PioTransmitter:
+    """Plays PIO words on the TX pin. The CPU only refills DMA once per frame."""
+
+    def __init__(self, pin):
+        self.sm = rp2.StateMachine(0, pulse_train, freq=PIO_FREQ, set_base=pin)
+        self.sm.active(1)
+        self.dma = rp2.DMA() if hasattr(rp2, "DMA") else None
+        self.last_low = 0
+
+    def play(self, words, last_low):
+        if self.dma:
+            while self.dma.active():
+                idle()
+            ctrl = self.dma.pack_ctrl(size=2, inc_write=False, treq_sel=DREQ_PIO0_TX0)
+            self.dma.config(read=words, write=PIO0_TXF0, count=len(words), ctrl=ctrl, trigger=True)
+        else:
+            self.sm.put(words)
+        self.last_low = last_low
+
+    def finish(self):
+        # Wait for DMA and the FIFO to drain, then for the final sync gap to play out
+        while self.dma and self.dma.active():
+            idle()
+        while self.sm.tx_fifo():
+            idle()
+        utime.sleep_us(self.last_low)
+
+class BitbangTransmitter:
+    """Fallback for firmware without rp2: same timing tables, software delays."""
+
+    def __init__(self, pin):
+        self.pin = pin
+
+    def play(self, timings, last_low):
+        level = 1
+        for us in timings:
+            self.pin.value(level); utime.sleep_us(us); level ^= 1
+        self.pin.value(0)
+
+    def finish(self):
+        pass
+
+if rp2:
+    transmitter = PioTransmitter(tx_pin)
+    REPEATS = PIO_REPEATS
+else:
+    transmitter = BitbangTransmitter(tx_pin)
+    REPEATS = BITBANG_REPEATS
+
+# Converted frames per (code, protocol, pulse): the same few buttons get sent
+# over and over, so most commands skip building their table entirely
+FRAME_CACHE = 16
+frame_cache = {}
+
+def prepare_frame(code, protocol, pulse_length):
+    # What transmitter.play() takes: the frame's words/timings and its final sync gap
+    key = (code, protocol, pulse_length)
+    frame = frame_cache.get(key)
+    if frame is None:
+        if protocol not in rf_waveform.PROTOCOLS:
+            raise ValueError("unknown protocol")
+        timings = rf_waveform.frame_timings(code, int(pulse_length), protocol=protocol)
+        frame = (rf_waveform.pio_words(timings) if rp2 else timings, timings[-1])
+        if len(frame_cache) >= FRAME_CACHE:
+            frame_cache.clear()
+        frame_cache[key] = frame
+    return frame
+
+def transmit_frames(items, chunk, repeats=None):
+    # One table per code, converted once, then replayed in round-robin order.
+    # The host can ask for fewer (or more) repeats than our default per command.
+    frames = [prepare_frame(code, protocol, pulse_length) for code, protocol, pulse_length in items]
+    first_edge = utime.ticks_us()
+    for i in rf_waveform.schedule(len(frames), repeats or REPEATS, chunk):
+        transmitter.play(*frames[i])
+    transmitter.finish()
+    return first_edge
+
+def transmit_code(code, protocol, pulse_length, repeats=None):
+    return transmit_frames([(code, protocol, pulse_length)], 1, repeats)
+
+def transmit_batch(items, repeats=None):
+    # Round-robin the repeats so every code gets its first copies out within a
+    # few frames, instead of waiting behind the full bursts of the codes before it.
+    return transmit_frames(items, BATCH_CHUNK, repeats)
+
+# --- Receiver: pin IRQ -> edge ring buffer -> incremental decoder ---
+# The IRQ only timestamps edges into preallocated arrays (no allocation, so it
+# can run as a hard IRQ). The main loop decodes whatever arrived since it last
+# looked, so sniffing runs next to TX and serial commands instead of blocking them.
+RX_RING = 1024                  # Edges buffered between decodes (~2 bursts). Power of two.
+RX_WRAP = RX_RING * 1024        # Head/tail counters wrap here so they stay small ints
+RX_REPORT_GAP_MS = 200          # Same code again within this gap is the same burst
+RX_STATUS_CODES = 20            # Codes listed in a status reply, most frequent first
+RAW_PERIODS = 600               # Raw periods SNIFF keeps from its first decoded frame on (~12 frames)
+RAW_LINE = 64                   # Periods per RAW: line
+
+rx_times = array("I", [0] * RX_RING)
+rx_levels = bytearray(RX_RING)
+rx_head = 0
+
+def rx_edge(pin):
+    global rx_head
+    i = rx_head % RX_RING
+    rx_times[i] = utime.ticks_us()
+    rx_levels[i] = pin.value()
+    rx_head = (rx_head + 1) % RX_WRAP
+
+class Receiver:
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.active = False
+        self.reset()
+
+    def reset(self):
+        self.tail = rx_head
+        self.prev = None            # (time, level) of the last edge we decoded
+        self.decoder = rf_waveform.PulseDecoder()
+        self.findings = {}
+        self.edges = 0
+        self.overruns = 0
+        self.last_code = None
+        self.last_seen = 0
+        self.watch_code = None
+        self.watch_decoder = None
+        self.hits = 0
+        # Raw periods for SNIFF, so the host can work out protocol and pulse length
+        self.raw_wanted = False
+        self.recent = []
+        self.raw = None
+
+    def keep_raw(self, level, us, code):
+        if self.raw is not None:
+            if len(self.raw) < RAW_PERIODS:
+                self.raw.append(us)
+            return
+        # Periods since the last sync gap, the same frame the decoder is on
+        if level == 0 and us > rf_waveform.RX_GAP_US:
+            self.recent = [us]
+        elif self.recent:
+            self.recent.append(us)
+            if len(self.recent) > 2 * rf_waveform.BITS + 1:
+                self.recent = []
+        if code is not None and self.recent:
+            self.raw = array("I", self.recent)
+
+    def watch(self, code, protocol=None, pulse_length=None):
+        # Count clean decodes of one code (for verified transmits), framed the
+        # way its own protocol is sent: the catch-all decoder only reads protocol 1
+        self.watch_code = code
+        self.watch_decoder = None
+        if code is not None and protocol is not None:
+            self.watch_decoder = rf_waveform.PulseDecoder(protocol=protocol, pulse=pulse_length)
+        self.hits = 0
+
+    def start(self):
+        self.pin.irq(handler=None)
+        self.reset()
+        self.pin.irq(trigger=machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING,
+                     handler=rx_edge, hard=True)
+        self.active = True
+
+    def stop(self):
+        self.pin.irq(handler=None)
+        self.service()
+        self.active = False
+
+    def service(self):
+        """Decode the edges captured since the last call. Returns codes from new bursts."""
+        if not self.active:
+            return []
+        head = rx_head
+        pending = (head - self.tail) % RX_WRAP
+        if pending > RX_RING:
+            # The IRQ lapped us: drop what was overwritten and resync on the next gap
+            self.overruns += pending - RX_RING
+            self.tail = (head - RX_RING) % RX_WRAP
+            self.prev = None
+            self.decoder = rf_waveform.PulseDecoder()
+            if self.watch_decoder is not None:
+                self.watch_decoder.in_frame = False
+            # The raw periods would have a hole in them
+            self.raw_wanted = False
+        new = []
+        while self.tail != head:
+            i = self.tail % RX_RING
+            t, level = rx_times[i], rx_levels[i]
+            self.tail = (self.tail + 1) % RX_WRAP
+            self.edges += 1
+            if self.prev is not None:
+                us = utime.ticks_diff(t, self.prev[0])
+                code = self.decoder.feed(self.prev[1], us)
+                if self.watch_decoder is not None and \
+                        self.watch_decoder.feed(self.prev[1], us) == self.watch_code:
+                    self.hits += 1
+                if self.raw_wanted:
+                    self.keep_raw(self.prev[1], us, code)
+                if code is not None:
+                    self.findings[code] = self.findings.get(code, 0) + 1
+                    if code == self.watch_code and self.watch_decoder is None:
+                        self.hits += 1
+                    now = utime.ticks_ms()
+                    if code != self.last_code or utime.ticks_diff(now, self.last_seen) > RX_REPORT_GAP_MS:
+                        new.append(code)
+                    self.last_code, self.last_seen = code, now
+            self.prev = (t, level)
+        return new
+
+    def best(self):
+        return max(self.findings, key=self.findings.get) if self.findings else None
+
+    def top(self, n=RX_STATUS_CODES):
+        return sorted(self.findings.items(), key=lambda item: -item[1])[:n]
+
+receiver = Receiver(rx_pin)
+binary_mode = False
+
+def rx_report():
+    # In text mode, announce each new burst as it's decoded. Binary hosts ask with CMD_RX.
+    for code in receiver.service():
+        if not binary_mode:
+            print(f"RX:{code}")
+
+def idle():
+    # Waiting on the TX hardware: keep the edge ring drained meanwhile
+    rx_report()
+    utime.sleep_ms(1)
+
+def transmit_verified(code, protocol, pulse_length, repeats=None, copies=VERIFY_COPIES):
+    # Listen to our own burst on the RX pin (or a receiver wired there from near
+    # the outlet) and stop as soon as `copies` clean frames have been decoded.
+    # Returns (first edge, confirmed, copies heard, frames sent).
+    frame = prepare_frame(code, protocol, pulse_length)
+    was_active = receiver.active
+    if not was_active:
+        receiver.start()
+    receiver.watch(code, protocol, pulse_length)
+    first_edge = utime.ticks_us()
+    sent = 0
+    while sent < (repeats or REPEATS) and receiver.hits < copies:
+        transmitter.play(*frame)
+        sent += 1
+        rx_report()
+    transmitter.finish()
+    rx_report()
+    hits = receiver.hits
+    receiver.watch(None)
+    if not was_active:
+        receiver.stop()
+    return first_edge, hits >= copies, hits, sent
+
+def parse_code(text):
+    parts = text.split(',')
+    return int(parts[0]), int(parts[1]), int(parts[2])
+
+# --- Binary framing (mirrors pico_protocol.py on the host) ---
+# 0xA5 | len | type | seq (u16 LE) | payload | crc16 (u16 LE, over len..payload)
+SYNC = 0xA5
+CMD_TX = 0x01
+CMD_BATCH = 0x02
+CMD_PING = 0x03
+CMD_RX = 0x04
+CMD_TX_VERIFY = 0x05
+REPLY_ACK = 0x80
+REPLY_NAK = 0x81
+REPLY_ERROR = 0x82
+NAK_CRC = 1
+NAK_TIMEOUT = 2
+ERR_UNKNOWN_COMMAND = 1
+ERR_BAD_PAYLOAD = 2
+ERR_FAILED = 3
+RX_STOP = 0
+RX_START = 1
+RX_STATUS = 2
+TX_ITEM_SIZE = 7            # struct "<IBH": code, protocol, pulse
+FRAME_TIMEOUT_MS = 100      # A frame must arrive in one piece within this window
+
+poller = select.poll()
+poller.register(sys.stdin, select.POLLIN)
+
+if hasattr(poller, "ipoll"):
+    def waiting(timeout_ms=0):
+        # ipoll() reuses its result tuple, so checking for input allocates nothing
+        for _ in poller.ipoll(timeout_ms):
+            return True
+        return False
+else:
+    def waiting(timeout_ms=0):
+        return bool(poller.poll(timeout_ms))
+
+# --- Serial input ---
+# One preallocated buffer holds the text line or frame being assembled. Bytes
+# go straight into it with readinto() while poll says more are waiting, so
+# nothing is allocated per character. stdin can only say that bytes are
+# waiting, not how many, and a blocking read of a whole frame would hang for
+# good on a truncated one, so every byte is read only once poll has seen it:
+# a frame that stops arriving gets NAK_TIMEOUT at its deadline, and a line
+# that never ends just waits in the buffer while the receiver keeps running.
+IN_BUF_SIZE = 512           # Longest frame is 4 + 255 + 2 bytes; longer text lines are cut
+in_buf = bytearray(IN_BUF_SIZE)
+in_len = 0
+one_byte = bytearray(1)
+stdin = sys.stdin.buffer
+frame_start = 0             # ticks_us() when the current frame's sync byte arrived
+
+def crc16(data, crc=0xFFFF):
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
             else:
-                tx_pin.value(1); utime.sleep_us(p); tx_pin.value(0); utime.sleep_us(p * 3)
-        tx_pin.value(1); utime.sleep_us(p); tx_pin.value(0); utime.sleep_us(p * 31)
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+def send_reply(kind, seq, payload=b""):
+    header = struct.pack("<BBBH", SYNC, len(payload), kind, seq)
+    sys.stdout.buffer.write(header + payload + struct.pack("<H", crc16(header[1:] + payload)))
+
+def read_byte():
+    stdin.readinto(one_byte)
+    return one_byte[0]
+
+def read_into(start, n, deadline):
+    # Fill in_buf[start:start + n] before the deadline (ticks_ms). False if the bytes don't come.
+    for i in range(start, start + n):
+        if not waiting(0):
+            remaining = utime.ticks_diff(deadline, utime.ticks_ms())
+            if remaining <= 0 or not waiting(remaining):
+                return False
+        in_buf[i] = read_byte()
+    return True
+
+def take_byte(byte):
+    # Add a byte to the text line being assembled. Returns the line once it's
+    # complete, "" for anything that isn't text (desynced frame bytes) or
+    # None while the line is still coming.
+    global in_len
+    if byte != 10:
+        if in_len < IN_BUF_SIZE:
+            in_buf[in_len] = byte
+            in_len += 1
+        return None
+    end, in_len = in_len, 0
+    try:
+        return bytes(in_buf[:end]).decode().strip()
+    except UnicodeError:
+        return ""
+
+def run_command(kind, seq, payload):
+    if kind == CMD_PING:
+        send_reply(REPLY_ACK, seq)
+        return
+    if kind == CMD_RX:
+        if len(payload) != 1 or payload[0] not in (RX_STOP, RX_START, RX_STATUS):
+            send_reply(REPLY_ERROR, seq, bytes([ERR_BAD_PAYLOAD]))
+            return
+        if payload[0] == RX_START:
+            receiver.start()
+        elif payload[0] == RX_STOP:
+            receiver.stop()
+        send_reply(REPLY_ACK, seq, rx_status())
+        return
+    if kind == CMD_TX_VERIFY:
+        # TX item + max repeats + clean copies wanted
+        if len(payload) != TX_ITEM_SIZE + 2 or not payload[-2] or not payload[-1]:
+            send_reply(REPLY_ERROR, seq, bytes([ERR_BAD_PAYLOAD]))
+            return
+        item = struct.unpack_from("<IBH", payload)
+        try:
+            first_edge, confirmed, hits, sent = transmit_verified(*item, payload[-2], payload[-1])
+        except Exception as e:
+            send_reply(REPLY_ERROR, seq, bytes([ERR_FAILED]) + str(e).encode()[:60])
+            return
+        send_reply(REPLY_ACK, seq, struct.pack("<IBBB", utime.ticks_diff(first_edge, frame_start),
+                                               confirmed, min(hits, 255), min(sent, 255)))
+        return
+    if kind not in (CMD_TX, CMD_BATCH):
+        send_reply(REPLY_ERROR, seq, bytes([ERR_UNKNOWN_COMMAND]))
+        return
+    # Optional repeat count: TX = item + byte, BATCH = byte + items
+    repeats = None
+    if kind == CMD_TX and len(payload) == TX_ITEM_SIZE + 1:
+        repeats, payload = payload[-1], payload[:-1]
+    elif kind == CMD_BATCH and len(payload) % TX_ITEM_SIZE == 1:
+        repeats, payload = payload[0], payload[1:]
+    if (not payload or len(payload) % TX_ITEM_SIZE or repeats == 0
+            or (kind == CMD_TX and len(payload) != TX_ITEM_SIZE)):
+        send_reply(REPLY_ERROR, seq, bytes([ERR_BAD_PAYLOAD]))
+        return
+
+    items = [struct.unpack_from("<IBH", payload, i) for i in range(0, len(payload), TX_ITEM_SIZE)]
+    try:
+        if kind == CMD_TX:
+            first_edge = transmit_code(*items[0], repeats)
+        else:
+            first_edge = transmit_batch(items, repeats)
+    except Exception as e:
+        send_reply(REPLY_ERROR, seq, bytes([ERR_FAILED]) + str(e).encode()[:60])
+        return
+    # Microseconds from the frame's sync byte to the first RF edge
+    send_reply(REPLY_ACK, seq, struct.pack("<I", utime.ticks_diff(first_edge, frame_start)))
+
+def rx_status():
+    # active, edges, overruns, count, then (code, times seen) pairs: "<BIIB" + n x "<IH"
+    receiver.service()
+    top = receiver.top()
+    out = struct.pack("<BIIB", receiver.active, receiver.edges, receiver.overruns, len(top))
+    for code, seen in top:
+        out += struct.pack("<IH", code, min(seen, 0xFFFF))
+    return out
+
+def handle_frame():
+    # Sync byte already consumed. Anything short or corrupt gets an explicit
+    # NAK so the host fails fast instead of waiting out its timeout.
+    deadline = utime.ticks_add(utime.ticks_ms(), FRAME_TIMEOUT_MS)
+    if not read_into(0, 4, deadline):
+        send_reply(REPLY_NAK, 0, bytes([NAK_TIMEOUT]))
+        return
+    length, kind, seq = in_buf[0], in_buf[1], in_buf[2] | (in_buf[3] << 8)
+    if not read_into(4, length + 2, deadline):
+        send_reply(REPLY_NAK, seq, bytes([NAK_TIMEOUT]))
+        return
+    end = 4 + length
+    if crc16(memoryview(in_buf)[:end]) != in_buf[end] | (in_buf[end + 1] << 8):
+        send_reply(REPLY_NAK, seq, bytes([NAK_CRC]))
+        return
+    run_command(kind, seq, bytes(in_buf[4:end]))
+
+# --- On-device sweep ---
+# SWEEP start,end,step,repeats[,protocol,pulse]: the Pico makes every code in
+# the range itself, so a sweep runs at the radio's pace instead of costing a
+# serial round trip per code. It prints @<code> as each code goes out and
+# stops at the next frame boundary when the host sends ABORT.
+def abort_requested():
+    # Lines that arrive mid-sweep are consumed here; only ABORT does anything
+    while waiting(0):
+        if take_byte(read_byte()) == "ABORT":
+            return True
+    return False
+
+def sweep(start, end, step, repeats, protocol=1, pulse_length=150):
+    # Returns (codes sent, last code started, aborted)
+    if not step or repeats < 1 or protocol not in rf_waveform.PROTOCOLS:
+        raise ValueError("bad sweep")
+    frame = previous = None
+    code, sent = start, 0
+    while (code <= end) if step > 0 else (code >= end):
+        # Swept codes skip frame_cache (they'd only flush it). Keep the last
+        # frame referenced until the next one is queued: DMA may still be reading it.
+        previous = frame
+        timings = rf_waveform.frame_timings(code, pulse_length, protocol=protocol)
+        frame = (rf_waveform.pio_words(timings) if rp2 else timings, timings[-1])
+        print(f"@{code}")
+        for _ in range(repeats):
+            transmitter.play(*frame)
+            if abort_requested():
+                transmitter.finish()
+                return sent, code, True
+        sent += 1
+        code += step
+    transmitter.finish()
+    return sent, code - step, False
+
+def handle_line(line):
+    # Text protocol, kept for mimic_pico.py, sniff_pico.py and Thonny
+    global binary_mode
+    if line == "BINARY":
+        # Frames can contain 0x03, which would otherwise raise KeyboardInterrupt
+        micropython.kbd_intr(-1)
+        binary_mode = True
+        print("BINARY OK")
+    elif line == "REPL":
+        micropython.kbd_intr(3)
+        binary_mode = False
+        print("REPL OK")
+    elif line == "SNIFF":
+        sniff_mode()
+    elif line == "RX START":
+        receiver.start()
+        print("RX ON")
+    elif line == "RX STOP":
+        receiver.stop()
+        print("RX OFF")
+    elif line == "RX STATUS":
+        receiver.service()
+        codes = ",".join(f"{code}x{seen}" for code, seen in receiver.top())
+        print(f"RX {'ON' if receiver.active else 'OFF'} edges={receiver.edges} "
+              f"overruns={receiver.overruns} codes={codes}")
+    elif line.startswith("VERIFY "):
+        try:
+            # VERIFY code,protocol,pulse[,repeats[,copies]]
+            values = [int(v) for v in line[7:].split(',')]
+            print(f"TX VERIFY: {values[0]}")
+            _, confirmed, hits, sent = transmit_verified(*values)
+            print(f"{'CONFIRMED' if confirmed else 'UNCONFIRMED'} {hits} copies in {sent} frames")
+            print("Done.")
+        except Exception as e:
+            print(f"ERR: bad verify ({e})")
+    elif line.startswith("SWEEP "):
+        try:
+            values = [int(v) for v in line[6:].split(',')]
+            print(f"SWEEP: {values[0]}..{values[1]}")
+            sent, last, aborted = sweep(*values)
+            print(f"SWEEP {'ABORTED' if aborted else 'DONE'} {sent} {last}")
+            print("Done.")
+        except Exception as e:
+            print(f"ERR: bad sweep ({e})")
+    elif line == "ABORT":
+        # Nothing running (a sweep that already finished): just acknowledge
+        print("Done.")
+    elif line.startswith("BATCH "):
+        try:
+            items = [parse_code(part) for part in line[6:].split(';')]
+            print(f"TX BATCH: {len(items)}")
+            transmit_batch(items)
+            print("Done.")
+        except Exception as e:
+            print(f"ERR: bad batch ({e})")
+    elif "," in line:
+        try:
+            # code,protocol,pulse[,repeats]
+            values = [int(v) for v in line.split(',')]
+            c, pr, pl = values[:3]
+            print(f"TX: {c}")
+            transmit_code(c, pr, pl, *values[3:4])
+            print("Done.")
+        except Exception as e:
+            print(f"ERR: bad command ({e})")
+    elif line:
+        print(f"ERR: unknown command '{line}'")
 
 def sniff_mode():
+    # Legacy 5 second sniff for sniff_pico.py, now on top of the IRQ receiver
     print("READY_TO_SNIFF")
+    was_active = receiver.active
+    receiver.start()
+    receiver.raw_wanted = True
     deadline = utime.ticks_add(utime.ticks_ms(), 5000)
-    findings = {}
-    
     while utime.ticks_diff(deadline, utime.ticks_ms()) > 0:
-        low_count = 0
-        while rx_pin.value() == 0:
-            utime.sleep_us(50)
-            low_count += 50
-            if low_count > 10000: break
-        
-        if low_count > 3000:
-            code = 0; success = True
-            for i in range(24):
-                t1 = utime.ticks_us()
-                while rx_pin.value() == 1:
-                    if utime.ticks_diff(utime.ticks_us(), t1) > 2000: break
-                high_dur = utime.ticks_diff(utime.ticks_us(), t1)
-                
-                t2 = utime.ticks_us()
-                while rx_pin.value() == 0:
-                    if utime.ticks_diff(utime.ticks_us(), t2) > 2000: break
-                low_dur = utime.ticks_diff(utime.ticks_us(), t2)
-                
-                if high_dur > 1500 or low_dur > 1500:
-                    success = False; break
-                
-                if high_dur > low_dur: code = (code << 1) | 1
-                else: code = (code << 1) | 0
-            
-            if success and code > 0:
-                print(f"SAMPLE:{code}")
-                findings[code] = findings.get(code, 0) + 1
-                # Short sleep to avoid double-processing the same burst
-                utime.sleep_ms(50)
-
-    if findings:
-        # Find the most common code
-        best_code = max(findings, key=findings.get)
+        for code in receiver.service():
+            print(f"SAMPLE:{code}")
+        utime.sleep_ms(5)
+
+    best_code = receiver.best()
+    receiver.raw_wanted = False
+    raw = receiver.raw
+    if not was_active:
+        receiver.stop()
+    if raw:
+        # From the sync gap before the first decoded frame on: low, high, low...
+        for i in range(0, len(raw), RAW_LINE):
+            print("RAW:" + ",".join(str(us) for us in raw[i:i + RAW_LINE]))
+    if best_code is not None:
+        # The most common code
         print(f"FOUND:{best_code}")
     else:
         print("TIMEOUT")
 
 print("PICO RF READY")
 
-buffer = ""
 while True:
-    if select.select([sys.stdin], [], [], 0.01)[0]:
-        char = sys.stdin.read(1)
-        if char == '\n':
-            line = buffer.strip()
-            if line == "SNIFF":
-                sniff_mode()
-            elif "," in line:
-                try:
-                    parts = line.split(',')
-                    c = int(parts[0]); pr = int(parts[1]); pl = int(parts[2])
-                    print(f"TX: {c}")
-                    transmit_code(c, pr, pl)
-                    print("Done.")
-                except: pass
-            buffer = ""
+    rx_report()
+    if not waiting(10):
+        continue
+    # Take everything that's already waiting before going back to the receiver
+    while waiting(0):
+        byte = read_byte()
+        if byte == SYNC and not in_len:
+            frame_start = utime.ticks_us()
+            handle_frame()
         else:
-            buffer += char
+            line = take_byte(byte)
+            if line:
+                try:
+                    handle_line(line)
+                except Exception as e:
+                    # A mangled command mustn't take the bridge down
+                    print(f"ERR: {e}")
@@ -0,0 +1,444 @@
+"""
+Single-owner serial link to the Pi Pico RF bridge (pico_bridge.py).
+
+Only one thread ever touches the serial port. Callers hand commands to the
+link and get a Future back. The I/O thread writes each command as a binary
+frame (pico_protocol.py) with a sequence number, keeps a few commands in
+flight so the Pico always has the next one buffered, and matches the Pico's
+ACK/NAK/ERROR replies back to the right Future.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import serial
+
+import pico_protocol as proto
+
+BAUD_RATE = 115200
+SETTLE_TIME = 2.0          # The Pico resets its USB stack when the port opens
+ACK_TIMEOUT = 3.0          # Time each command gets once it reaches the head of the line
+MAX_IN_FLIGHT = 4          # Commands written ahead of the one being transmitted
+RECONNECT_INTERVAL = 2.0
+READ_TIMEOUT = 0.01        # Serial poll interval while commands are in flight
+HANDSHAKE_TIMEOUT = 1.0
+MAX_MISSED_ACKS = 2        # Consecutive ack timeouts before we assume the Pico hung and reconnect
+SEQ_MODULO = 0xFFFF
+CONFIRMED_MAX_AGE = 300    # Seconds a confirmed outlet state is trusted by skip_confirmed
+
+# Scheduling classes, most urgent first
+INTERACTIVE = 0            # Watch taps, gestures: someone is waiting for the light
+NORMAL = 1                 # Single commands from automations
+BULK = 2                   # Scenes and batches
+PRIORITIES = {"interactive": INTERACTIVE, "normal": NORMAL, "bulk": BULK}
+# A queued command gains one class of urgency for every AGING_SECONDS it waits,
+# so bulk work can't be starved by a steady stream of taps.
+AGING_SECONDS = 5.0
+
+
+class PicoError(Exception):
+    """The Pico rejected a command or never acknowledged it."""
+
+
+class PicoUnavailable(PicoError):
+    """The serial link to the Pico is down."""
+
+
+class Command:
+    """One queued command and the Future its caller is waiting on."""
+
+    def __init__(self, kind, payload, label=None, timeout=ACK_TIMEOUT, key=None, state=None,
+                 priority=NORMAL):
+        self.kind = kind            # pico_protocol.CMD_*
+        self.payload = payload      # Frame payload, e.g. pico_protocol.pack_tx(...)
+        self.label = label or payload.hex()
+        self.timeout = timeout
+        self.key = key              # Outlet this command drives, for coalescing (None = never coalesce)
+        self.state = state          # e.g. "ON"/"OFF", for skipping already-confirmed states
+        self.priority = priority    # INTERACTIVE, NORMAL or BULK
+        self.seq = None
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.queued_since = self.submitted  # Inherited from the command this one coalesced
+        self.dispatched = None      # Taken off the queue by the I/O thread
+        self.written = None         # Frame fully handed to the serial driver
+        self.write_time = None
+        self.deadline = None
+
+
+class CommandQueue:
+    """Priority queue of Commands where a newer command for an outlet replaces a queued older one.
+
+    Commands come out most urgent class first, oldest first within a class,
+    with aging so nothing waits forever. A replacement takes over the older
+    command's place in line, and the older command's Future resolves as
+    "coalesced" straight away.
+    """
+
+    def __init__(self, aging=AGING_SECONDS):
+        self.aging = aging
+        self._items = []
+        self._by_key = {}
+        self._cond = threading.Condition()
+        self.coalesced = 0
+
+    def qsize(self):
+        return len(self._items)
+
+    def put(self, cmd):
+        with self._cond:
+            old = self._by_key.get(cmd.key) if cmd.key is not None else None
+            if old is not None:
+                self._items[self._items.index(old)] = cmd
+                cmd.queued_since = old.queued_since
+                cmd.priority = min(cmd.priority, old.priority)
+                self.coalesced += 1
+            else:
+                self._items.append(cmd)
+            if cmd.key is not None:
+                self._by_key[cmd.key] = cmd
+            self._cond.notify()
+
+        if old is not None and old.future.set_running_or_notify_cancel():
+            print(f"🔀 Coalesced [{old.label}] into [{cmd.label}]")
+            waited = time.monotonic() - old.submitted
+            old.future.set_result({
+                "outcome": "coalesced",
+                "superseded_by": cmd.label,
+                "elapsed": waited,
+                "timings": {"queue_wait": waited},
+            })
+
+    def _rank(self, cmd, now):
+        return (cmd.priority - (now - cmd.queued_since) / self.aging, cmd.queued_since)
+
+    def get(self, timeout=None, busy=(), pipelined=False):
+        """Pop the most urgent command whose key is not in busy, waiting up to timeout seconds.
+
+        Commands for a busy outlet stay queued (and replaceable) until its
+        in-flight command is done. With pipelined=True (other commands are
+        already in flight) bulk commands are held back, so they never sit in
+        the Pico's buffer ahead of a tap that arrives a moment later.
+        Raises queue.Empty.
+        """
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            eligible = [
+                cmd for cmd in self._items
+                if (cmd.key is None or cmd.key not in busy) and not (pipelined and cmd.priority >= BULK)
+            ]
+            if not eligible:
+                raise queue.Empty
+            now = time.monotonic()
+            cmd = min(eligible, key=lambda c: self._rank(c, now))
+            self._items.remove(cmd)
+            if cmd.key is not None and self._by_key.get(cmd.key) is cmd:
+                del self._by_key[cmd.key]
+            return cmd
+
+    def get_nowait(self, busy=(), pipelined=False):
+        return self.get(timeout=0, busy=busy, pipelined=pipelined)
+
+    def wait(self, timeout):
+        """Wait until something is queued. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._items, timeout)
+
+
+class PicoLink:
+    """Owns the serial port to one Pico and serializes all access to it."""
+
+    def __init__(self, port, baud_rate=BAUD_RATE, max_in_flight=MAX_IN_FLIGHT,
+                 skip_confirmed=False, confirmed_max_age=CONFIRMED_MAX_AGE,
+                 name=None, airtime=None):
+        self.port = port
+        self.name = name or port
+        # Lock shared with other links whose transmitters would interfere with
+        # ours. Held while we have commands in flight. None = we never wait.
+        self._airtime = airtime
+        self._airtime_held = False
+        self.baud_rate = baud_rate
+        self.max_in_flight = max_in_flight
+        # Skip a command when its outlet was already confirmed in that state recently
+        self.skip_confirmed = skip_confirmed
+        self.confirmed_max_age = confirmed_max_age
+        self.skipped = 0
+
+        self._queue = CommandQueue()
+        self._outlets = {}          # key -> (state, confirmed_at or None while in flight)
+        self._last_reply = 0.0      # When the Pico last finished a command
+        self._missed_acks = 0
+        self._in_flight = {}        # seq -> Command, in write order
+        self._next_seq = 1
+        self._ser = None
+        self._decoder = proto.FrameDecoder()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"pico-link {self.name}", daemon=True)
+
+    # --- Public API (any thread) ---
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    @property
+    def connected(self):
+        return self._ser is not None and self._ser.is_open
+
+    @property
+    def pending(self):
+        return self._queue.qsize() + len(self._in_flight)
+
+    @property
+    def coalesced(self):
+        return self._queue.coalesced
+
+    def submit(self, payload, label=None, timeout=ACK_TIMEOUT, kind=proto.CMD_TX, key=None, state=None,
+               priority=NORMAL):
+        """Queue a command for the Pico. Returns a Future resolving to the reply dict.
+
+        The reply's "outcome" is "sent", "coalesced" (a newer command for the
+        same key replaced this one before it went out) or "skipped" (the
+        outlet was already confirmed in this state, see skip_confirmed).
+
+        timeout is how long the Pico may take once the command reaches the head
+        of the line; batches need longer than a single burst. priority is one
+        of INTERACTIVE, NORMAL or BULK.
+        """
+        cmd = Command(kind, payload, label, timeout, key, state, priority)
+        self._queue.put(cmd)
+        return cmd.future
+
+    # --- I/O thread ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._ser is None and not self._open():
+                self._fail_queued(PicoUnavailable(f"Pico not connected on {self.port}"))
+                self._stop.wait(RECONNECT_INTERVAL)
+                continue
+
+            try:
+                self._fill_pipeline()
+                if self._in_flight:
+                    self._read_replies()
+                    self._expire()
+                self._release_airtime_if_idle()
+            except (serial.SerialException, OSError) as e:
+                print(f"Serial I/O Error on {self.name} ({self.port}): {e}")
+                self._drop_connection(e)
+
+        self._drop_connection(PicoUnavailable("Link stopped"))
+
+    def _open(self):
+        try:
+            print(f"Connecting to Pico on {self.port}...")
+            ser = serial.Serial(self.port, self.baud_rate, timeout=READ_TIMEOUT)
+            # Wait a moment for the connection to settle
+            time.sleep(SETTLE_TIME)
+            ser.reset_input_buffer()
+            self._handshake(ser)
+            self._ser = ser
+            print("Serial connection established successfully.")
+            return True
+        except Exception as e:
+            print(f"CRITICAL ERROR: Could not connect to Pico: {e}")
+            return False
+
+    def _handshake(self, ser):
+        """Switch the Pico from the text protocol to binary frames."""
+        ser.write(proto.HANDSHAKE)
+        self._decoder = proto.FrameDecoder()
+        deadline = time.monotonic() + HANDSHAKE_TIMEOUT
+        while time.monotonic() < deadline:
+            for item in self._decoder.feed(ser.read(ser.in_waiting or 1)):
+                if item == proto.HANDSHAKE_REPLY:
+                    return
+        try:
+            ser.close()
+        except Exception:
+            pass
+        raise PicoError("Pico did not answer the BINARY handshake. Is the latest pico_bridge.py flashed?")
+
+    def _drop_connection(self, reason):
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+        self._ser = None
+        self._outlets.clear()
+        for cmd in self._in_flight.values():
+            if not cmd.future.done():
+                cmd.future.set_exception(PicoUnavailable(f"Serial link lost: {reason}"))
+        self._in_flight.clear()
+        self._release_airtime_if_idle()
+
+    def _fail_queued(self, exc):
+        while True:
+            try:
+                cmd = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            # The caller may have cancelled it while it waited
+            if cmd.future.set_running_or_notify_cancel():
+                cmd.future.set_exception(exc)
+
+    def _next_command(self):
+        # Block on the queue only when nothing is in flight; otherwise we need to
+        # get back to reading replies.
+        try:
+            if self._in_flight:
+                busy = {c.key for c in self._in_flight.values() if c.key is not None}
+                return self._queue.get_nowait(busy, pipelined=True)
+            return self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+    def _hold_airtime(self):
+        """Make sure we own the shared airtime before writing. False = try again later."""
+        if self._airtime is None or self._airtime_held:
+            return True
+        # Only compete for the air once there is something to send
+        if not self._queue.wait(0.1):
+            return False
+        self._airtime_held = self._airtime.acquire(timeout=0.05)
+        return self._airtime_held
+
+    def _release_airtime_if_idle(self):
+        if self._airtime_held and not self._in_flight:
+            self._airtime_held = False
+            self._airtime.release()
+
+    def _fill_pipeline(self):
+        while len(self._in_flight) < self.max_in_flight:
+            if not self._hold_airtime():
+                return
+            cmd = self._next_command()
+            if cmd is None:
+                return
+            if not cmd.future.set_running_or_notify_cancel():
+                continue
+            cmd.dispatched = time.monotonic()
+            if self._already_in_state(cmd):
+                self.skipped += 1
+                print(f"⏭️  Skipping [{cmd.label}]: outlet already {cmd.state}")
+                cmd.future.set_result({
+                    "outcome": "skipped",
+                    "elapsed": cmd.dispatched - cmd.submitted,
+                    "timings": {"queue_wait": cmd.dispatched - cmd.submitted},
+                })
+                continue
+            self._write(cmd)
+
+    def _already_in_state(self, cmd):
+        if not self.skip_confirmed or cmd.key is None:
+            return False
+        state, confirmed_at = self._outlets.get(cmd.key, (None, None))
+        if state != cmd.state:
+            return False
+        # Same state already on its way out, or confirmed recently enough to trust
+        return confirmed_at is None or time.monotonic() - confirmed_at < self.confirmed_max_age
+
+    def _write(self, cmd):
+        cmd.seq = self._next_seq
+        self._next_seq = self._next_seq % SEQ_MODULO + 1
+
+        start = time.monotonic()
+        self._ser.write(proto.encode_frame(cmd.kind, cmd.seq, cmd.payload))
+        cmd.written = time.monotonic()
+        cmd.write_time = cmd.written - start
+
+        # Each command's clock starts when the one ahead of it should have finished
+        last_deadline = max((c.deadline for c in self._in_flight.values()), default=cmd.written)
+        cmd.deadline = max(cmd.written, last_deadline) + cmd.timeout
+        self._in_flight[cmd.seq] = cmd
+        if cmd.key is not None:
+            self._outlets[cmd.key] = (cmd.state, None)
+        print(f"🚀 Sending [{cmd.label}] as #{cmd.seq} via {self.name}")
+
+    def _read_replies(self):
+        chunk = self._ser.read(self._ser.in_waiting or 1)
+        if not chunk:
+            return
+        for item in self._decoder.feed(chunk):
+            if isinstance(item, str):
+                print(f"Pico says: {item}")
+            else:
+                self._handle_frame(item)
+
+    def _handle_frame(self, frame):
+        cmd = self._in_flight.pop(frame.seq, None)
+        if cmd is None:
+            print(f"Pico replied to unknown command: {frame}")
+            return
+
+        now = time.monotonic()
+        self._missed_acks = 0
+        # The Pico works through pipelined commands one at a time, so this
+        # command's own time on the Pico starts when the previous one finished.
+        pico_started = max(cmd.written, self._last_reply)
+        self._last_reply = now
+
+        if frame.kind == proto.REPLY_ACK:
+            timings = {
+                "queue_wait": cmd.dispatched - cmd.submitted,
+                "serial_write": cmd.write_time,
+                "firmware_ack": now - pico_started,
+            }
+            result = {
+                "outcome": "sent",
+                "seq": cmd.seq,
+                "pico_response": "ACK",
+                "payload": frame.payload,
+                "elapsed": now - cmd.submitted,
+                "timings": timings,
+            }
+            if cmd.kind in (proto.CMD_TX, proto.CMD_BATCH) and len(frame.payload) == proto.TX_ACK.size:
+                # Measured on the Pico: sync byte in to first RF edge out
+                timings["pico_first_edge"] = proto.TX_ACK.unpack(frame.payload)[0] / 1e6
+            elif cmd.kind == proto.CMD_TX_VERIFY and len(frame.payload) == proto.VERIFY_ACK.size:
+                first_edge, verified, copies, frames = proto.VERIFY_ACK.unpack(frame.payload)
+                timings["pico_first_edge"] = first_edge / 1e6
+                result.update(verified=bool(verified), copies=copies, frames=frames)
+            # An unverified burst may not have reached the outlet
+            self._settle_outlet(cmd, confirmed=result.get("verified", True))
+            cmd.future.set_result(result)
+        elif frame.kind in (proto.REPLY_NAK, proto.REPLY_ERROR):
+            self._settle_outlet(cmd, confirmed=False)
+            verb = "rejected" if frame.kind == proto.REPLY_NAK else "failed"
+            cmd.future.set_exception(PicoError(
+                f"Pico {verb} #{cmd.seq} [{cmd.label}]: {proto.describe(frame.kind, frame.payload)}"))
+        else:
+            cmd.future.set_exception(PicoError(f"Unexpected reply to #{cmd.seq}: {frame}"))
+
+    def _settle_outlet(self, cmd, confirmed):
+        if cmd.key is None or self._outlets.get(cmd.key) != (cmd.state, None):
+            return
+        if confirmed:
+            self._outlets[cmd.key] = (cmd.state, time.monotonic())
+        else:
+            # We no longer know what state the outlet is in
+            del self._outlets[cmd.key]
+
+    def _expire(self):
+        now = time.monotonic()
+        for seq, cmd in list(self._in_flight.items()):
+            if now > cmd.deadline:
+                del self._in_flight[seq]
+                self._settle_outlet(cmd, confirmed=False)
+                cmd.future.set_exception(PicoError(f"No ack from Pico for #{seq} [{cmd.label}]"))
+                self._missed_acks += 1
+
+        if self._missed_acks >= MAX_MISSED_ACKS:
+            # A hung Pico keeps its USB port open, so treat silence like a
+            # disconnect: reconnecting re-runs the handshake, and queued
+            # commands fail over to another transmitter if that fails.
+            self._missed_acks = 0
+            raise serial.SerialException(f"{MAX_MISSED_ACKS} acks missed in a row")
@@ -0,0 +1,186 @@
+"""
+Binary framing for the host <-> Pico link (see pico_bridge.py for the device side).
+
+Every frame, in both directions:
+
+    0xA5 | len | type | seq (u16 LE) | payload (len bytes) | crc16 (u16 LE)
+
+The CRC is CRC-16/CCITT-FALSE over len, type, seq and payload. Text output
+from the Pico (prints, legacy "Done." replies) can be interleaved with frames
+on the same stream; FrameDecoder hands those back as text lines.
+
+The host switches the Pico into binary mode by sending the text line
+"BINARY". Until then the Pico only speaks the old text protocol, so tools like
+mimic_pico.py and sniff_pico.py keep working.
+"""
+import struct
+
+SYNC = 0xA5
+HEADER = struct.Struct("<BBBH")     # sync, len, type, seq
+CRC = struct.Struct("<H")
+MAX_PAYLOAD = 255
+
+# Host -> Pico
+CMD_TX = 0x01       # payload: one TX_ITEM, optionally followed by a repeats byte
+CMD_BATCH = 0x02    # payload: [repeats byte] + N x TX_ITEM, repeats interleaved across codes
+CMD_PING = 0x03     # payload: empty
+CMD_RX = 0x04       # payload: one RX_* action byte. ACK payload: RX status (see unpack_rx_status)
+CMD_TX_VERIFY = 0x05  # payload: TX_ITEM + max repeats + clean copies wanted. ACK payload: VERIFY_ACK
+
+# Pico -> Host
+REPLY_ACK = 0x80    # Command finished (payload depends on the command, may be empty)
+REPLY_NAK = 0x81    # Frame rejected before running (payload: reason byte)
+REPLY_ERROR = 0x82  # Frame was valid but the command failed (payload: reason byte + text)
+
+NAK_CRC = 1
+NAK_TIMEOUT = 2     # Frame body did not arrive in time
+
+ERR_UNKNOWN_COMMAND = 1
+ERR_BAD_PAYLOAD = 2
+ERR_FAILED = 3
+
+RX_STOP = 0
+RX_START = 1
+RX_STATUS = 2
+
+REASONS = {
+    (REPLY_NAK, NAK_CRC): "bad CRC",
+    (REPLY_NAK, NAK_TIMEOUT): "incomplete frame",
+    (REPLY_ERROR, ERR_UNKNOWN_COMMAND): "unknown command",
+    (REPLY_ERROR, ERR_BAD_PAYLOAD): "bad payload",
+    (REPLY_ERROR, ERR_FAILED): "command failed",
+}
+
+TX_ITEM = struct.Struct("<IBH")     # code, protocol, pulse length
+MAX_REPEATS = 255                   # Repeats travel as one byte; leave it out for the Pico's default
+DEFAULT_REPEATS = 10                # What the Pico sends when a command doesn't say
+TX_ACK = struct.Struct("<I")        # ACK payload for TX/BATCH: us from sync byte to first RF edge
+VERIFY_ACK = struct.Struct("<IBBB")  # first edge us, confirmed, copies heard, frames sent
+RX_HEADER = struct.Struct("<BIIB")  # active, edges seen, edges lost to overruns, code count
+RX_CODE = struct.Struct("<IH")      # code, times decoded
+
+HANDSHAKE = b"BINARY\n"
+HANDSHAKE_REPLY = "BINARY OK"
+
+
+def crc16(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE."""
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+
+def encode_frame(kind, seq, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload too long ({len(payload)} > {MAX_PAYLOAD} bytes)")
+    header = HEADER.pack(SYNC, len(payload), kind, seq & 0xFFFF)
+    return header + payload + CRC.pack(crc16(header[1:] + payload))
+
+
+def _repeats_byte(repeats):
+    if not 1 <= repeats <= MAX_REPEATS:
+        raise ValueError(f"Repeats must be 1..{MAX_REPEATS}, got {repeats}")
+    return bytes([repeats])
+
+
+def pack_tx(code, protocol, pulse, repeats=None):
+    item = TX_ITEM.pack(code, protocol, pulse)
+    return item if repeats is None else item + _repeats_byte(repeats)
+
+
+def pack_tx_verify(code, protocol, pulse, repeats, copies):
+    """Send up to `repeats` frames, stopping once the Pico's receiver decoded `copies` of them."""
+    return TX_ITEM.pack(code, protocol, pulse) + _repeats_byte(repeats) + _repeats_byte(copies)
+
+
+def pack_batch(items, repeats=None):
+    """items: packed TX_ITEMs (without repeats). A batch length of 7N + 1 tells the
+    Pico the first byte is a repeat count for every code in the batch."""
+    body = b"".join(items)
+    return body if repeats is None else _repeats_byte(repeats) + body
+
+
+def unpack_rx_status(payload):
+    active, edges, overruns, count = RX_HEADER.unpack_from(payload)
+    codes = [RX_CODE.unpack_from(payload, RX_HEADER.size + i * RX_CODE.size) for i in range(count)]
+    return {
+        "active": bool(active),
+        "edges": edges,
+        "overruns": overruns,
+        "codes": [{"code": code, "count": seen} for code, seen in codes],
+    }
+
+
+def describe(kind, payload):
+    """Human-readable reason for a NAK/ERROR reply."""
+    if not payload:
+        return "no reason given"
+    reason = REASONS.get((kind, payload[0]), f"reason {payload[0]}")
+    detail = payload[1:].decode(errors="replace")
+    return f"{reason}: {detail}" if detail else reason
+
+
+class Frame:
+    __slots__ = ("kind", "seq", "payload")
+
+    def __init__(self, kind, seq, payload):
+        self.kind = kind
+        self.seq = seq
+        self.payload = payload
+
+    def __repr__(self):
+        return f"Frame(kind={self.kind:#04x}, seq={self.seq}, payload={bytes(self.payload)!r})"
+
+
+class FrameDecoder:
+    """Incrementally splits a byte stream into Frames and text lines.
+
+    feed() returns a list of Frame objects and str lines in arrival order.
+    Corrupt frames are dropped (and counted) and the decoder resyncs on the
+    next sync byte.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data):
+        self._buf.extend(data)
+        out = []
+        buf = self._buf
+        while buf:
+            if buf[0] == SYNC:
+                if len(buf) < HEADER.size:
+                    break
+                _, length, kind, seq = HEADER.unpack_from(buf)
+                end = HEADER.size + length + CRC.size
+                if len(buf) < end:
+                    break
+                (crc,) = CRC.unpack_from(buf, end - CRC.size)
+                if crc != crc16(buf[1:end - CRC.size]):
+                    # Not a real frame (or a mangled one): skip the sync byte and resync
+                    self.crc_errors += 1
+                    del buf[0]
+                    continue
+                out.append(Frame(kind, seq, bytes(buf[HEADER.size:end - CRC.size])))
+                del buf[:end]
+            else:
+                # Text up to the next newline or sync byte, whichever comes first
+                nl = buf.find(b"\n")
+                sync = buf.find(bytes([SYNC]))
+                if nl == -1 and sync == -1:
+                    break
+                if nl == -1 or (sync != -1 and sync < nl):
+                    cut, skip = sync, 0
+                else:
+                    cut, skip = nl, 1
+                line = buf[:cut].decode(errors="replace").strip()
+                del buf[:cut + skip]
+                if line:
+                    out.append(line)
+        return out
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Drive the Pico's on-device SWEEP command (see pico_bridge.py).
+
+The Pico generates and sends every code in the range itself and prints
+@<code> as each one goes out, so a sweep runs as fast as the radio allows
+and the host always knows exactly which code is on air. Ctrl+C sends ABORT,
+which stops the Pico at the next frame.
+
+    python pico_sweep.py 4470000 4480000 --repeats 4
+
+Stop rf_bridge_service.py first: the sweep needs the serial port to itself.
+"""
+import argparse
+import sys
+import time
+
+import serial
+
+import rf_waveform
+
+# Config
+DEFAULT_PICO_PORT = "/dev/ttyACM0"
+PROTO = 1
+PULSE = 150
+SWEEP_REPEATS = 4
+
+
+class PicoError(Exception):
+    pass
+
+
+class PicoSweeper:
+
+    def __init__(self, port=DEFAULT_PICO_PORT):
+        self.port = port
+        self.ser = serial.Serial(port, 115200, timeout=1)
+        self.interrupted_at = None      # When Ctrl+C hit the last sweep (before the ABORT round trip)
+        time.sleep(1)  # Wait for handshake
+        self.ser.reset_input_buffer()
+
+    def close(self):
+        self.ser.close()
+
+    def _line(self):
+        return self.ser.readline().decode(errors="replace").strip()
+
+    def _until_done(self, handle=None, timeout=5):
+        """Read lines until "Done.". Lines go to handle(); stalls raise PicoError."""
+        last_seen = time.monotonic()
+        while True:
+            line = self._line()
+            if not line:
+                if time.monotonic() - last_seen > timeout:
+                    raise PicoError(f"Pico on {self.port} stopped answering")
+                continue
+            last_seen = time.monotonic()
+            if line == "Done.":
+                return
+            if line.startswith("ERR"):
+                raise PicoError(line)
+            if handle is not None:
+                handle(line)
+
+    def send(self, code, repeats=15, protocol=PROTO, pulse=PULSE):
+        """One code, the normal way."""
+        self.ser.write(f"{code},{protocol},{pulse},{repeats}\n".encode())
+        self._until_done()
+
+    def sweep(self, start, end, step=1, repeats=SWEEP_REPEATS, protocol=PROTO, pulse=PULSE,
+              on_code=None):
+        """Sweep start..end (inclusive). on_code(code, monotonic time) fires as each code starts.
+
+        Returns (last code started, aborted). Ctrl+C aborts the sweep on the Pico,
+        then propagates.
+        """
+        state = {"last": None, "finished": None}
+
+        def handle(line):
+            if line.startswith("@"):
+                state["last"] = int(line[1:])
+                if on_code is not None:
+                    on_code(state["last"], time.monotonic())
+            elif line.startswith("SWEEP DONE") or line.startswith("SWEEP ABORTED"):
+                state["finished"] = line
+
+        # The stall timeout has to cover the slowest code's airtime
+        frame_s = rf_waveform.airtime_us(rf_waveform.frame_timings(start, pulse, protocol=protocol)) / 1e6
+        self.ser.write(f"SWEEP {start},{end},{step},{repeats},{protocol},{pulse}\n".encode())
+        try:
+            self._until_done(handle, timeout=5 + frame_s * repeats)
+        except KeyboardInterrupt:
+            self.interrupted_at = time.monotonic()
+            self.abort(handle)
+            raise
+        return state["last"], state["finished"] is None or "ABORTED" in state["finished"]
+
+    def abort(self, handle=None):
+        self.ser.write(b"ABORT\n")
+        finished = []
+
+        def track(line):
+            if line.startswith("SWEEP "):
+                finished.append(line)
+            if handle is not None:
+                handle(line)
+
+        self._until_done(track)
+        if finished and "DONE" in finished[0]:
+            # The sweep ended before ABORT arrived, which then gets a Done. of its own
+            self._until_done()
+
+
+def runs(codes):
+    """Split codes into evenly spaced runs, in order: [(start, end, step)]."""
+    out = []
+    i = 0
+    while i < len(codes):
+        j = i + 1
+        step = codes[j] - codes[i] if j < len(codes) else 1
+        if step <= 0:
+            step = 1
+        else:
+            while j < len(codes) and codes[j] - codes[j - 1] == step:
+                j += 1
+        out.append((codes[i], codes[j - 1], step))
+        i = j
+    return out
+
+
+def pico_sender(sweeper, protocol=PROTO, pulse=PULSE):
+    """send() for group_search.py: each evenly spaced run of a block goes out as one SWEEP.
+
+    Blocks lose the codes already ruled out or saved, so they are rarely one run.
+    """
+    def send(codes, repeats):
+        for start, end, step in runs(list(codes)):
+            if start == end:
+                sweeper.send(start, repeats, protocol, pulse)
+            else:
+                sweeper.sweep(start, end, step, repeats, protocol, pulse)
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep a code range on the Pico itself')
+    parser.add_argument('start', type=int)
+    parser.add_argument('end', type=int)
+    parser.add_argument('-s', '--step', type=int, default=1)
+    parser.add_argument('-r', '--repeats', type=int, default=SWEEP_REPEATS, help="Frames per code")
+    parser.add_argument('--protocol', type=int, default=PROTO)
+    parser.add_argument('--pulse', type=int, default=PULSE)
+    parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="Serial port of the Pico")
+    args = parser.parse_args()
+
+    sweeper = PicoSweeper(args.port)
+    count = len(range(args.start, args.end + 1, args.step))
+    frame_s = rf_waveform.airtime_us(rf_waveform.frame_timings(args.start, args.pulse, protocol=args.protocol)) / 1e6
+    print(f"🌌 Sweeping {count} codes on the Pico, {args.repeats} frames each "
+          f"(airtime limit {1 / (frame_s * args.repeats):.0f} codes/s)")
+    print("Press Ctrl+C IMMEDIATELY when an outlet reacts!")
+
+    seen = {"last": None}
+
+    def progress(code, _):
+        seen["last"] = code
+        if code % 100 == 0:
+            print(f"👉 Scanning: {code} ...", end='\r')
+
+    started = time.monotonic()
+    try:
+        sweeper.sweep(args.start, args.end, args.step, args.repeats, args.protocol,
+                      args.pulse, on_code=progress)
+        elapsed = time.monotonic() - started
+        print(f"\n✅ Swept {count} codes in {elapsed:.1f}s ({count / elapsed:.1f} codes/s)")
+    except KeyboardInterrupt:
+        # The Pico reported each code as it started, so this is the code on air
+        # when you pressed Ctrl+C; the one that clicked is a reaction time earlier
+        print(f"\n🛑 Aborted while sending {seen['last'] if seen['last'] is not None else '?'}")
+    except PicoError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    finally:
+        sweeper.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Raises a button's learned repeat count when people keep having to press it twice.
+
+Pressing the same button again within RETRY_WINDOW seconds counts as a
+retry: the first burst most likely didn't reach the outlet. When retries
+make up too big a share of a button's recent presses, the tuner adds
+REPEAT_STEP to its "repeats" in remote_codes.json, and the registry picks
+the change up on its next lookup.
+"""
+import collections
+import threading
+import time
+
+RETRY_WINDOW = 15.0     # Seconds
+HISTORY = 20            # Recent presses per button to judge by
+MIN_RETRIES = 3
+RETRY_RATE = 0.25
+REPEAT_STEP = 2
+MAX_AUTO_REPEATS = 30
+
+
+class RepeatTuner:
+
+    def __init__(self, registry, default_repeats, window=RETRY_WINDOW):
+        self.registry = registry
+        self.default_repeats = default_repeats
+        self.window = window
+        self.raised = 0
+        self._last = {}
+        self._history = collections.defaultdict(lambda: collections.deque(maxlen=HISTORY))
+        self._lock = threading.Lock()
+
+    def retry_rates(self):
+        with self._lock:
+            return {name: sum(h) / len(h) for name, h in self._history.items() if h}
+
+    def press(self, button):
+        """Record one request for a button. Returns the new repeat count if it was raised."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(button.name)
+            self._last[button.name] = now
+            history = self._history[button.name]
+            history.append(last is not None and now - last < self.window)
+
+            retries = sum(history)
+            if retries < MIN_RETRIES or retries / len(history) < RETRY_RATE:
+                return None
+            current = button.repeats or self.default_repeats
+            if current >= MAX_AUTO_REPEATS:
+                return None
+            new = min(current + REPEAT_STEP, MAX_AUTO_REPEATS)
+            # Start counting afresh at the new setting
+            history.clear()
+
+        try:
+            self.registry.update(button.name, repeats=new)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Could not save repeats for {button.name}: {e}")
+            return None
+        self.raised += 1
+        print(f"📈 {button.name}: {retries} retries in recent presses, repeats {current} -> {new}")
+        return new
@@ -1,14 +1,34 @@
 from flask import Flask, jsonify, request
-import subprocess
+import argparse
 import os
+import subprocess
+import sys
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from code_registry import CodeRegistry
+from pico_link import PicoError
+from transmitter_pool import TransmitterPool
 
 app = Flask(__name__)
 
 # CONFIGURATION
-# The path to your python executable (in the virtual environment)
+DEFAULT_PICO_PORT = "/dev/ttyACM0"
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+# Same margin mimic_pico.py and the bridge add on top of calibrated repeats
+REPEAT_MARGIN = 2
+# How long a request waits for the Pico's ack
+REQUEST_TIMEOUT = 10
+# The old way, kept for --compare: the path to your python executable (in the
+# virtual environment) and the pico mimic script it ran for every request
 PYTHON_EXEC = "/home/spoon/new_puck/.venv/bin/python"
-# The path to the pico mimic script
-SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mimic_pico.py")
+SCRIPT_PATH = os.path.join(FILES_DIR, "mimic_pico.py")
+
+# Loaded once and re-read only when the file changes on disk
+registry = CodeRegistry(CODES_FILE, repeat_margin=REPEAT_MARGIN)
+# Opened in main(): one serial connection for the life of the server
+pool = None
 
 @app.route('/')
 def home():
@@ -20,33 +40,93 @@ def control_outlet():
     Expects JSON data: { "button": "1 ON" }
     Sends command to Pi Pico Bridge.
     """
+    started = time.monotonic()
     data = request.json
     button_name = data.get('button')
-    
+
     if not button_name:
         return jsonify({"error": "No button specified"}), 400
-    
+
     print(f"📡 Received request: {button_name}")
-    
-    # Construct the command
-    # python rf_testing/mimic_remote.py "1 ON"
-    cmd = [PYTHON_EXEC, SCRIPT_PATH, button_name]
-    
+
+    button = registry.lookup(button_name)
+    if button is None:
+        return jsonify({"status": "error", "message": f"Button '{button_name}' not found",
+                        "available_buttons": registry.names()}), 404
+
     try:
-        # Run the mimic script
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-        
-        if result.returncode == 0:
-            print(f"✅ Success: {result.stdout.strip()}")
-            return jsonify({"status": "success", "message": f"Sent {button_name}", "output": result.stdout.strip()})
-        else:
-            print(f"❌ Error: {result.stderr.strip()}")
-            return jsonify({"status": "error", "message": "Script failed", "detail": result.stderr.strip()}), 500
-            
-    except Exception as e:
-        print(f"❌ Exception: {str(e)}")
+        result = send(button)
+    except FutureTimeout:
+        print("❌ Timed out waiting for the Pico")
+        return jsonify({"status": "error", "message": "Timed out waiting for Pico"}), 504
+    except PicoError as e:
+        print(f"❌ Error: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
-if __name__ == '__main__':
+    elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+    print(f"✅ Success: {button.name} in {elapsed_ms} ms")
+    return jsonify({"status": "success", "message": f"Sent {button.name}",
+                    "output": result.get("pico_response"), "elapsed_ms": elapsed_ms})
+
+def send(button):
+    return pool.submit(button.payload, label=button.name).result(timeout=REQUEST_TIMEOUT)
+
+def compare(button_name, count):
+    """Time the old subprocess-per-request path against the persistent link."""
+    button = registry.lookup(button_name)
+    if button is None:
+        print(f"Unknown button '{button_name}'. Available: {registry.names()}")
+        sys.exit(1)
+
+    # The subprocess opens the port itself, so run it before our link holds it
+    python = PYTHON_EXEC if os.path.exists(PYTHON_EXEC) else sys.executable
+    old = []
+    for _ in range(count):
+        started = time.monotonic()
+        subprocess.run([python, SCRIPT_PATH, button.name, "--direct",
+                        "-p", pool.links[pool.default].port],
+                       capture_output=True, text=True, timeout=15)
+        old.append(time.monotonic() - started)
+
+    pool.start()
+    deadline = time.monotonic() + 10
+    while not pool.connected:
+        if time.monotonic() > deadline:
+            print("❌ Could not connect to the Pico")
+            sys.exit(1)
+        time.sleep(0.1)
+    new = []
+    for _ in range(count):
+        started = time.monotonic()
+        send(button)
+        new.append(time.monotonic() - started)
+    pool.stop()
+
+    old_ms, new_ms = 1000 * sum(old) / count, 1000 * sum(new) / count
+    print(f"\n📏 [{button.name}] x{count}")
+    print(f"   subprocess per request: {old_ms:8.1f} ms avg")
+    print(f"   persistent link:        {new_ms:8.1f} ms avg")
+    print(f"   saved {old_ms - new_ms:.1f} ms per click ({old_ms / new_ms:.1f}x faster)")
+
+def main():
+    global pool
+    parser = argparse.ArgumentParser(description='Small HTTP API for the Pico RF bridge')
+    parser.add_argument('-p', '--port', default=DEFAULT_PICO_PORT, help="Serial port of the Pico")
+    parser.add_argument('--compare', metavar='BUTTON',
+                        help="Don't serve; time the old subprocess path against the persistent link")
+    parser.add_argument('-n', '--count', type=int, default=5, help="(--compare) presses per path")
+    args = parser.parse_args()
+
+    pool = TransmitterPool({"main": {"port": args.port}})
+    if args.compare:
+        compare(args.compare, args.count)
+        return
+
+    registry.refresh()
+    # The link thread connects (and reconnects) on its own
+    pool.start()
     # Host='0.0.0.0' allows access from other devices on the network (like your watch)
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -1,122 +1,527 @@
 import json
 import os
-import serial
-import time
 import sys
-from flask import Flask, jsonify, request
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from flask import Flask, Response, jsonify, request
+
+from bridge_metrics import MetricsRegistry
+from bridge_unix import UnixControlServer
+from bridge_ws import ControlSocketServer
+from code_registry import CodeRegistry
+from pico_link import ACK_TIMEOUT, BULK, INTERACTIVE, NORMAL, PRIORITIES, PicoError
+from pico_protocol import (CMD_BATCH, CMD_RX, CMD_TX_VERIFY, DEFAULT_REPEATS, RX_START,
+                           RX_STATUS, RX_STOP, pack_batch, pack_tx_verify, unpack_rx_status)
+from repeat_tuner import RepeatTuner
+from transmitter_pool import TransmitterPool
 
 # Configuration
 # We expect remote_codes.json to be in the same directory as this script
-CODES_FILE = "remote_codes.json"
-PICO_PORT = "/dev/ttyACM0"
-BAUD_RATE = 115200
+CODES_FILE = os.environ.get("RF_BRIDGE_CODES_FILE") or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "remote_codes.json")
+# Named groups of buttons, e.g. {"All Off": ["1 OFF", "2 OFF"]}
+SCENES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rf_scenes.json")
+# Pico transmitters by name; the first is the default for buttons without a
+# "transmitter" hint. Picos in the same airspace would step on each other's
+# signals, so they take turns. Different airspaces transmit in parallel.
+TRANSMITTERS = {
+    "main": {"port": "/dev/ttyACM0", "airspace": "house"},
+    # "garage": {"port": "/dev/ttyACM1", "airspace": "house"},
+}
+# RF_BRIDGE_TRANSMITTERS (JSON, same shape) overrides this, e.g. to run against
+# virtual_pico.py: '{"main": {"port": "/tmp/virtual_pico"}}'
+if os.environ.get("RF_BRIDGE_TRANSMITTERS"):
+    TRANSMITTERS = json.loads(os.environ["RF_BRIDGE_TRANSMITTERS"])
+# How long an HTTP request waits for its command to come back from the Pico.
+# Covers its own burst plus whatever is queued ahead of it.
+REQUEST_TIMEOUT = 10
+# Codes per BATCH frame. Bigger scenes go out as several frames.
+MAX_BATCH = 10
+# Bulk scenes use smaller frames so an interactive tap can slip in between them
+BULK_BATCH = 3
+# Scheduling class per API client, from the X-RF-Client header (or "client" in
+# the JSON body). A request can also pass "priority": "interactive" | "normal" | "bulk".
+CLIENT_PRIORITIES = {
+    "watch": "interactive",
+    "gesture": "interactive",
+    "home-assistant": "normal",
+}
+# Don't transmit when the outlet was already confirmed in the requested state
+# within CONFIRMED_STATE_MAX_AGE seconds. Requests can pass "force": true to send anyway.
+SKIP_CONFIRMED_STATE = False
+CONFIRMED_STATE_MAX_AGE = 300
+# Buttons with a calibrated "repeats" (see calibrate_repeats.py) are sent with
+# that many repeats plus this margin. Others use the Pico's default.
+REPEAT_MARGIN = 2
+# Raise a button's repeats when it keeps being pressed twice in a row (see repeat_tuner.py)
+AUTO_RAISE_REPEATS = True
+# Have the Pico listen to its own bursts (on its RX pin) and stop once it hears
+# VERIFY_COPIES clean copies. Bursts it never hears are resent up to
+# VERIFY_RETRIES times. Needs a receiver wired to the Pico.
+VERIFY_TX = False
+VERIFY_COPIES = 2
+VERIFY_RETRIES = 1
+# Persistent WebSocket control channel (see bridge_ws.py). Clients keep one
+# connection open, send button names and get acks plus outlet-state pushes.
+WS_PORT = 5001
+# Same commands over a local Unix socket (see bridge_unix.py). mimic_pico.py and
+# mimic_remote.py send through it while the bridge is running.
+UNIX_SOCKET = "/tmp/rf_bridge.sock"
 
 app = Flask(__name__)
 
-# Global serial connection
-ser = None
+registry = CodeRegistry(CODES_FILE, SCENES_FILE, repeat_margin=REPEAT_MARGIN)
+tuner = RepeatTuner(registry, DEFAULT_REPEATS)
 
-def load_codes():
-    """Load the RF codes from the JSON file."""
-    if not os.path.exists(CODES_FILE):
-        print(f"Error: {CODES_FILE} not found.")
-        return {}
-    try:
-        with open(CODES_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading codes: {e}")
-        return {}
-
-def init_serial():
-    """Initialize the persistent serial connection."""
-    global ser
-    try:
-        print(f"Connecting to Pico on {PICO_PORT}...")
-        ser = serial.Serial(PICO_PORT, BAUD_RATE, timeout=1)
-        # Wait a moment for the connection to settle
-        time.sleep(2)
-        print("Serial connection established successfully.")
-    except Exception as e:
-        print(f"CRITICAL ERROR: Could not connect to Pico: {e}")
-        ser = None
+# One I/O thread per Pico; nothing else touches the serial ports
+pool = TransmitterPool(TRANSMITTERS, skip_confirmed=SKIP_CONFIRMED_STATE,
+                       confirmed_max_age=CONFIRMED_STATE_MAX_AGE)
+
+# Where the time goes: parse, lookup, queue_wait, serial_write, firmware_ack,
+# pico_first_edge (measured on the Pico), total
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "rf_bridge_stage_seconds", "Time spent in each stage of a request", ["stage"])
+queue_wait_seconds = metrics.histogram(
+    "rf_bridge_queue_wait_seconds", "Time commands spent queued, by scheduling class", ["priority"])
+requests_total = metrics.counter(
+    "rf_bridge_requests_total", "Requests by button and result", ["button", "result"])
+metrics.gauge("rf_bridge_pending_commands", "Commands queued or in flight to the Picos",
+              lambda: pool.pending)
+metrics.gauge("rf_bridge_transmitters_connected", "Number of Picos with a live serial link",
+              lambda: sum(link.connected for link in pool.links.values()))
+failovers_total = metrics.counter(
+    "rf_bridge_failovers_total", "Commands rerouted because their Pico was unavailable", ["transmitter"])
+pool.on_failover = lambda name: failovers_total.inc(transmitter=name)
+verify_total = metrics.counter(
+    "rf_bridge_verify_total", "Verified bursts by whether the Pico heard them", ["result"])
+metrics.gauge("rf_bridge_repeat_raises", "Times a button's repeat count was raised after retries",
+              lambda: tuner.raised)
+
+# Label for requests naming a button we don't have: client-supplied names would
+# give the counters a new series for every typo
+UNKNOWN_BUTTON = "unknown"
+
+def record(button, result, timings, started):
+    """Feed one finished request into the histograms and counters."""
+    timings["total"] = time.monotonic() - started
+    for stage, seconds in timings.items():
+        if seconds is not None:
+            stage_seconds.observe(seconds, stage=stage)
+    requests_total.inc(button=button, result=result)
+
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+def client_priority(data, client, default):
+    """Scheduling class for a command: explicit "priority", else by client, else default."""
+    name = data.get('priority')
+    if not name:
+        name = CLIENT_PRIORITIES.get(client or data.get('client'))
+    return PRIORITIES.get(str(name).lower(), default) if name else default
+
+def request_priority(data, default):
+    return client_priority(data, request.headers.get('X-RF-Client'), default)
+
+# Last state we transmitted to each outlet: {outlet: state message}
+outlet_states = {}
+
+def publish_state(button):
+    """Remember an outlet's new state and push it to WebSocket clients."""
+    if button.outlet is None or button.state is None:
+        return
+    update = {"type": "state", "outlet": button.outlet, "state": button.state,
+              "button": button.name, "time": time.time()}
+    outlet_states[button.outlet] = update
+    control_socket.broadcast(update)
 
 @app.route('/api/control', methods=['POST'])
 def control_outlet():
-    global ser
-    
+    started = time.monotonic()
+
     # 1. Parse Request
     data = request.json
     button_name = data.get('button')
+    timings = {"parse": time.monotonic() - started}
     
     if not button_name:
+        record("", "bad_request", timings, started)
         return jsonify({"error": "No button specified"}), 400
     
     # 2. Lookup Code
-    # Reload codes every time? Or just once? 
-    # Let's reload to allow user to update json without restarting service
-    codes_db = load_codes()
-    
-    # Try case-insensitive lookup, but prefer exact match
-    btn_key = button_name # keep original casing first
-    if btn_key not in codes_db:
-        # Try upper case
-        btn_key = button_name.upper()
-    
-    if btn_key not in codes_db:
+    # The registry keeps the parsed file in memory and only re-reads it
+    # when it changes on disk, so edits still apply without a restart.
+    button = registry.lookup(button_name)
+    timings["lookup"] = time.monotonic() - started - timings["parse"]
+    if button is None:
+        record(UNKNOWN_BUTTON, "not_found", timings, started)
         return jsonify({
             "error": f"Button '{button_name}' not found",
-            "available_buttons": list(codes_db.keys())
+            "available_buttons": registry.names()
         }), 404
-        
-    data = codes_db[btn_key]
-    code = data['code']
-    proto = data.get('protocol', 1)
-    pulse = data.get('pulselength', 150)
+    if AUTO_RAISE_REPEATS:
+        # Pressed again right after the last one? Then that one probably didn't arrive.
+        tuner.press(button)
     
-    # 3. Send to Pico
-    if ser is None:
-        # Try to reconnect if connection was lost or never established
-        print("Serial connection is down. Attempting to reconnect...")
-        init_serial()
-        if ser is None:
-            return jsonify({"error": "Serial connection unavailable"}), 500
+    # 3. Hand off to the serial link and wait for the Pico's ack.
+    # The link thread does the actual I/O, so concurrent requests queue
+    # behind each other instead of racing on the port. A newer command for
+    # the same outlet replaces this one if it is still waiting in line.
+    # Forced commands get no outlet key, so they are never coalesced or skipped.
+    key = None if data.get('force') else button.outlet
+    priority = request_priority(data, NORMAL)
+    future = submit_button(button, key, priority)
+    try:
+        result = future.result(timeout=REQUEST_TIMEOUT)
+    except FutureTimeout:
+        # Don't leave it queued: the client has been told it failed
+        future.cancel()
+        record(button.name, "timeout", timings, started)
+        return jsonify({"error": f"Timed out waiting for Pico ({pool.pending} commands pending)"}), 504
+    except PicoError as e:
+        print(f"Pico Error: {e}")
+        record(button.name, "error", timings, started)
+        return jsonify({"error": f"Failed to send command: {str(e)}"}), 500
+
+    return jsonify(control_reply(button, button_name, result, timings, priority, started))
+
+def submit_button(button, key, priority):
+    """Queue one button press. Returns a Future of the link's result.
+
+    With VERIFY_TX the Pico confirms each burst with its receiver, and only
+    the bursts it didn't hear are sent again.
+    """
+    if not VERIFY_TX:
+        return pool.submit(button.payload, transmitter=button.transmitter,
+                           label=button.name, key=key, state=button.state, priority=priority)
+
+    payload = pack_tx_verify(button.code, button.protocol, button.pulselength,
+                             button.send_repeats or DEFAULT_REPEATS, VERIFY_COPIES)
+    outer = Future()
+
+    def attempt(n):
+        def done(inner):
+            if outer.cancelled():
+                return
+            exc = inner.exception()
+            if exc is not None:
+                outer.set_exception(exc)
+                return
+            result = inner.result()
+            if "verified" in result:
+                verify_total.inc(result="confirmed" if result["verified"] else "unconfirmed")
+                if not result["verified"] and n < VERIFY_RETRIES:
+                    print(f"🔁 {button.name} unconfirmed ({result['copies']} copies heard), resending")
+                    attempt(n + 1)
+                    return
+            outer.set_result(dict(result, attempts=n + 1))
+
+        inner = pool.submit(payload, transmitter=button.transmitter, kind=CMD_TX_VERIFY,
+                            label=button.name, key=key, state=button.state, priority=priority)
+        inner.add_done_callback(done)
+        outer.add_done_callback(lambda f: f.cancelled() and inner.cancel())
+
+    attempt(0)
+    return outer
 
+def control_reply(button, button_name, result, timings, priority, started):
+    """Record a finished single-button command and build its reply."""
+    outcome = result["outcome"]
+    timings.update(result["timings"])
+    queue_wait_seconds.observe(timings["queue_wait"], priority=PRIORITY_NAMES[priority])
+    record(button.name, "success" if outcome == "sent" else outcome, timings, started)
+    if outcome == "coalesced":
+        message = f"{button_name} superseded by {result['superseded_by']}"
+    elif outcome == "skipped":
+        message = f"{button_name} skipped, outlet already {button.state}"
+    else:
+        message = f"Sent {button_name}"
+        publish_state(button)
+
+    return {
+        "status": "success",
+        "outcome": outcome,
+        "message": message,
+        "pico_response": result.get("pico_response"),
+        "seq": result.get("seq"),
+        "transmitter": result.get("transmitter"),
+        "verified": result.get("verified"),
+        "attempts": result.get("attempts", 1),
+        "coalesced_total": pool.coalesced,
+        "skipped_total": pool.skipped,
+        "timings_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+    }
+
+def batch_repeats(buttons):
+    """One repeat count covers a whole batch frame: enough for its neediest button."""
+    if all(b.send_repeats is None for b in buttons):
+        return None
+    return max(b.send_repeats or DEFAULT_REPEATS for b in buttons)
+
+def submit_buttons(buttons, label, priority):
+    """Queue several buttons as interleaved batch frames. Returns one future per frame.
+
+    Buttons are grouped by transmitter so each Pico gets its own frames and
+    Picos in separate airspaces work in parallel.
+    """
+    chunk_size = BULK_BATCH if priority >= BULK else MAX_BATCH
+    groups = {}
+    for button in buttons:
+        groups.setdefault(button.transmitter, []).append(button)
+
+    futures = []
+    for transmitter, group in groups.items():
+        for i in range(0, len(group), chunk_size):
+            chunk = group[i:i + chunk_size]
+            payload = pack_batch([b.item for b in chunk], batch_repeats(chunk))
+            futures.append(pool.submit(payload, transmitter=transmitter, label=label,
+                                       timeout=ACK_TIMEOUT * len(chunk), kind=CMD_BATCH,
+                                       priority=priority))
+    return futures
+
+def send_buttons(buttons, label, started, priority):
+    """Send several buttons and wait for all acks."""
+    futures = submit_buttons(buttons, label, priority)
     try:
-        # Send command: code,protocol,pulselength
-        cmd = f"{code},{proto},{pulse}\n"
-        print(f"🚀 Sending: {cmd.strip()}")
-        ser.write(cmd.encode())
-        
-        # Read response (optional, but good for confirmation)
-        # Pico should send back "Done." or similar
-        # We use strict timeout here to not block if Pico is silent
-        response = ser.read_until(b"Done.").decode().strip()
-        print(f"Pico says: {response}")
-        
+        results = [f.result(timeout=REQUEST_TIMEOUT + ACK_TIMEOUT * len(buttons)) for f in futures]
+    except FutureTimeout:
+        for f in futures:
+            f.cancel()
+        record(label, "timeout", {}, started)
+        return jsonify({"error": f"Timed out waiting for Pico ({pool.pending} commands pending)"}), 504
+    except PicoError as e:
+        print(f"Pico Error: {e}")
+        record(label, "error", {}, started)
+        return jsonify({"error": f"Failed to send {label}: {str(e)}"}), 500
+
+    return jsonify(buttons_reply(buttons, label, results, priority, started))
+
+def buttons_reply(buttons, label, results, priority, started):
+    """Record a finished batch/scene and build its reply."""
+    for r in results:
+        queue_wait_seconds.observe(r["timings"]["queue_wait"], priority=PRIORITY_NAMES[priority])
+    record(label, "success", {}, started)
+    for button in buttons:
+        publish_state(button)
+
+    return {
+        "status": "success",
+        "message": f"Sent {label}",
+        "buttons": [b.name for b in buttons],
+        "frames": len(results),
+        "transmitters": sorted({r["transmitter"] for r in results}),
+    }
+
+def resolve_buttons(names):
+    """Map button names to registry entries. Returns (buttons, unknown_names)."""
+    buttons, unknown, seen = [], [], set()
+    for name in names:
+        button = registry.lookup(name)
+        if button is None:
+            unknown.append(name)
+        elif button.name not in seen:
+            seen.add(button.name)
+            buttons.append(button)
+    return buttons, unknown
+
+@app.route('/api/batch', methods=['POST'])
+def batch_control():
+    """
+    Expects JSON data: { "buttons": ["1 OFF", "2 OFF"] }
+    All buttons go to the Pico in one frame with their repeats interleaved.
+    """
+    started = time.monotonic()
+    data = request.json or {}
+    names = data.get('buttons')
+    if not isinstance(names, list) or not names:
+        return jsonify({"error": "No buttons specified"}), 400
+
+    buttons, unknown = resolve_buttons(names)
+    if unknown:
+        return jsonify({
+            "error": f"Buttons not found: {unknown}",
+            "available_buttons": registry.names()
+        }), 404
+
+    return send_buttons(buttons, "batch", started, request_priority(data, BULK))
+
+@app.route('/api/scene', methods=['POST'])
+def scene_control():
+    """
+    Expects JSON data: { "scene": "All Off" }
+    Scenes are defined in rf_scenes.json.
+    """
+    started = time.monotonic()
+    data = request.json or {}
+    scene_name = data.get('scene')
+    if not scene_name:
+        return jsonify({"error": "No scene specified"}), 400
+
+    names = registry.scene(scene_name)
+    if names is None:
         return jsonify({
-            "status": "success",
-            "message": f"Sent {button_name}", 
-            "pico_response": response
-        })
-        
-    except Exception as e:
-        print(f"Serial Write Error: {e}")
-        # Force reconnection next time
+            "error": f"Scene '{scene_name}' not found",
+            "available_scenes": registry.scene_names()
+        }), 404
+
+    buttons, unknown = resolve_buttons(names)
+    if unknown:
+        return jsonify({"error": f"Scene '{scene_name}' refers to unknown buttons: {unknown}"}), 500
+
+    return send_buttons(buttons, f"scene:{scene_name}", started, request_priority(data, BULK))
+
+def when_done(futures, finish, label, started):
+    """Future of finish(results) once every future has resolved, without blocking a thread.
+
+    Pico errors become error replies, since WebSocket commands are answered
+    with a message rather than an HTTP status.
+    """
+    reply = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            print(f"Pico Error: {errors[0]}")
+            record(label, "error", {}, started)
+            reply.set_result({"status": "error", "error": f"Failed to send {label}: {errors[0]}"})
+            return
         try:
-            ser.close()
-        except:
-            pass
-        ser = None
-        return jsonify({"error": f"Failed to send command: {str(e)}"}), 500
+            reply.set_result(finish([f.result() for f in futures]))
+        except Exception as e:
+            reply.set_exception(e)
+
+    for f in futures:
+        f.add_done_callback(done)
+    return reply
+
+def resolved(reply):
+    future = Future()
+    future.set_result(reply)
+    return future
+
+def socket_command(data, client):
+    """Handle one WebSocket or local socket command, e.g. {"button": "1 ON"} or {"scene": "All Off"}.
+
+    Returns a Future of the reply, so the socket server can await it on its
+    event loop instead of parking a thread per client.
+    """
+    started = time.monotonic()
+
+    scene_name = data.get('scene')
+    if scene_name:
+        names = registry.scene(scene_name)
+        if names is None:
+            return resolved({"status": "error", "error": f"Scene '{scene_name}' not found",
+                             "available_scenes": registry.scene_names()})
+        buttons, unknown = resolve_buttons(names)
+        if unknown:
+            return resolved({"status": "error",
+                             "error": f"Scene '{scene_name}' refers to unknown buttons: {unknown}"})
+        label = f"scene:{scene_name}"
+        priority = client_priority(data, client, BULK)
+        return when_done(submit_buttons(buttons, label, priority),
+                         lambda results: buttons_reply(buttons, label, results, priority, started),
+                         label, started)
+
+    button_name = data.get('button')
+    if not button_name:
+        return resolved({"status": "error", "error": "No button specified"})
+    timings = {"parse": time.monotonic() - started}
+    button = registry.lookup(button_name)
+    timings["lookup"] = time.monotonic() - started - timings["parse"]
+    if button is None:
+        record(UNKNOWN_BUTTON, "not_found", timings, started)
+        return resolved({"status": "error", "error": f"Button '{button_name}' not found"})
+    if AUTO_RAISE_REPEATS:
+        tuner.press(button)
+
+    key = None if data.get('force') else button.outlet
+    priority = client_priority(data, client, NORMAL)
+    future = submit_button(button, key, priority)
+    return when_done([future],
+                     lambda results: control_reply(button, button_name, results[0], timings,
+                                                   priority, started),
+                     button.name, started)
+
+control_socket = ControlSocketServer(socket_command, snapshot=lambda: list(outlet_states.values()),
+                                     port=WS_PORT)
+local_socket = UnixControlServer(socket_command, path=UNIX_SOCKET)
+
+SNIFF_ACTIONS = {"start": RX_START, "stop": RX_STOP, "status": RX_STATUS}
+
+@app.route('/api/sniff', methods=['GET', 'POST'])
+def sniff_control():
+    """
+    GET: what the Pico's receiver has decoded so far.
+    POST { "action": "start" | "stop" | "status", "transmitter": "main" }
+    The Pico decodes in the background, so this never holds up transmissions.
+    """
+    data = (request.json or {}) if request.method == 'POST' else request.args
+    action = SNIFF_ACTIONS.get(data.get('action', 'status'))
+    if action is None:
+        return jsonify({"error": f"Unknown action, expected one of {sorted(SNIFF_ACTIONS)}"}), 400
+
+    future = pool.submit(bytes([action]), transmitter=data.get('transmitter'),
+                         label=f"sniff {data.get('action', 'status')}", kind=CMD_RX,
+                         priority=INTERACTIVE)
+    try:
+        result = future.result(timeout=REQUEST_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()
+        return jsonify({"error": f"Timed out waiting for Pico ({pool.pending} commands pending)"}), 504
+    except PicoError as e:
+        return jsonify({"error": f"Sniff command failed: {str(e)}"}), 500
+
+    status = unpack_rx_status(result["payload"])
+    for entry in status["codes"]:
+        found = [b.name for b in registry.refresh().buttons.values() if b.code == entry["code"]]
+        entry["buttons"] = found
+    return jsonify(dict(status, transmitter=result["transmitter"]))
+
+@app.route('/api/scenes')
+def list_scenes():
+    return jsonify({"scenes": registry.scene_names()})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route('/health')
 def health_check():
-    status = "healthy" if ser and ser.is_open else "unhealthy"
-    return jsonify({"status": status, "serial_connected": ser is not None})
+    status = "healthy" if pool.connected else "unhealthy"
+    latency_ms = {
+        stage: {q: None if v is None else round(v * 1000, 2) for q, v in pcts.items()}
+        for (stage,), pcts in stage_seconds.percentiles().items()
+    }
+    return jsonify({
+        "status": status,
+        "serial_connected": pool.connected,
+        "transmitters": pool.status(),
+        "failovers": pool.failovers,
+        "pending_commands": pool.pending,
+        "coalesced_commands": pool.coalesced,
+        "skipped_commands": pool.skipped,
+        "repeat_raises": tuner.raised,
+        "buttons_loaded": len(registry.names()),
+        "codes_error": registry.last_error,
+        "websocket_clients": len(control_socket.clients),
+        "local_clients": local_socket.connections,
+        "latency_ms": latency_ms,
+    })
 
 if __name__ == '__main__':
-    # Initialize serial on startup
-    init_serial()
+    registry.refresh()
+    # Claim the local socket first: if another bridge is running, stop before touching its Picos
+    local_socket.start()
+    # Start one serial I/O thread per Pico (each connects and reconnects on its own)
+    pool.start()
+    # WebSocket clients share one event loop thread next to Flask's request threads
+    control_socket.start()
     # Run Flask
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000, threaded=True)
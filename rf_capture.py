@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Record the raw edges a receiver sees, instead of rpi_rf's decoded guess.
+
+A capture file is a small header followed by one little-endian uint32 per
+edge: microseconds since the capture started (good for 71 minutes). The
+level alternates from the header's first level, so the file is a plain
+array that numpy can memory-map (see rf_decode.py) and that grows by
+appending. 10 seconds of button presses is a few hundred KB.
+
+    python rf_capture.py presses.rfe --seconds 10          # from the RX module
+    python rf_capture.py synth.rfe --synth 4478259 --pulse 150 --jitter 30
+
+--synth writes what a remote would have sent, with timing jitter and
+noise, so the decoder can be tried and tested without a radio.
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+import rf_waveform
+
+# Config
+GPIO_RX = 27
+
+MAGIC = b"RFE1"
+HEADER = struct.Struct("<4sBBHd")       # magic, first level, gpio, reserved, unix start time
+EDGE = "I"                              # array typecode of the edge timestamps (uint32 us)
+# Edges buffered in memory before they are appended to the file
+FLUSH_EDGES = 4096
+# Quiet low before a synthesized burst, like the receiver idling between presses
+IDLE_US = 20000
+
+if array(EDGE).itemsize != 4 or sys.byteorder != "little":
+    raise RuntimeError("capture files are little-endian uint32")
+
+
+class CaptureWriter:
+    """Appends edge timestamps to a capture file."""
+
+    def __init__(self, path, first_level, gpio=0, started=None):
+        self.path = path
+        self.first_level = first_level
+        self.level = first_level ^ 1        # Level before the first edge
+        self.edges = array(EDGE)
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, first_level, gpio, 0, started or time.time()))
+
+    def edge(self, us, level=None):
+        """An edge at `us`. A level that didn't change means an edge was missed:
+        a zero-length period keeps the alternation, so only that frame is lost."""
+        if level is not None and level == self.level:
+            self.edges.append(us)
+            self.count += 1
+            self.level ^= 1
+        self.edges.append(us)
+        self.count += 1
+        self.level ^= 1
+        if len(self.edges) >= FLUSH_EDGES:
+            self.flush()
+
+    def flush(self):
+        self.edges.tofile(self._file)
+        self._file.flush()
+        del self.edges[:]
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_capture(path):
+    """(header dict, array of edge timestamps). rf_decode.load() maps it with numpy instead."""
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError(f"{path} is too short for a capture")
+        magic, first_level, gpio, _, started = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError(f"{path} isn't a capture file")
+        body = f.read()
+    edges = array(EDGE)
+    edges.frombytes(body[:len(body) - len(body) % edges.itemsize])
+    return {"first_level": first_level, "gpio": gpio, "started": started}, edges
+
+
+def record_gpio(path, gpio, seconds):
+    """Edges from the RX module until `seconds` pass or Ctrl+C. Returns the edge count."""
+    import RPi.GPIO as GPIO
+
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(gpio, GPIO.IN)
+    started = time.perf_counter_ns()
+    writer = CaptureWriter(path, GPIO.input(gpio) ^ 1, gpio)
+
+    def on_edge(channel):
+        writer.edge((time.perf_counter_ns() - started) // 1000, GPIO.input(channel))
+
+    GPIO.add_event_detect(gpio, GPIO.BOTH, callback=on_edge)
+    try:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            print(f"👂 {writer.count} edges", end="\r")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        GPIO.remove_event_detect(gpio)
+        GPIO.cleanup(gpio)
+        writer.close()
+    return writer.count
+
+
+def synth_periods(code, protocol=1, pulse=None, repeats=10, jitter=0, noise=0, bits=rf_waveform.BITS,
+                  seed=None):
+    """Periods (alternating low, high, ...) of a burst as a receiver would see it.
+    Every frame is data then sync, so each one starts after a long low."""
+    rng = random.Random(seed)
+    periods = [IDLE_US]
+    for _ in range(noise):
+        # Short junk between presses, as a real receiver picks up
+        periods.extend([rng.randint(50, 900), rng.randint(50, 900)])
+    periods[-1] += IDLE_US
+    frame = rf_waveform.frame_timings(code, pulse, bits, protocol)
+    for _ in range(repeats):
+        periods.extend(max(1, round(us + rng.gauss(0, jitter))) for us in frame)
+    periods[-1] += IDLE_US
+    return periods
+
+
+def write_periods(path, periods, first_level=0):
+    """Periods -> capture file. The first period is at first_level."""
+    writer = CaptureWriter(path, first_level)
+    writer.edge(0)
+    t = 0
+    for us in periods:
+        t += us
+        writer.edge(t)
+    writer.close()
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record raw RF edges to a capture file')
+    parser.add_argument('path', help="Capture file to write (e.g. presses.rfe)")
+    parser.add_argument('-g', '--gpio', type=int, default=GPIO_RX, help=f"RX GPIO pin (Default: {GPIO_RX})")
+    parser.add_argument('-s', '--seconds', type=float, default=10)
+    parser.add_argument('--synth', type=int, metavar='CODE', help="Write a simulated burst of CODE instead")
+    parser.add_argument('--protocol', type=int, default=1)
+    parser.add_argument('--pulse', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--jitter', type=float, default=0, help="(--synth) timing jitter, us")
+    parser.add_argument('--noise', type=int, default=0, help="(--synth) junk pulses before the burst")
+    args = parser.parse_args()
+
+    if args.synth is not None:
+        count = write_periods(args.path, synth_periods(args.synth, args.protocol, args.pulse, args.repeats,
+                                                       args.jitter, args.noise))
+    else:
+        print(f"🔴 Recording GPIO {args.gpio} for {args.seconds:.0f}s. Press your remote now (Ctrl+C stops).")
+        count = record_gpio(args.path, args.gpio, args.seconds)
+    print(f"💾 {count} edges, {os.path.getsize(args.path)} bytes in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
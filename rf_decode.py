@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Decode capture files (see rf_capture.py) offline, for every protocol at once.
+
+rpi_rf decodes as the edges come in: it guesses the pulse length from the
+sync gap, then takes the first protocol that fits within 80%. That's how a
+protocol 1 / 150 us remote gets reported as "protocol 5, pulse ~450". This
+decoder sees whole frames instead:
+
+  1. every long low may start a frame; all candidates are stacked into
+     one (frames x periods) array
+  2. each bit's high/low ratio picks 0 or 1 for each protocol, independent
+     of the pulse length
+  3. the pulse length is a least-squares fit of the data periods to the
+     protocol's multiples, and the fit's error, plus how well the sync
+     matches, scores the protocol
+
+All of it is NumPy array arithmetic over (protocols x frames x bits), so a
+capture of thousands of frames decodes in milliseconds.
+
+    python rf_decode.py presses.rfe              # codes, protocols, pulse lengths
+    python rf_decode.py diff before.rfe after.rfe
+    python rf_decode.py replay presses.rfe       # through rf_waveform.PulseDecoder
+    python rf_decode.py replay presses.rfe --backend gpio
+"""
+import argparse
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+import rf_capture
+import rf_waveform
+
+BITS = rf_waveform.BITS
+# Shortest sync low of any protocol (protocol 4 at 100us). Every low at least this
+# long may start a frame; candidates whose data has a period nearly as long as
+# the gap before them aren't frames and are dropped.
+MIN_GAP_US = 600
+GAP_RATIO = 0.8
+# Frames whose best protocol fits worse than this (mean relative error) are noise
+MAX_ERROR = 0.3
+# Longest quiet spell a replay keeps, so gaps between presses don't take minutes
+MAX_REPLAY_GAP_US = 50000
+
+_numbers = sorted(rf_waveform.PROTOCOLS)
+PROTOCOL_NUMBERS = np.array(_numbers)
+SYNC = np.array([rf_waveform.PROTOCOLS[p][1] for p in _numbers], dtype=float)      # (P, 2)
+ZERO = np.array([rf_waveform.PROTOCOLS[p][2] for p in _numbers], dtype=float)
+ONE = np.array([rf_waveform.PROTOCOLS[p][3] for p in _numbers], dtype=float)
+
+
+def load(path):
+    """(periods, levels) of a capture, mapped from the file rather than read into memory."""
+    header = rf_capture.HEADER.size
+    with open(path, "rb") as f:
+        magic, first_level, _, _, _ = rf_capture.HEADER.unpack(f.read(rf_capture.HEADER.size))
+    if magic != rf_capture.MAGIC:
+        raise ValueError(f"{path} isn't a capture file")
+    count = (os.path.getsize(path) - header) // 4
+    if count < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)
+    edges = np.memmap(path, dtype="<u4", mode="r", offset=header, shape=(count,))
+    # uint32 microseconds wrap after 71 minutes; the modulo undoes one wrap
+    periods = np.diff(edges.astype(np.int64)) % (1 << 32)
+    levels = (first_level ^ (np.arange(len(periods)) & 1)).astype(np.int8)
+    return periods, levels
+
+
+def decode(periods, levels, bits=BITS):
+    """Decode every frame. Returns a dict of arrays, one entry per frame:
+    start (period index), code, protocol, pulse, error; plus errors, the
+    (protocols x frames) error table behind the choice."""
+    n = 2 * bits
+    gaps = np.flatnonzero((levels == 0) & (periods >= MIN_GAP_US))
+    starts = gaps + 1
+    # Each frame needs its data and the sync high after it
+    starts = starts[starts + n < len(periods)]
+    if len(starts):
+        longest = periods[starts[:, None] + np.arange(n)].max(1)
+        starts = starts[longest < GAP_RATIO * periods[starts - 1]]
+    empty = {key: np.zeros(0, dtype=np.int64) for key in ("start", "code", "protocol")}
+    if not len(starts):
+        return dict(empty, pulse=np.zeros(0), error=np.zeros(0), errors=np.zeros((len(_numbers), 0)))
+
+    frames = periods[starts[:, None] + np.arange(n)].astype(float)            # (F, 2*bits)
+    frames = np.maximum(frames, 1.0)
+    high, low = frames[:, 0::2], frames[:, 1::2]                               # (F, bits)
+    sync_high = periods[starts + n].astype(float)
+    # The frame's own sync low, or the one before it, whichever is a real sync
+    # rather than the quiet between presses
+    lead = periods[starts - 1].astype(float)
+    trail_index = np.minimum(starts + n + 1, len(periods) - 1)
+    trail = np.where(starts + n + 1 < len(periods), periods[trail_index], lead).astype(float)
+
+    # 1. Bits by high/low ratio, per protocol: (P, F, bits)
+    ratio = np.log(high / low)[None]
+    r0 = np.log(ZERO[:, 0] / ZERO[:, 1])[:, None, None]
+    r1 = np.log(ONE[:, 0] / ONE[:, 1])[:, None, None]
+    is_one = np.abs(ratio - r1) < np.abs(ratio - r0)
+
+    # 2. Pulse length: least squares of the data periods against their multiples
+    unit_high = np.where(is_one, ONE[:, 0, None, None], ZERO[:, 0, None, None])
+    unit_low = np.where(is_one, ONE[:, 1, None, None], ZERO[:, 1, None, None])
+    pulse = ((high[None] * unit_high + low[None] * unit_low).sum(-1)
+             / (unit_high ** 2 + unit_low ** 2).sum(-1))                        # (P, F)
+
+    # 3. Score: mean relative error of the data, plus the sync's
+    expected_high = unit_high * pulse[..., None]
+    expected_low = unit_low * pulse[..., None]
+    data_error = (np.abs(high[None] - expected_high) / expected_high
+                  + np.abs(low[None] - expected_low) / expected_low).mean(-1) / 2
+    sync_error_high = np.abs(sync_high[None] - SYNC[:, 0, None] * pulse) / (SYNC[:, 0, None] * pulse)
+    sync_low = SYNC[:, 1, None] * pulse
+    sync_error_low = np.minimum(np.abs(lead[None] - sync_low), np.abs(trail[None] - sync_low)) / sync_low
+    errors = data_error + (np.minimum(sync_error_high, 1) + np.minimum(sync_error_low, 1)) / 2
+
+    best = errors.argmin(0)
+    frame = np.arange(len(starts))
+    weights = np.int64(1) << np.arange(bits - 1, -1, -1, dtype=np.int64)
+    codes = (is_one[best, frame].astype(np.int64) * weights).sum(-1)
+    return {
+        "start": starts,
+        "code": codes,
+        "protocol": PROTOCOL_NUMBERS[best],
+        "pulse": pulse[best, frame],
+        "error": errors[best, frame],
+        "errors": errors,
+    }
+
+
+def summarise(decoded, max_error=MAX_ERROR):
+    """[(code, protocol, frames, median pulse, median error)], most frames first."""
+    good = decoded["error"] < max_error
+    codes, protocols = decoded["code"][good], decoded["protocol"][good]
+    pulses, errors = decoded["pulse"][good], decoded["error"][good]
+    if not len(codes):
+        return []
+    keys = np.stack([codes, protocols], axis=1)
+    unique, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    rows = []
+    for i, (code, protocol) in enumerate(unique):
+        mine = inverse == i
+        rows.append((int(code), int(protocol), int(counts[i]),
+                     float(np.median(pulses[mine])), float(np.median(errors[mine]))))
+    rows.sort(key=lambda row: -row[2])
+    return rows
+
+
+def decode_file(path, bits=BITS):
+    return summarise(decode(*load(path), bits=bits))
+
+
+def print_summary(rows, frames):
+    print(f"{'code':>10} {'hex':>9} {'proto':>5} {'frames':>6} {'pulse':>7} {'error':>6}")
+    for code, protocol, count, pulse, error in rows:
+        print(f"{code:>10} {code:#09x} {protocol:>5} {count:>6} {pulse:7.1f} {error:6.1%}")
+    print(f"{sum(row[2] for row in rows)} of {frames} frames decoded")
+
+
+def diff(path_a, path_b, bits=BITS):
+    """What changed between two captures: codes only one has, and pulse-length shifts."""
+    a = {(code, proto): (count, pulse) for code, proto, count, pulse, _ in decode_file(path_a, bits)}
+    b = {(code, proto): (count, pulse) for code, proto, count, pulse, _ in decode_file(path_b, bits)}
+    print(f"{'code':>10} {'proto':>5} {'frames A':>9} {'frames B':>9} {'pulse A':>8} {'pulse B':>8}")
+    for key in sorted(set(a) | set(b)):
+        count_a, pulse_a = a.get(key, (0, float("nan")))
+        count_b, pulse_b = b.get(key, (0, float("nan")))
+        mark = "" if key in a and key in b else "  <-- only in " + ("A" if key in a else "B")
+        print(f"{key[0]:>10} {key[1]:>5} {count_a:>9} {count_b:>9} {pulse_a:8.1f} {pulse_b:8.1f}{mark}")
+    return a, b
+
+
+def replay_periods(periods, levels):
+    """The capture as a timing table for tx_backends: starts high, long lows shortened."""
+    periods, levels = np.asarray(periods), np.asarray(levels)
+    first_high = np.flatnonzero(levels == 1)
+    if not len(first_high):
+        return array("I")
+    periods = periods[first_high[0]:]
+    return array("I", np.minimum(periods, MAX_REPLAY_GAP_US).astype(np.uint32).tobytes())
+
+
+def replay_decoder(periods, levels, bits=BITS):
+    """Feed a capture through rf_waveform.PulseDecoder, the decoder the Pico runs."""
+    decoder = rf_waveform.PulseDecoder(bits)
+    codes = [decoder.feed(int(level), int(us)) for level, us in zip(levels, periods)]
+    return [code for code in codes if code is not None]
+
+
+def replay(path, backend_name, gpio):
+    periods, levels = load(path)
+    if backend_name == "decoder":
+        codes = replay_decoder(periods, levels)
+        counts = {code: codes.count(code) for code in codes}
+        print(f"🔁 PulseDecoder heard {len(codes)} frames: "
+              + ", ".join(f"{code} x{n}" for code, n in sorted(counts.items(), key=lambda kv: -kv[1])))
+        return
+    from tx_backends import open_backend
+    if backend_name == "pico":
+        sys.exit("❌ The Pico builds its own frames from a code; replay raw edges with sim, gpio or lgpio")
+    table = replay_periods(periods, levels)
+    options = {"gpio": {"gpio": gpio}, "lgpio": {"gpio": gpio}}.get(backend_name, {})
+    backend = open_backend(backend_name, **options)
+    try:
+        started = time.monotonic()
+        backend.transmit(table, None, None, None, 1)
+        print(f"🔁 Replayed {len(table)} periods ({sum(table) / 1e6:.2f}s of signal) "
+              f"on {backend_name} in {time.monotonic() - started:.2f}s")
+    finally:
+        backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode, diff and replay raw RF captures')
+    parser.add_argument('args', nargs='*', help="FILE | diff FILE_A FILE_B | replay FILE")
+    parser.add_argument('--bits', type=int, default=BITS)
+    parser.add_argument('--backend', default="decoder",
+                        help="(replay) decoder, sim, gpio or lgpio (Default: decoder)")
+    parser.add_argument('-g', '--gpio', type=int, default=17, help="(replay) TX GPIO pin")
+    args = parser.parse_args()
+
+    if len(args.args) == 3 and args.args[0] == "diff":
+        diff(args.args[1], args.args[2], args.bits)
+    elif len(args.args) == 2 and args.args[0] == "replay":
+        replay(args.args[1], args.backend, args.gpio)
+    elif len(args.args) == 1:
+        periods, levels = load(args.args[0])
+        decoded = decode(periods, levels, args.bits)
+        print_summary(summarise(decoded), len(decoded["code"]))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
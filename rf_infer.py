@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Work out a remote's protocol and pulse length from raw captures.
+
+Takes the raw periods of a few captured bursts (an rf_capture.py file, or
+the RAW: lines the Pico prints during SNIFF) and:
+
+  1. histograms the high/low durations of the decoded frames on a log
+     scale; the peaks are the pulse multiples, the lowest is the base pulse,
+     and the sync low over the base pulse is the sync ratio
+  2. scores every protocol on every frame with rf_decode.decode() and
+     takes the best fit
+  3. rates the answer 0..1: how well the best protocol fits, how far ahead of
+     the runner-up it is, whether the histogram agrees with the fitted pulse,
+     and whether there were enough frames
+
+Confident results go into remote_codes.json (update_registry()), so the
+sniffers no longer force protocol 1 / 150 us.
+
+    python rf_infer.py presses.rfe
+    python rf_infer.py presses.rfe --button "6 ON" --save
+"""
+import argparse
+import os
+
+import numpy as np
+
+import rf_decode
+import rf_waveform
+from code_registry import update_entry
+
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
+
+# Below this the result is only a suggestion, and isn't written anywhere
+MIN_CONFIDENCE = 0.5
+# Frames needed for full confidence
+MIN_FRAMES = 4
+# Log-scale histogram bins (about 5% wide) and the share of durations a peak needs
+BIN_WIDTH = 0.05
+PEAK_SHARE = 0.05
+# Histogram and fit must agree on the pulse within this
+PULSE_AGREEMENT = 0.2
+
+MIN_UNIT = {p: min(t[2] + t[3]) for p, t in rf_waveform.PROTOCOLS.items()}
+
+
+def histogram_peaks(durations):
+    """Centres of the peaks of a log-scale duration histogram, shortest first."""
+    durations = np.asarray(durations, dtype=float)
+    durations = durations[durations > 0]
+    if not len(durations):
+        return []
+    logs = np.log(durations)
+    bins = np.arange(logs.min() - BIN_WIDTH, logs.max() + 2 * BIN_WIDTH, BIN_WIDTH)
+    counts, edges = np.histogram(logs, bins=bins)
+    padded = np.concatenate([[0], counts, [0]])
+    is_peak = (counts >= padded[:-2]) & (counts > padded[2:]) & (counts >= PEAK_SHARE * len(durations))
+    peaks = []
+    for i in np.flatnonzero(is_peak):
+        centre = np.exp((edges[i] + edges[i + 1]) / 2)
+        near = durations[np.abs(durations / centre - 1) < 0.2]
+        peaks.append(float(np.median(near)))
+    return peaks
+
+
+def infer(periods, levels, code=None, bits=rf_decode.BITS):
+    """Protocol and pulse length of the most common code in a capture (or of `code`).
+
+    Returns {"code", "protocol", "pulse", "confidence", "frames", "base_pulse",
+    "sync_ratio", "errors"}, or None if no frame decoded.
+    """
+    periods, levels = np.asarray(periods), np.asarray(levels)
+    decoded = rf_decode.decode(periods, levels, bits)
+    good = decoded["error"] < rf_decode.MAX_ERROR
+    if code is None:
+        rows = rf_decode.summarise(decoded)
+        if not rows:
+            return None
+        code = rows[0][0]
+    mine = good & (decoded["code"] == code)
+    if not mine.any():
+        return None
+
+    # Every protocol's fit over this code's frames
+    errors = decoded["errors"][:, mine].mean(1)
+    order = np.argsort(errors)
+    best, second = errors[order[0]], errors[order[1]]
+    protocol = int(rf_decode.PROTOCOL_NUMBERS[order[0]])
+    pulse = float(np.median(decoded["pulse"][mine]))
+
+    # The histogram's view: data periods of these frames, and the sync lows before them
+    starts = decoded["start"][mine]
+    data = periods[starts[:, None] + np.arange(2 * bits)].ravel()
+    peaks = histogram_peaks(data)
+    base = peaks[0] if peaks else float("nan")
+    sync_ratio = float(np.median(periods[starts - 1])) / base if peaks else float("nan")
+    histogram_pulse = base / MIN_UNIT[protocol]
+    agrees = abs(histogram_pulse - pulse) <= PULSE_AGREEMENT * pulse
+
+    fit = max(0.0, 1 - (best / rf_decode.MAX_ERROR) ** 2)
+    margin = max(0.0, 1 - best / second) if second > 0 else 0.0
+    confidence = fit * margin * (1.0 if agrees else 0.5) * min(1.0, mine.sum() / MIN_FRAMES)
+    return {
+        "code": int(code),
+        "protocol": protocol,
+        "pulse": int(round(pulse)),
+        "confidence": round(confidence, 2),
+        "frames": int(mine.sum()),
+        "base_pulse": round(base, 1),
+        "sync_ratio": round(sync_ratio, 1),
+        "errors": {int(p): round(float(e), 3) for p, e in zip(rf_decode.PROTOCOL_NUMBERS, errors)},
+    }
+
+
+def describe(result):
+    return (f"code {result['code']}: protocol {result['protocol']}, pulse {result['pulse']}us, "
+            f"confidence {result['confidence']:.0%} ({result['frames']} frames, base pulse "
+            f"{result['base_pulse']}us, sync ratio {result['sync_ratio']})")
+
+
+def update_registry(path, name, result, min_confidence=MIN_CONFIDENCE):
+    """Write a confident result into the codes file. Returns True if it was written."""
+    if result is None or result["confidence"] < min_confidence:
+        return False
+    update_entry(path, name, create=True, code=result["code"], protocol=result["protocol"],
+                 pulselength=result["pulse"])
+    return True
+
+
+def parse_raw(lines):
+    """The RAW:<p>,<p>,... lines one Pico SNIFF printed -> one list of periods."""
+    return [int(v) for line in lines for v in line[4:].split(",") if v]
+
+
+def periods_from_dumps(dumps):
+    """Raw period lists from the Pico's SNIFF -> (periods, levels). Each dump starts
+    with a sync low and alternates low, high, low..."""
+    periods, levels = [], []
+    for dump in dumps:
+        if levels and levels[-1] == 0:
+            # Keep the alternation across dumps: an empty high in between
+            periods.append(0)
+            levels.append(1)
+        periods.extend(dump)
+        levels.extend(i % 2 for i in range(len(dump)))
+    return np.array(periods), np.array(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Infer protocol and pulse length from a capture')
+    parser.add_argument('capture', nargs='?', help="Capture file (see rf_capture.py)")
+    parser.add_argument('--code', type=int, default=None, help="Code to look at (Default: the most common)")
+    parser.add_argument('--button', help="Registry entry to write the result to (with --save)")
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--codes', default=CODES_FILE)
+    args = parser.parse_args()
+
+    if not args.capture:
+        parser.print_help()
+        return
+    result = infer(*rf_decode.load(args.capture), code=args.code)
+    if result is None:
+        print("❌ No frames decoded")
+        return
+    print(f"🧠 {describe(result)}")
+    print("   fit error per protocol: " + ", ".join(f"{p}: {e:.1%}" for p, e in result["errors"].items()))
+    if args.save and args.button:
+        if update_registry(args.codes, args.button, result):
+            print(f"💾 Saved to [{args.button}]")
+        else:
+            print(f"⚠️ Not confident enough to save (under {MIN_CONFIDENCE:.0%}); try crack_button.py")
+
+
+if __name__ == "__main__":
+    main()
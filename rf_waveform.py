@@ -0,0 +1,185 @@
+"""
+Timing tables for the Pico transmitter (runs on MicroPython and on a PC).
+
+A timing table is a flat list of durations in microseconds, alternating
+high, low, high, low... and always starting with a high. pico_bridge.py turns
+each frame's table into PIO words once and DMAs them to a state machine,
+which plays the edges with cycle-accurate timing.
+
+Copy this file to the Pico next to main.py (see PICO_SETUP.md).
+
+PulseDecoder does the reverse for the receiver: it turns captured edge
+timings back into codes.
+
+The same tables feed every transmitter: the Pico, and the Pi's own GPIO
+and simulated backends in tx_backends.py.
+
+On a PC, `python rf_waveform.py 4478259 150` prints the table. The checks
+against the PIO words and the decoder are in test_rf_waveform.py.
+"""
+from array import array
+
+BITS = 24
+
+# rc-switch protocols, as rpi_rf numbers them: default pulse length, then
+# (high, low) in pulse lengths for the sync, a 0 bit and a 1 bit.
+PROTOCOLS = {
+    1: (350, (1, 31), (1, 3), (3, 1)),
+    2: (650, (1, 10), (1, 2), (2, 1)),
+    3: (100, (30, 71), (4, 11), (9, 6)),
+    4: (380, (1, 6), (1, 3), (3, 1)),
+    5: (500, (6, 14), (1, 2), (2, 1)),
+    6: (200, (1, 10), (1, 5), (1, 1)),
+}
+# Protocol 1, which every outlet here uses
+SYNC = (1, 31)
+ZERO = (1, 3)
+ONE = (3, 1)
+
+# Compiled frames kept per (code, protocol, pulse, bits). A handful of buttons
+# get pressed over and over, so this rarely refills.
+CACHE_SIZE = 32
+_cache = {}
+
+# Cycles the PIO program spends per edge besides its delay loop (set, mov,
+# the extra loop pass and the pull). At 1 MHz one cycle is one microsecond.
+PIO_OVERHEAD = 4
+
+
+def frame_timings(code, pulse=None, bits=BITS, protocol=1):
+    """One frame: the data bits, MSB first, then the sync gap.
+
+    pulse defaults to the protocol's own pulse length.
+    """
+    default_pulse, sync, zero, one = PROTOCOLS[protocol]
+    pulse = pulse or default_pulse
+    out = []
+    for i in range(bits - 1, -1, -1):
+        high, low = one if (code >> i) & 1 else zero
+        out.append(high * pulse)
+        out.append(low * pulse)
+    out.append(sync[0] * pulse)
+    out.append(sync[1] * pulse)
+    return out
+
+
+def compile_frame(code, protocol=1, pulse=None, bits=BITS):
+    """frame_timings() as a compact array, cached per button."""
+    key = (code, protocol, pulse, bits)
+    frame = _cache.get(key)
+    if frame is None:
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        frame = array("I", frame_timings(code, pulse, bits, protocol))
+        _cache[key] = frame
+    return frame
+
+
+def compile_burst(code, protocol=1, pulse=None, bits=BITS, repeats=1):
+    """The whole burst, `repeats` frames back to back, as one duration array."""
+    return compile_frame(code, protocol, pulse, bits) * repeats
+
+
+def schedule(count, repeats, chunk=1):
+    """Order to play `count` codes' frames in, as indexes.
+
+    With more than one code the repeats go round-robin, `chunk` identical
+    frames at a time, so every code gets its first copies out early.
+    """
+    order = []
+    sent = 0
+    while sent < repeats:
+        n = min(chunk, repeats - sent)
+        for i in range(count):
+            order.extend([i] * n)
+        sent += n
+    return order
+
+
+def pio_words(timings, overhead=PIO_OVERHEAD):
+    """Timing table -> delay-loop counts for the PIO program, packed for DMA."""
+    words = array("I", [0] * len(timings))
+    for i, us in enumerate(timings):
+        if us < overhead + 1:
+            raise ValueError("pulse too short for the PIO program")
+        words[i] = us - overhead
+    return words
+
+
+def airtime_us(timings):
+    return sum(timings)
+
+
+# Receive side. Without a protocol these match the old busy-poll sniffer.
+RX_GAP_US = 3000            # A low this long is a sync gap: the next pulse starts a frame
+RX_MAX_PULSE_US = 1500      # Anything longer inside a frame is noise
+# With a protocol they scale with its pulse length instead
+RX_GAP_SHARE = 0.7          # Share of the sync low that counts as a gap
+RX_PULSE_SLACK = 1.5        # Slack on the longest data period
+
+
+class PulseDecoder:
+    """Turns received (level, duration) periods into codes, one period at a time.
+
+    Keeps its place between calls, so the Pico can feed it whatever edges
+    arrived since it last looked. Given a protocol (and pulse length), it
+    frames and reads bits the way that protocol sends them; without one it
+    reads protocol 1 at any pulse length, like the old sniffer.
+    """
+
+    def __init__(self, bits=BITS, protocol=None, pulse=None):
+        self.bits = bits
+        if protocol is None:
+            zero, one = ZERO, ONE
+            self.gap_us = RX_GAP_US
+            self.max_pulse_us = RX_MAX_PULSE_US
+        else:
+            default_pulse, sync, zero, one = PROTOCOLS[protocol]
+            pulse = pulse or default_pulse
+            self.gap_us = int(sync[1] * pulse * RX_GAP_SHARE)
+            self.max_pulse_us = int(max(zero + one) * pulse * RX_PULSE_SLACK)
+        # A bit is a 1 when its high/low ratio is on the 1's side of the
+        # geometric mean of both ratios: high^2 * z_low * o_low vs low^2 * z_high * o_high
+        self.low_weight = zero[1] * one[1]
+        self.high_weight = zero[0] * one[0]
+        self.one_is_longer = one[0] * zero[1] > zero[0] * one[1]
+        self.in_frame = False
+        self.code = 0
+        self.count = 0
+        self.high = None
+
+    def feed(self, level, us):
+        """Returns the code when a frame completes, else None."""
+        if level == 0 and us > self.gap_us:
+            self.in_frame = True
+            self.code = 0
+            self.count = 0
+            self.high = None
+            return None
+        if not self.in_frame:
+            return None
+        if us > self.max_pulse_us or (level == 1) == (self.high is not None):
+            # Too long, or two highs/lows in a row (a missed edge): wait for the next gap
+            self.in_frame = False
+            return None
+        if level:
+            self.high = us
+            return None
+        longer = self.high * self.high * self.low_weight > us * us * self.high_weight
+        self.code = (self.code << 1) | (1 if longer == self.one_is_longer else 0)
+        self.count += 1
+        self.high = None
+        if self.count < self.bits:
+            return None
+        self.in_frame = False
+        return self.code or None
+
+
+if __name__ == "__main__":
+    import sys
+
+    code = int(sys.argv[1]) if len(sys.argv) > 1 else 4478259
+    pulse = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    frame = frame_timings(code, pulse)
+    print(f"Code {code} @ {pulse}us: {len(frame)} edges, {airtime_us(frame)}us per frame")
+    print(" ".join(str(us) for us in frame))
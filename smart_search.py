@@ -5,24 +5,32 @@ import time
 import json
 import os
 import sys
-from rpi_rf import RFDevice
+
+import code_model
+from calibrate_codes import entry_params
+import rf_waveform
+from group_search import GroupSearch, ask_user, rfdevice_sender
+from sweep_journal import SweepJournal, journal_path, report
+from tx_backends import PIN_BACKENDS, RFTransmitter
 
 # PREFERRED PIN: GPIO 17 (Physical Pin 11)
 GPIO_TX = 17
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
 
-# Verified settings
-PROTO = 1
-PULSE = 150
-
 def main():
     parser = argparse.ArgumentParser(description='Smart Pattern Search for Etekcity.')
     parser.add_argument('button', type=str, help="Button to search/save (e.g. '3 ON')")
     parser.add_argument('-g', '--gpio', dest='gpio', type=int, default=GPIO_TX, help="GPIO pin")
+    parser.add_argument('--linear', action='store_true',
+                        help="Old one-code-at-a-time sweep: press Ctrl+C when the outlet reacts")
+    parser.add_argument('--resume', action='store_true',
+                        help="(--linear) carry on from where the last sweep of this page stopped")
+    parser.add_argument('--backend', default='gpio', choices=PIN_BACKENDS,
+                        help="How to drive the transmitter pin (see tx_backends.py). Default: gpio")
     args = parser.parse_args()
     
-    rfdevice = RFDevice(args.gpio)
+    rfdevice = RFTransmitter(args.gpio, args.backend)
     rfdevice.enable_tx()
     
     # Load JSON data
@@ -39,6 +47,8 @@ def main():
         sys.exit(1)
 
     seed_code = data[key]['code']
+    # The protocol/pulse sniffed for this button (see rf_infer.py)
+    proto, pulse = entry_params(data[key])
     # Calculate the "Hex Page"
     # e.g. 4477185 = 0x445101 => Page = 0x445100
     
@@ -49,32 +59,65 @@ def main():
     print(f"Seed Code: {seed_code} ({seed_code:#x})")
     print(f"Sweeping Hex Page: {base_prefix:#x} to {base_prefix + 0xFF:#x}")
     print(f"Range: {base_prefix} to {base_prefix + 255}")
+    print(f"Settings: Proto {proto}, Pulse {pulse}")
+
+    if not args.linear:
+        # 256 codes: 8 yes/no rounds plus one to confirm (see group_search.py)
+        print("Put the outlet in the opposite state. After each round, say whether it reacted.")
+        print("------------------------------------------------")
+        try:
+            search = GroupSearch(rfdevice_sender(rfdevice, proto, pulse), ask_user)
+            found = search.run_predicted(code_model.predicted_first(key, CODES_FILE),
+                                         range(base_prefix, base_prefix + 256))
+        finally:
+            rfdevice.cleanup()
+        if found is None:
+            print("❌ No code confirmed. Try again, or use --linear.")
+            return
+        print(f"🎯 Found {found} ({found:#x}) in {search.rounds} rounds")
+        if input(f"💾 Save {found} for [{key}]? [y/n]: ").strip().lower().startswith('y'):
+            data[key]['code'] = found
+            with open(CODES_FILE, 'w') as f:
+                json.dump(data, f, indent=2)
+        return
+
     print("Press Ctrl+C IMMEDIATELY when the outlet reacts!")
     print("------------------------------------------------")
     
     start_code = base_prefix
     end_code = base_prefix + 255
+
+    # Logs every code sent, for matching Ctrl+C to a code and for --resume
+    journal = SweepJournal(journal_path("smart", start_code, end_code), start_code, end_code,
+                           resume=args.resume)
+    first_code = journal.resume_point()
+    if first_code != start_code:
+        print(f"⏩ Resuming at {first_code}")
     
-    last_sent = 0
+    last_sent = first_code
     
     try:
         rfdevice.tx_repeat = 6 # Fast but reliable
         
-        for code in range(start_code, end_code + 1):
+        for code in range(first_code, end_code + 1):
             last_sent = code
+            journal.record(code, proto, pulse)
             hex_str = f"{code:#0{8}x}" # Format as 0x......
             print(f"👉 Testing: {code} ({hex_str})", end='\r')
             
-            rfdevice.tx_code(code, PROTO, PULSE)
+            rfdevice.tx_code(code, proto, pulse)
             time.sleep(0.12) # ~30 seconds for full byte sweep
             
         print("\n❌ Reached end of range without user interrupt.")
         
     except KeyboardInterrupt:
+        interrupted = time.monotonic()
         print(f"\n\n🛑 STOPPED at ~{last_sent} ({last_sent:#x})!")
+        frame_s = rf_waveform.airtime_us(rf_waveform.frame_timings(last_sent, pulse, protocol=proto)) / 1e6
+        ranked = report(journal, interrupted, frame_s)
         print("Entering FINE TUNE mode to lock it in.")
         
-        current_code = last_sent - 3 # Backtrack slightly
+        current_code = ranked[0] if ranked else last_sent - 3 # Backtrack slightly
         
         print(" Controls:")
         print("  [a] -1  (Previous)")
@@ -89,7 +132,7 @@ def main():
             elif cmd == 'd': current_code += 1
             elif cmd == 's': 
                 rfdevice.tx_repeat = 15
-                rfdevice.tx_code(current_code, PROTO, PULSE)
+                rfdevice.tx_code(current_code, proto, pulse)
                 print(" Fired.")
             elif cmd == 'y' or cmd == 'save':
                 print(f"💾 Saving {current_code} for [{key}]...")
@@ -99,6 +142,7 @@ def main():
                 return
                 
     finally:
+        journal.close()
         rfdevice.cleanup()
 
 if __name__ == "__main__":
@@ -5,11 +5,40 @@ import argparse
 import json
 import os
 
+import rf_infer
+from code_registry import DEFAULT_PROTOCOL, DEFAULT_PULSE
+
 # Config
 DEFAULT_PORT = "/dev/cu.usbmodem1442201"
 FILES_DIR = os.path.dirname(__file__)
 CODES_FILE = os.path.join(FILES_DIR, "remote_codes.json")
 
+def read_sniff(ser):
+    """Waits for a SNIFF answer. Returns (code or None, the raw periods it printed)."""
+    raw_lines = []
+    start_time = time.time()
+    while time.time() - start_time < 8:
+        line = ser.readline().decode().strip()
+        if line.startswith("RAW:"):
+            raw_lines.append(line)
+        elif line.startswith("FOUND:"):
+            return int(line.split(":")[1]), rf_infer.parse_raw(raw_lines)
+        elif line == "TIMEOUT":
+            break
+    return None, rf_infer.parse_raw(raw_lines)
+
+def infer_params(final_code, raws):
+    """Protocol and pulse length from the raw periods of the sniffs that got final_code."""
+    dumps = [raw for code, raw in raws if code == final_code and raw]
+    result = rf_infer.infer(*rf_infer.periods_from_dumps(dumps), code=final_code) if dumps else None
+    if result and result["confidence"] >= rf_infer.MIN_CONFIDENCE:
+        print(f"   🧠 {rf_infer.describe(result)}")
+        return result["protocol"], result["pulse"]
+    if result:
+        print(f"   ⚠️ Unsure: {rf_infer.describe(result)}")
+    print(f"   ⚠️ Saving Proto={DEFAULT_PROTOCOL} Pulse={DEFAULT_PULSE}; if it doesn't work, try crack_button.py")
+    return DEFAULT_PROTOCOL, DEFAULT_PULSE
+
 def main():
     parser = argparse.ArgumentParser(description='Interactive Sniffing Wizard')
     parser.add_argument('-p', '--port', default=DEFAULT_PORT, help="Serial port of the Pico")
@@ -38,22 +67,13 @@ def main():
                 print(f"\n👉 TARGET: [{key}]")
                 
                 captured_samples = []
+                raws = []
                 while len(captured_samples) < 2:
                     current_count = len(captured_samples) + 1
                     input(f"   [{current_count}/2] Hold {key} and press ENTER to sniff...")
                     
                     ser.write(b"SNIFF\n")
-                    found_code = None
-                    
-                    # Capture loop
-                    start_time = time.time()
-                    while time.time() - start_time < 8:
-                        line = ser.readline().decode().strip()
-                        if line.startswith("FOUND:"):
-                            found_code = int(line.split(":")[1])
-                            break
-                        elif line == "TIMEOUT":
-                            break
+                    found_code, raw = read_sniff(ser)
                     
                     if found_code:
                         # 🧠 SMART FILTER:
@@ -66,6 +86,7 @@ def main():
                             
                         print(f"      Captured: {found_code}")
                         captured_samples.append(found_code)
+                        raws.append((found_code, raw))
                         
                         # If we have two samples that don't match, we need a third!
                         if len(captured_samples) == 2 and captured_samples[0] != captured_samples[1]:
@@ -81,13 +102,8 @@ def main():
                     # Need a 3rd sample
                     input(f"   [3/3 TIE-BREAKER] Hold {key} and press ENTER...")
                     ser.write(b"SNIFF\n")
-                    # Simplified capture for the 3rd one
-                    third_code = None
-                    start_time = time.time()
-                    while time.time() - start_time < 8:
-                        line = ser.readline().decode().strip()
-                        if line.startswith("FOUND:"):
-                            third_code = int(line.split(":")[1]); break
+                    third_code, raw = read_sniff(ser)
+                    raws.append((third_code, raw))
                     
                     # Take the most frequent one
                     all_three = captured_samples + [third_code] if third_code else captured_samples
@@ -95,10 +111,12 @@ def main():
                     print(f"   ✅ CONSENSUS: {final_code}")
 
                 if final_code:
+                    # Worked out from the raw timings the Pico sent along (see rf_infer.py)
+                    protocol, pulselength = infer_params(final_code, raws)
                     codes_db[key] = {
                         "code": final_code,
-                        "pulselength": 150,
-                        "protocol": 1
+                        "pulselength": pulselength,
+                        "protocol": protocol
                     }
                     with open(CODES_FILE, 'w') as f:
                         json.dump(codes_db, f, indent=2)
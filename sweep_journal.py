@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of what a sweep sent and when.
+
+Every code a sweep starts is logged as one 15-byte record: monotonic time,
+code, protocol, pulse. When you press Ctrl+C, the journal works out which
+codes were on air one reaction time earlier and ranks them, instead of
+guessing a fixed backtrack. An interrupted sweep picks up where its journal
+ends (--resume in the sweep tools).
+
+Your reaction time is measured once with `python sweep_journal.py --measure`
+and kept in reaction_times.json. Until then a typical distribution is used.
+
+`python sweep_journal.py FILE` summarises a journal.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import time
+
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_DIR = os.path.join(FILES_DIR, "sweep_journals")
+REACTION_FILE = os.path.join(FILES_DIR, "reaction_times.json")
+
+MAGIC = b"RFJ1"
+HEADER = struct.Struct("<4siii")        # magic, start, end, step
+RECORD = struct.Struct("<dIBH")         # monotonic seconds, code, protocol, pulse
+
+# Used until --measure has been run: seconds from seeing/hearing the outlet to Ctrl+C
+DEFAULT_REACTION = [0.25, 0.3, 0.33, 0.36, 0.4, 0.45, 0.5]
+# Smoothing of the measured reaction times into a distribution, seconds
+BANDWIDTH = 0.05
+# Frames an outlet needs before it switches, so it clicks a little after the code starts
+DECODE_FRAMES = 2
+# Stop listing candidates once they cover this much of the probability
+COVERAGE = 0.95
+MAX_CANDIDATES = 10
+
+
+def journal_path(tool, start, end):
+    return os.path.join(JOURNAL_DIR, f"{tool}_{start}_{end}.rfj")
+
+
+def read_journal(path):
+    """Returns ((start, end, step), records), or (None, []) if it isn't a journal."""
+    with open(path, "rb") as f:
+        blob = f.read()
+    if len(blob) < HEADER.size:
+        return None, []
+    magic, start, end, step = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        return None, []
+    body = blob[HEADER.size:]
+    # A crash mid-write can leave a torn last record; ignore it
+    usable = len(body) - len(body) % RECORD.size
+    return (start, end, step), [RECORD.unpack_from(body, i) for i in range(0, usable, RECORD.size)]
+
+
+class SweepJournal:
+
+    def __init__(self, path, start, end, step=1, resume=False):
+        """Opens the journal for a start..end sweep. Without resume, an old one is replaced."""
+        self.path = path
+        self.start, self.end, self.step = start, end, step
+        self.records = []
+        if resume and os.path.exists(path):
+            sweep, records = read_journal(path)
+            if sweep == (start, end, step):
+                self.records = records
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "ab" if self.records else "wb")
+        if not self.records:
+            self._file.write(HEADER.pack(MAGIC, start, end, step))
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def record(self, code, protocol, pulse, when=None):
+        entry = (time.monotonic() if when is None else when, code, protocol, pulse)
+        self._file.write(RECORD.pack(*entry))
+        self._file.flush()
+        self.records.append(entry)
+
+    def resume_point(self):
+        """Where to carry on: the last code started (it may have been cut short)."""
+        if not self.records:
+            return self.start
+        return self.records[-1][1]
+
+    def candidates(self, interrupted_at, reaction=None, frame_s=0.0):
+        """Codes that were on air a reaction time before interrupted_at, most likely first.
+
+        Returns [(code, probability)], covering COVERAGE of the probability.
+        """
+        reaction = reaction or load_reaction_times()
+        # Runs before a resume score zero anyway (long ago), unless the Pi rebooted
+        # in between and the clock restarted: then keep only the latest run
+        records = self.records
+        for i in range(len(records) - 1, 0, -1):
+            if records[i][0] < records[i - 1][0]:
+                records = records[i:]
+                break
+
+        scores = []
+        for i, (started, code, _, _) in enumerate(records):
+            # The code was on air from its start until the next code started
+            ended = records[i + 1][0] if i + 1 < len(records) else interrupted_at
+            clicked = min(started + DECODE_FRAMES * frame_s, ended)
+            # Chance the click happened at `clicked`, given the interrupt time
+            scores.append((reaction_density(interrupted_at - clicked, reaction), code))
+        total = sum(score for score, _ in scores)
+        if not total:
+            return []
+        ranked = sorted(scores, reverse=True)
+        out, covered = [], 0.0
+        for score, code in ranked[:MAX_CANDIDATES]:
+            out.append((code, score / total))
+            covered += score / total
+            if covered >= COVERAGE:
+                break
+        return out
+
+
+def reaction_density(delay, samples, bandwidth=BANDWIDTH):
+    """Kernel density of the reaction-time samples at `delay` seconds."""
+    if delay < 0:
+        return 0.0
+    norm = 1.0 / (len(samples) * bandwidth * math.sqrt(2 * math.pi))
+    return norm * sum(math.exp(-0.5 * ((delay - s) / bandwidth) ** 2) for s in samples)
+
+
+def load_reaction_times():
+    try:
+        with open(REACTION_FILE, "r") as f:
+            samples = json.load(f)
+        return samples or DEFAULT_REACTION
+    except (OSError, ValueError):
+        return DEFAULT_REACTION
+
+
+def report(journal, interrupted_at, frame_s=0.0):
+    """Print the likely codes after a Ctrl+C. Returns them, most likely first."""
+    ranked = journal.candidates(interrupted_at, frame_s=frame_s)
+    if ranked:
+        print("🎯 Most likely codes, given your reaction time:")
+        for code, p in ranked:
+            print(f"   {code}  {p:6.1%}")
+    return [code for code, _ in ranked]
+
+
+def measure_reaction(trials):
+    print("⏱️  Press Enter as soon as you see GO! (like pressing Ctrl+C on a click)")
+    samples = []
+    for i in range(trials):
+        input(f"   Trial {i + 1}/{trials}: press Enter to get ready...")
+        time.sleep(random.uniform(1.0, 3.0))
+        shown = time.monotonic()
+        input("   GO!")
+        samples.append(round(time.monotonic() - shown, 3))
+    samples.sort()
+    with open(REACTION_FILE, "w") as f:
+        json.dump(samples, f, indent=2)
+    print(f"💾 Saved {len(samples)} reaction times to {REACTION_FILE} "
+          f"(median {samples[len(samples) // 2] * 1000:.0f} ms)")
+
+
+def summarise(path):
+    sweep, records = read_journal(path)
+    if sweep is None:
+        print(f"❌ {path} isn't a sweep journal")
+        return
+    print(f"📒 {path}: sweep {sweep[0]}..{sweep[1]} step {sweep[2]}, {len(records)} codes sent")
+    if records:
+        span = records[-1][0] - records[0][0]
+        print(f"   last code {records[-1][1]}, {len(records) / span if span > 0 else 0:.1f} codes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep journals and reaction-time attribution')
+    parser.add_argument('journal', nargs='?', help="Journal file to summarise")
+    parser.add_argument('--measure', action='store_true', help="Measure your reaction time")
+    parser.add_argument('--trials', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure_reaction(args.trials)
+    elif args.journal:
+        summarise(args.journal)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
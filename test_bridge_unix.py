@@ -0,0 +1,39 @@
+import os
+import socket
+
+import pytest
+
+from bridge_unix import UnixControlServer
+
+
+def no_handler(data, client):
+    raise AssertionError("not expected to be called")
+
+
+def test_second_bridge_leaves_a_live_socket_alone(tmp_path):
+    path = os.path.join(tmp_path, "bridge.sock")
+    first = UnixControlServer(no_handler, path=path).start()
+    try:
+        with pytest.raises(RuntimeError):
+            UnixControlServer(no_handler, path=path).start()
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.connect(path)
+        probe.close()
+    finally:
+        first.stop()
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = os.path.join(tmp_path, "bridge.sock")
+    crashed = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    crashed.bind(path)
+    crashed.close()
+    assert os.path.exists(path)
+    server = UnixControlServer(no_handler, path=path).start()
+    try:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.connect(path)
+        probe.close()
+    finally:
+        server.stop()
+    assert not os.path.exists(path)
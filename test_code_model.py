@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import code_model
+from code_model import TRISTATE_BITS, CodeModel, parse_name
+
+
+def saved_codes():
+    with open(code_model.CODES_FILE, "r") as f:
+        return {name.upper(): entry["code"] for name, entry in json.load(f).items()}
+
+
+def tristate(word):
+    return int("".join(TRISTATE_BITS[s] for s in word), 2)
+
+
+CHANNELS = sorted({parse_name(name)[0] for name in saved_codes()})
+
+
+@pytest.mark.parametrize("channel", CHANNELS)
+def test_left_out_channel_ranks_in_the_candidates(channel):
+    codes = saved_codes()
+    hidden = [f"{channel} ON", f"{channel} OFF"]
+    model = CodeModel({n: c for n, c in codes.items() if n not in hidden})
+    for name in hidden:
+        if name in codes:
+            assert codes[name] in model.candidates(name)
+
+
+@pytest.mark.parametrize("channel", CHANNELS)
+def test_left_out_off_is_its_on_with_the_command_swapped(channel):
+    codes = saved_codes()
+    name = f"{channel} OFF"
+    if name not in codes or f"{channel} ON" not in codes:
+        pytest.skip("no pair for this channel")
+    model = CodeModel({n: c for n, c in codes.items() if n != name})
+    assert model.candidates(name)[0] == codes[name]
+
+
+def test_predicted_first_leaves_the_button_out(tmp_path):
+    codes = saved_codes()
+    path = tmp_path / "remote_codes.json"
+    path.write_text(json.dumps({n: {"code": c} for n, c in codes.items()}))
+    name = sorted(codes)[0]
+    ranked = code_model.predicted_first(name, str(path))
+    assert codes[name] in ranked
+    assert code_model.predicted_first(name, str(tmp_path / "missing.json")) == []
+
+
+def test_trend_into_an_address_1_still_ranks():
+    # Channels 1-3 put their 1 at symbols 6, 5, 4; channel 4's would land on the
+    # address's own 1 at symbol 3, so no candidate there can be one-hot
+    codes = {}
+    for n in (1, 2, 3):
+        channel = ["0", "0", "0"]
+        channel[3 - n] = "1"
+        for command, symbols in (("ON", "10"), ("OFF", "01")):
+            codes[f"{n} {command}"] = tristate("FFF1" + "".join(channel) + "0FF" + symbols)
+    model = CodeModel(codes)
+    assert model.candidates("4 ON")
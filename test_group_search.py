@@ -0,0 +1,46 @@
+import math
+import random
+
+import pytest
+
+from group_search import GroupSearch, SimulatedOutlet
+
+
+def search_for(outlet, **kwargs):
+    return GroupSearch(outlet.send, outlet.ask, log=lambda *_: None, **kwargs)
+
+
+@pytest.mark.parametrize("n", [2, 16, 151, 256, 4001, 10001])
+def test_rounds_within_log2_plus_confirm(n):
+    rng = random.Random(n)
+    candidates = range(4478000, 4478000 + n)
+    bound = math.ceil(math.log2(n)) + 1
+    for code in [candidates[0], candidates[-1]] + rng.sample(candidates, min(n, 50)):
+        search = search_for(SimulatedOutlet(code))
+        assert search.run(candidates) == code
+        assert search.rounds <= bound, (n, code, search.rounds)
+
+
+def test_every_position_of_a_small_range():
+    candidates = range(100, 137)
+    for code in candidates:
+        search = search_for(SimulatedOutlet(code))
+        assert search.run(candidates) == code
+        assert search.rounds <= math.ceil(math.log2(len(candidates))) + 1
+
+
+def test_blocks_find_the_code():
+    candidates = range(4470000, 4472001)
+    search = search_for(SimulatedOutlet(4471234), block=256)
+    assert search.run(candidates) == 4471234
+
+
+def test_absent_code_is_not_invented():
+    search = search_for(SimulatedOutlet(999))
+    assert search.run(range(100, 164), present=False) is None
+
+
+def test_predicted_codes_come_first():
+    search = search_for(SimulatedOutlet(4478259))
+    assert search.run_predicted([4478261, 4478259], range(4470000, 4480000)) == 4478259
+    assert search.rounds <= 3
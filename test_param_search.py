@@ -0,0 +1,66 @@
+import json
+import os
+import time
+
+import param_search
+from param_search import ParamSearch, ResultCache, SimulatedOutlet, open_cache, ranked_combos
+
+CODE = 4478259
+COMBO = (CODE, 1, 150)
+
+
+def quiet(outlet, cache):
+    return ParamSearch(outlet.send, outlet.ask, cache, log=lambda *_: None)
+
+
+def test_one_miss_does_not_hide_the_combination(tmp_path):
+    path = os.path.join(tmp_path, "cache.json")
+    # The first run misses the click
+    first = quiet(SimulatedOutlet(CODE, 9, 150), ResultCache(path))
+    assert first.run([COMBO]) is None
+    assert first.cache.is_dead(COMBO, 2) is False
+
+    found = quiet(SimulatedOutlet(CODE, 1, 150, seed=1), ResultCache(path)).run([COMBO])
+    assert found is not None and found[0] == COMBO
+
+
+def test_two_runs_of_misses_skip_it(tmp_path):
+    path = os.path.join(tmp_path, "cache.json")
+    for _ in range(param_search.DEAD_STRIKES):
+        quiet(SimulatedOutlet(CODE, 9, 150), ResultCache(path)).run([COMBO])
+    search = quiet(SimulatedOutlet(CODE, 1, 150), ResultCache(path))
+    assert search.run([COMBO]) is None and search.rounds == 0
+
+
+def test_misses_count_once_per_run():
+    cache = ResultCache(None)
+    cache.new_run()
+    cache.mark_dead([COMBO], 2)
+    cache.mark_dead([COMBO], 5)
+    assert not cache.is_dead(COMBO, 2)
+    cache.new_run()
+    cache.mark_dead([COMBO], 2)
+    assert cache.is_dead(COMBO, 5) and not cache.is_dead(COMBO, 12)
+
+
+def test_old_misses_expire(tmp_path):
+    path = os.path.join(tmp_path, "cache.json")
+    stale = time.time() - (param_search.DEAD_DAYS + 1) * 86400
+    with open(path, "w") as f:
+        json.dump({str(CODE): {"1,150": [5, 12, stale], "1,155": 12}}, f)
+    assert ResultCache(path).dead == {}
+
+
+def test_forget_and_no_cache(tmp_path):
+    path = os.path.join(tmp_path, "cache.json")
+    for _ in range(param_search.DEAD_STRIKES):
+        quiet(SimulatedOutlet(CODE, 9, 150), ResultCache(path)).run([COMBO])
+    assert open_cache(path=path).is_dead(COMBO, 2)
+    assert not open_cache(no_cache=True, path=path).is_dead(COMBO, 2)
+    assert not open_cache(forget=[CODE], path=path).is_dead(COMBO, 2)
+    assert not ResultCache(path).is_dead(COMBO, 2)
+
+
+def test_likeliest_combinations_come_first():
+    combos = ranked_combos([CODE], [(1, 150)] * 3)
+    assert combos[0][1] == 1 and abs(combos[0][2] - 150) <= 5
@@ -0,0 +1,14 @@
+from pico_link import PicoLink, PicoUnavailable
+
+
+def test_failing_queued_commands_skips_cancelled_ones():
+    link = PicoLink("/dev/does-not-exist")
+    cancelled = link.submit(b"\x00" * 7, label="1 ON", key="1")
+    waiting = link.submit(b"\x01" * 7, label="2 ON", key="2")
+    assert cancelled.cancel()
+
+    link._fail_queued(PicoUnavailable("Pico not connected"))
+
+    assert cancelled.cancelled()
+    assert isinstance(waiting.exception(timeout=0), PicoUnavailable)
+    assert link.pending == 0
@@ -0,0 +1,34 @@
+from pico_sweep import pico_sender, runs
+
+
+class FakeSweeper:
+    def __init__(self):
+        self.calls = []
+
+    def send(self, code, repeats, protocol, pulse):
+        self.calls.append(("send", code, repeats, protocol, pulse))
+
+    def sweep(self, start, end, step, repeats, protocol, pulse):
+        self.calls.append(("sweep", start, end, step, repeats, protocol, pulse))
+
+
+def test_runs_split_a_block_with_holes():
+    block = [c for c in range(100, 120) if c not in (105, 106, 113)]
+    assert runs(block) == [(100, 104, 1), (107, 112, 1), (114, 119, 1)]
+    assert runs([0, 4, 8, 12]) == [(0, 12, 4)]
+    assert runs([7]) == [(7, 7, 1)]
+    assert runs([]) == []
+
+
+def test_runs_keep_the_order_they_were_given():
+    assert runs([5, 6, 7, 3, 2]) == [(5, 7, 1), (3, 3, 1), (2, 2, 1)]
+
+
+def test_sender_issues_one_sweep_per_run():
+    sweeper = FakeSweeper()
+    pico_sender(sweeper, 2, 300)([c for c in range(10, 20) if c != 14] + [30], 5)
+    assert sweeper.calls == [
+        ("sweep", 10, 13, 1, 5, 2, 300),
+        ("sweep", 15, 19, 1, 5, 2, 300),
+        ("send", 30, 5, 2, 300),
+    ]
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import repeat_tuner
+from code_registry import CodeRegistry
+from repeat_tuner import RepeatTuner
+
+DEFAULT = 10
+
+
+@pytest.fixture
+def registry(tmp_path):
+    codes = tmp_path / "remote_codes.json"
+    codes.write_text(json.dumps({"1 ON": {"code": 4478259, "pulselength": 150, "protocol": 1},
+                                 "2 ON": {"code": 4478403, "pulselength": 150, "protocol": 1,
+                                          "repeats": repeat_tuner.MAX_AUTO_REPEATS - 1}}))
+    return CodeRegistry(str(codes))
+
+
+def saved_repeats(registry, name):
+    with open(registry.path, "r") as f:
+        return json.load(f)[name].get("repeats")
+
+
+def test_quick_presses_count_as_retries(registry):
+    tuner = RepeatTuner(registry, DEFAULT)
+    for _ in range(3):
+        assert tuner.press(registry.lookup("1 ON")) is None
+    assert tuner.retry_rates() == {"1 ON": pytest.approx(2 / 3)}
+
+
+def test_presses_far_apart_are_not_retries(registry):
+    tuner = RepeatTuner(registry, DEFAULT, window=0)
+    for _ in range(repeat_tuner.HISTORY):
+        assert tuner.press(registry.lookup("1 ON")) is None
+    assert tuner.retry_rates() == {"1 ON": 0}
+    assert saved_repeats(registry, "1 ON") is None
+
+
+def test_unreliable_button_gets_more_repeats(registry):
+    tuner = RepeatTuner(registry, DEFAULT)
+    raised = [tuner.press(registry.lookup("1 ON")) for _ in range(repeat_tuner.MIN_RETRIES + 1)]
+    assert raised[-1] == DEFAULT + repeat_tuner.REPEAT_STEP
+    assert saved_repeats(registry, "1 ON") == DEFAULT + repeat_tuner.REPEAT_STEP
+    assert registry.lookup("1 ON").repeats == DEFAULT + repeat_tuner.REPEAT_STEP
+    assert tuner.raised == 1
+    # Counting starts afresh at the new setting
+    assert tuner.press(registry.lookup("1 ON")) is None
+
+
+def test_raises_stop_at_the_cap(registry):
+    tuner = RepeatTuner(registry, DEFAULT)
+    raised = [tuner.press(registry.lookup("2 ON")) for _ in range(repeat_tuner.MIN_RETRIES + 1)]
+    assert raised[-1] == repeat_tuner.MAX_AUTO_REPEATS
+    for _ in range(repeat_tuner.MIN_RETRIES + 1):
+        assert tuner.press(registry.lookup("2 ON")) is None
+    assert saved_repeats(registry, "2 ON") == repeat_tuner.MAX_AUTO_REPEATS
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+import rf_bridge_service as service
+from code_registry import CodeRegistry
+
+
+class QueuedLink:
+    """A link whose commands sit in its queue and never get an ack."""
+
+    connected = True
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, payload, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    @property
+    def pending(self):
+        return sum(not f.done() for f in self.futures)
+
+
+@pytest.fixture
+def bridge(tmp_path, monkeypatch):
+    codes = tmp_path / "remote_codes.json"
+    codes.write_text(json.dumps({"1 ON": {"code": 4478259, "pulselength": 150, "protocol": 1},
+                                 "1 OFF": {"code": 4478268, "pulselength": 150, "protocol": 1}}))
+    link = QueuedLink()
+    monkeypatch.setattr(service, "registry", CodeRegistry(str(codes)))
+    monkeypatch.setattr(service.pool, "links", {"main": link})
+    monkeypatch.setattr(service.pool, "default", "main")
+    monkeypatch.setattr(service, "REQUEST_TIMEOUT", 0.01)
+    monkeypatch.setattr(service, "ACK_TIMEOUT", 0.01)
+    return service.app.test_client(), link
+
+
+@pytest.mark.parametrize("verify", [False, True])
+def test_timed_out_press_is_taken_out_of_the_queue(bridge, monkeypatch, verify):
+    client, link = bridge
+    monkeypatch.setattr(service, "VERIFY_TX", verify)
+    reply = client.post("/api/control", json={"button": "1 ON"})
+    assert reply.status_code == 504
+    assert len(link.futures) == 1 and link.futures[0].cancelled()
+
+
+def test_timed_out_batch_is_taken_out_of_the_queue(bridge):
+    client, link = bridge
+    reply = client.post("/api/batch", json={"buttons": ["1 ON", "1 OFF"]})
+    assert reply.status_code == 504
+    assert link.futures and all(f.cancelled() for f in link.futures)
+
+
+def test_unknown_buttons_share_one_label(bridge):
+    client, _ = bridge
+    for name in ("nope", "NOPE 2", "x" * 40):
+        assert client.post("/api/control", json={"button": name}).status_code == 404
+    text = service.metrics.render()
+    assert 'button="unknown",result="not_found"' in text
+    assert "nope" not in text.lower()
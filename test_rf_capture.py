@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+import rf_capture
+import rf_decode
+
+
+def edges_of(periods):
+    """Edge times (first at 0) of periods starting low; edge k starts level k % 2."""
+    return [0] + list(np.cumsum(periods))
+
+
+def test_missed_edge_costs_one_zero_length_period(tmp_path):
+    periods = rf_capture.synth_periods(4478259, 1, 180, repeats=6)
+    edges = edges_of(periods)
+    dropped = len(edges) // 2
+
+    path = os.path.join(tmp_path, "dropped.rfe")
+    writer = rf_capture.CaptureWriter(path, 0)
+    for k, us in enumerate(edges):
+        if k != dropped:
+            writer.edge(int(us), k % 2)
+    writer.close()
+
+    header, stored = rf_capture.read_capture(path)
+    assert len(stored) == len(edges)
+    assert np.count_nonzero(np.diff(np.asarray(stored)) == 0) == 1
+
+
+def test_write_periods_round_trip(tmp_path):
+    periods = rf_capture.synth_periods(4478259, 1, 180, repeats=3)
+    path = os.path.join(tmp_path, "synth.rfe")
+    rf_capture.write_periods(path, periods)
+    loaded, levels = rf_decode.load(path)
+    assert list(loaded) == periods
+    assert list(levels[:4]) == [0, 1, 0, 1]
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+import rf_capture
+import rf_decode
+import rf_waveform
+
+CODE = 4478259
+
+
+def capture(tmp_path, name, periods):
+    path = os.path.join(tmp_path, name)
+    rf_capture.write_periods(path, periods)
+    return path
+
+
+@pytest.mark.parametrize("pulse", [None, 150, 450])
+@pytest.mark.parametrize("protocol", sorted(rf_waveform.PROTOCOLS))
+def test_every_protocol_and_pulse(tmp_path, protocol, pulse):
+    true_pulse = pulse or rf_waveform.PROTOCOLS[protocol][0]
+    path = capture(tmp_path, "burst.rfe", rf_capture.synth_periods(
+        CODE, protocol, pulse, repeats=8, jitter=true_pulse * 0.08, noise=20, seed=protocol * 1000 + true_pulse))
+    rows = rf_decode.decode_file(path)
+    assert rows
+    code, got_protocol, frames, got_pulse, error = rows[0]
+    assert (code, got_protocol) == (CODE, protocol), rows[:3]
+    assert abs(got_pulse - true_pulse) < 0.05 * true_pulse
+
+
+def test_etekcity_is_protocol_1_not_5(tmp_path):
+    # rpi_rf reads protocol 1 at 150us as protocol 5 at ~330us: the sync fits both
+    path = capture(tmp_path, "etekcity.rfe", rf_capture.synth_periods(CODE, 1, 150, repeats=10, jitter=20))
+    assert rf_decode.decode_file(path)[0][:2] == (CODE, 1)
+
+
+def test_replay_through_the_pico_decoder(tmp_path):
+    path = capture(tmp_path, "etekcity.rfe", rf_capture.synth_periods(CODE, 1, 150, repeats=10, jitter=20))
+    periods, levels = rf_decode.load(path)
+    assert set(rf_decode.replay_decoder(periods, levels)) == {CODE}
+    table = rf_decode.replay_periods(periods, levels)
+    start = periods.tolist().index(table[0])
+    assert list(table[:48]) == list(periods[start:start + 48])
+
+
+def test_diff_shows_a_shifted_pulse(tmp_path):
+    before = capture(tmp_path, "fast.rfe", rf_capture.synth_periods(CODE, 1, 150, repeats=10, jitter=20))
+    after = capture(tmp_path, "slow.rfe", rf_capture.synth_periods(CODE, 1, 190, repeats=10, jitter=20))
+    _, b = rf_decode.diff(before, after)
+    assert abs(b[(CODE, 1)][1] - 190) < 10
+
+
+def test_long_capture(tmp_path):
+    periods = [rf_capture.IDLE_US]
+    for i in range(200):
+        periods += rf_capture.synth_periods(CODE + i, 1, 150, repeats=10, jitter=15)[1:]
+    decoded = rf_decode.decode(*rf_decode.load(capture(tmp_path, "long.rfe", periods)))
+    assert (decoded["error"] < rf_decode.MAX_ERROR).sum() >= 1990
+    assert len(np.unique(decoded["code"][decoded["error"] < rf_decode.MAX_ERROR])) == 200
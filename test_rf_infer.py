@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import rf_capture
+import rf_decode
+import rf_infer
+import rf_waveform
+
+CODE = 4478259
+
+
+def capture(tmp_path, periods):
+    path = os.path.join(tmp_path, "burst.rfe")
+    rf_capture.write_periods(path, periods)
+    return rf_decode.load(path)
+
+
+def pico_lines(dump, width=64):
+    return ["RAW:" + ",".join(str(us) for us in dump[i:i + width]) for i in range(0, len(dump), width)]
+
+
+@pytest.mark.parametrize("protocol", sorted(rf_waveform.PROTOCOLS))
+def test_infers_protocol_and_pulse(tmp_path, protocol):
+    rng = np.random.default_rng(protocol)
+    for _ in range(3):
+        pulse = int(rng.integers(120, 500))
+        result = rf_infer.infer(*capture(tmp_path, rf_capture.synth_periods(
+            CODE, protocol, pulse, repeats=6, jitter=pulse * 0.07, noise=10, seed=int(rng.integers(1 << 30)))))
+        assert result["code"] == CODE and result["protocol"] == protocol, (pulse, result)
+        assert abs(result["pulse"] - pulse) < 0.05 * pulse, (pulse, result)
+        assert result["confidence"] >= rf_infer.MIN_CONFIDENCE, (pulse, result)
+
+
+def test_histogram_base_pulse_and_sync_ratio(tmp_path):
+    result = rf_infer.infer(*capture(tmp_path, rf_capture.synth_periods(CODE, 1, 180, repeats=8, jitter=8)))
+    assert abs(result["base_pulse"] - 180) < 10
+    assert abs(result["sync_ratio"] - 31) < 2
+
+
+def test_one_frame_is_not_confident(tmp_path):
+    result = rf_infer.infer(*capture(tmp_path, rf_capture.synth_periods(CODE, 1, 150, repeats=2, jitter=25)))
+    assert result["confidence"] < rf_infer.MIN_CONFIDENCE
+
+
+def test_nothing_decoded(tmp_path):
+    assert rf_infer.infer(*capture(tmp_path, rf_capture.synth_periods(CODE, 1, 150, repeats=0, noise=20))) is None
+
+
+def test_pico_raw_lines():
+    frame = rf_waveform.frame_timings(CODE, 150)
+    dump = [frame[-1]] + frame * 3 + frame[:-1]
+    dumps = [rf_infer.parse_raw(pico_lines(dump)), rf_infer.parse_raw(pico_lines(dump))]
+    assert dumps[0] == dump
+    periods, levels = rf_infer.periods_from_dumps(dumps)
+    assert (np.diff(levels) != 0).all()
+    result = rf_infer.infer(periods, levels, code=CODE)
+    assert (result["code"], result["protocol"], result["pulse"]) == (CODE, 1, 150)
+
+
+def test_update_registry_writes_confident_results_only(tmp_path):
+    frame = rf_waveform.frame_timings(CODE, 150)
+    confident = rf_infer.infer(*rf_infer.periods_from_dumps([[frame[-1]] + frame * 4]))
+    unsure = dict(confident, confidence=rf_infer.MIN_CONFIDENCE / 2)
+    codes = os.path.join(tmp_path, "codes.json")
+    with open(codes, "w") as f:
+        json.dump({"1 ON": {"code": 1, "alias": "lamp"}}, f)
+
+    assert rf_infer.update_registry(codes, "1 ON", confident)
+    assert rf_infer.update_registry(codes, "6 ON", confident)
+    assert not rf_infer.update_registry(codes, "2 ON", unsure)
+    with open(codes) as f:
+        data = json.load(f)
+    assert data["1 ON"] == {"code": CODE, "alias": "lamp", "protocol": 1, "pulselength": 150}
+    assert data["6 ON"]["pulselength"] == 150
+    assert "2 ON" not in data
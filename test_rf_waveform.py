@@ -0,0 +1,71 @@
+import pytest
+
+import rf_waveform
+from rf_waveform import PROTOCOLS, PulseDecoder
+
+CODE = 4478259
+PULSE = 150
+
+
+def received(decoder, timings, gap):
+    """Feed frames the way the receiver sees them: a quiet low first, then the table."""
+    periods = [gap] + list(timings)
+    codes = [decoder.feed(n % 2, us) for n, us in enumerate(periods)]
+    return [c for c in codes if c is not None]
+
+
+def test_table_decodes_back_to_the_code():
+    frame = rf_waveform.frame_timings(CODE, PULSE)
+    decoded = 0
+    for i in range(0, rf_waveform.BITS * 2, 2):
+        decoded = (decoded << 1) | (frame[i] > frame[i + 1])
+    assert decoded == CODE
+    assert frame[-1] == rf_waveform.SYNC[1] * PULSE
+    assert rf_waveform.frame_timings(1, protocol=2)[-2:] == [650, 6500]
+
+
+def test_pio_words_play_the_same_durations():
+    frame = rf_waveform.frame_timings(CODE, PULSE)
+    assert [w + rf_waveform.PIO_OVERHEAD for w in rf_waveform.pio_words(frame)] == frame
+
+
+def test_compiled_frames_are_cached():
+    frame = rf_waveform.frame_timings(CODE, PULSE)
+    assert rf_waveform.compile_frame(CODE, 1, PULSE) is rf_waveform.compile_frame(CODE, 1, PULSE)
+    assert list(rf_waveform.compile_burst(CODE, 1, PULSE, repeats=3)) == frame * 3
+
+
+def test_schedule_interleaves_in_chunks():
+    assert rf_waveform.schedule(2, repeats=5, chunk=2) == [0, 0, 1, 1, 0, 0, 1, 1, 0, 1]
+
+
+@pytest.mark.parametrize("protocol", sorted(PROTOCOLS))
+@pytest.mark.parametrize("scale", [1.0, 0.6, 1.5])
+def test_every_protocol_round_trips(protocol, scale):
+    pulse = int(PROTOCOLS[protocol][0] * scale)
+    frame = rf_waveform.frame_timings(CODE, pulse, protocol=protocol)
+    decoder = PulseDecoder(protocol=protocol, pulse=pulse)
+    assert received(decoder, frame * 3, gap=20000) == [CODE] * 3
+
+
+@pytest.mark.parametrize("protocol", sorted(PROTOCOLS))
+def test_round_trip_survives_jitter(protocol):
+    pulse = PROTOCOLS[protocol][0]
+    frame = rf_waveform.frame_timings(CODE, pulse, protocol=protocol)
+    # Receivers stretch highs and shorten lows by a fair share of a pulse
+    jittered = [us + pulse // 4 if n % 2 == 0 else us - pulse // 4 for n, us in enumerate(frame)]
+    decoder = PulseDecoder(protocol=protocol, pulse=pulse)
+    assert received(decoder, jittered * 2, gap=20000) == [CODE] * 2
+
+
+def test_protocol_6_ones_and_zeros_differ():
+    # A 1 is (1, 1): the catch-all high > low test reads it as a 0
+    frame = rf_waveform.frame_timings(CODE, protocol=6)
+    assert received(PulseDecoder(), frame * 2, gap=20000) != [CODE] * 2
+    assert received(PulseDecoder(protocol=6), frame * 2, gap=20000) == [CODE] * 2
+
+
+def test_default_decoder_reads_protocol_1_at_any_pulse():
+    for pulse in (150, 189, 350):
+        frame = rf_waveform.frame_timings(CODE, pulse)
+        assert received(PulseDecoder(), frame * 2, gap=pulse * 31) == [CODE] * 2
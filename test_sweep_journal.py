@@ -0,0 +1,54 @@
+import random
+
+from sweep_journal import HEADER, RECORD, SweepJournal, read_journal
+
+
+def test_attribution_finds_the_code_on_simulated_sweeps(tmp_path, trials=200, seed=1):
+    rng = random.Random(seed)
+    samples = [rng.gauss(0.35, 0.07) for _ in range(20)]
+    hits = 0
+    path = str(tmp_path / "sweep.rfj")
+    for _ in range(trials):
+        journal = SweepJournal(path, 0, 1000)
+        # A GPIO-style sweep: ~60 ms per code with some jitter
+        t, target = 100.0, rng.randrange(100, 900)
+        for code in range(0, target + 40):
+            journal.record(code, 1, 150, when=t)
+            if code == target:
+                clicked = t + 0.04
+            t += rng.uniform(0.055, 0.065)
+        ranked = [c for c, _ in journal.candidates(clicked + rng.gauss(0.35, 0.07), samples, 0.02)]
+        journal.close()
+        hits += target in ranked
+    # A fixed backtrack gives one guess, and misses more often than not
+    assert hits / trials > 0.85
+
+
+def test_resume_carries_on_from_the_last_code(tmp_path):
+    path = str(tmp_path / "sweep.rfj")
+    journal = SweepJournal(path, 10, 20)
+    for code in range(10, 14):
+        journal.record(code, 1, 150, when=float(code))
+    journal.close()
+
+    resumed = SweepJournal(path, 10, 20, resume=True)
+    assert resumed.resume_point() == 13
+    resumed.record(13, 1, 150, when=50.0)
+    resumed.close()
+    sweep, records = read_journal(path)
+    assert sweep == (10, 20, 1)
+    assert [r[1] for r in records] == [10, 11, 12, 13, 13]
+
+    # Another range, or no --resume, starts over
+    assert SweepJournal(path, 10, 30, resume=True).resume_point() == 10
+    assert SweepJournal(path, 10, 20).resume_point() == 10
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    path = tmp_path / "sweep.rfj"
+    journal = SweepJournal(str(path), 0, 5)
+    journal.record(0, 1, 150, when=1.0)
+    journal.record(1, 1, 150, when=2.0)
+    journal.close()
+    path.write_bytes(path.read_bytes()[:HEADER.size + RECORD.size + 3])
+    assert [r[1] for r in read_journal(str(path))[1]] == [0]
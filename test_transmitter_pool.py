@@ -0,0 +1,48 @@
+from concurrent.futures import Future
+
+from bridge_metrics import MetricsRegistry
+from pico_link import PicoUnavailable
+from transmitter_pool import TransmitterPool
+
+
+class FakeLink:
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.futures = []
+
+    def submit(self, payload, **kwargs):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.futures.append(future)
+        return future
+
+
+def pool_of(**links):
+    pool = TransmitterPool({name: {"port": f"/dev/{name}"} for name in links})
+    pool.links = links
+    return pool
+
+
+def test_failovers_are_counted_per_transmitter():
+    metrics = MetricsRegistry()
+    failovers = metrics.counter("rf_bridge_failovers_total", "Failovers", ["transmitter"])
+    pool = pool_of(main=FakeLink(), spare=FakeLink())
+    pool.on_failover = lambda name: failovers.inc(transmitter=name)
+
+    outer = pool.submit(b"", label="1 ON")
+    pool.links["main"].futures[0].set_exception(PicoUnavailable("gone"))
+    pool.links["spare"].futures[0].set_result({"outcome": "sent"})
+
+    assert outer.result(timeout=0) == {"outcome": "sent", "transmitter": "spare"}
+    assert pool.failovers == 1
+    text = metrics.render()
+    assert "# TYPE rf_bridge_failovers_total counter" in text
+    assert 'rf_bridge_failovers_total{transmitter="main"} 1' in text
+
+
+def test_cancelled_request_is_left_alone():
+    pool = pool_of(main=FakeLink())
+    outer = pool.submit(b"", label="1 ON")
+    assert outer.cancel()
+    pool.links["main"].futures[0].set_exception(PicoUnavailable("gone"))
+    assert outer.cancelled()
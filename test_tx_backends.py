@@ -0,0 +1,30 @@
+import group_search
+import param_search
+import rf_waveform
+from tx_backends import RFTransmitter
+
+
+def sim_transmitter():
+    return RFTransmitter(backend="sim", realtime=False)
+
+
+def test_rftransmitter_plays_through_the_backend():
+    device = sim_transmitter()
+    device.enable_tx()
+    device.tx_repeat = 7
+    device.tx_code(4478259, 6, 210)
+    device.tx_code(4478225)
+    device.cleanup()
+    assert device.backend.sent == [(4478259, 6, 210, 7), (4478225, 1, None, 7)]
+
+
+def test_search_senders_use_the_compiled_path():
+    device = sim_transmitter()
+    group_search.rfdevice_sender(device, 2, 300)([10, 11], 5)
+    param_search.rfdevice_sender(device)([(12, 4, 380)], 3)
+    assert device.backend.sent == [(10, 2, 300, 5), (11, 2, 300, 5), (12, 4, 380, 3)]
+
+
+def test_send_reports_the_burst_airtime():
+    result = sim_transmitter().backend.send(4478259, 1, 150, repeats=4)
+    assert result["airtime_us"] == rf_waveform.airtime_us(rf_waveform.compile_burst(4478259, 1, 150, repeats=4))
@@ -0,0 +1,108 @@
+"""
+A pool of Pico transmitters, each driven by its own PicoLink I/O thread.
+
+Buttons can name the transmitter closest to their outlet ("transmitter" in
+remote_codes.json). Commands go to that Pico when it is connected and fail
+over to the next connected one when it is not, including commands that were
+queued or in flight when it disappeared.
+
+Picos in the same "airspace" would garble each other's signals, so they
+share an airtime lock and take turns. Picos in different airspaces
+transmit in parallel.
+"""
+import collections
+import threading
+from concurrent.futures import Future
+
+from pico_link import PicoLink, PicoUnavailable
+
+
+class TransmitterPool:
+
+    def __init__(self, transmitters, **link_options):
+        """transmitters: {name: {"port": ..., "airspace": ...}}, first one is the default."""
+        if not transmitters:
+            raise ValueError("At least one transmitter is required")
+
+        sharing = collections.Counter(cfg.get("airspace") for cfg in transmitters.values())
+        locks = {}
+        self.links = {}
+        for name, cfg in transmitters.items():
+            airspace = cfg.get("airspace")
+            lock = None
+            if airspace is not None and sharing[airspace] > 1:
+                lock = locks.setdefault(airspace, threading.Lock())
+            self.links[name] = PicoLink(cfg["port"], name=name, airtime=lock, **link_options)
+
+        self.default = next(iter(self.links))
+        self.failovers = 0
+        # Called with the unavailable transmitter's name on each failover (e.g. a metrics counter)
+        self.on_failover = None
+
+    def start(self):
+        for link in self.links.values():
+            link.start()
+        return self
+
+    def stop(self):
+        for link in self.links.values():
+            link.stop()
+
+    @property
+    def connected(self):
+        return any(link.connected for link in self.links.values())
+
+    @property
+    def pending(self):
+        return sum(link.pending for link in self.links.values())
+
+    @property
+    def coalesced(self):
+        return sum(link.coalesced for link in self.links.values())
+
+    @property
+    def skipped(self):
+        return sum(link.skipped for link in self.links.values())
+
+    def status(self):
+        return {
+            name: {"port": link.port, "connected": link.connected, "pending": link.pending}
+            for name, link in self.links.items()
+        }
+
+    def route(self, hint=None):
+        """Transmitter names to try, in order: the hinted (or default) one, then the rest."""
+        preferred = hint if hint in self.links else self.default
+        order = [preferred] + [name for name in self.links if name != preferred]
+        # Connected transmitters first; keep the rest as a last resort (stable sort)
+        return sorted(order, key=lambda name: not self.links[name].connected)
+
+    def submit(self, payload, transmitter=None, **kwargs):
+        """Like PicoLink.submit, plus routing and failover. The result names the transmitter used."""
+        outer = Future()
+        self._attempt(outer, self.route(transmitter), payload, kwargs)
+        return outer
+
+    def _attempt(self, outer, order, payload, kwargs):
+        name = order[0]
+        fallbacks = [n for n in order[1:] if self.links[n].connected]
+
+        def done(inner):
+            if outer.cancelled():
+                return
+            exc = inner.exception()
+            if isinstance(exc, PicoUnavailable) and fallbacks:
+                self.failovers += 1
+                if self.on_failover is not None:
+                    self.on_failover(name)
+                print(f"🔁 {name} unavailable, failing over [{kwargs.get('label')}] to {fallbacks[0]}")
+                self._attempt(outer, fallbacks, payload, kwargs)
+            elif exc is not None:
+                outer.set_exception(exc)
+            else:
+                outer.set_result(dict(inner.result(), transmitter=name))
+
+        inner = self.links[name].submit(payload, **kwargs)
+        inner.add_done_callback(done)
+        # A caller that gives up takes the command out of the link's queue too
+        outer.add_done_callback(lambda f: f.cancelled() and inner.cancel())
@@ -0,0 +1,190 @@
+"""
+Transmit backends that all play rf_waveform timing tables.
+
+    sim    no hardware. Plays the table against the clock and records what it
+           sent, for tests and benchmarks.
+    gpio   the Pi's own transmitter through RPi.GPIO (what rpi_rf drives),
+           timed by busy-waiting on the CPU.
+    lgpio  the Pi's own transmitter through lgpio's wave thread.
+    pico   the Pico bridge over serial. The Pico compiles the same table itself
+           from its copy of rf_waveform.py, so only (code, protocol, pulse,
+           repeats) crosses the wire.
+
+    backend = open_backend("sim")
+    result = backend.send(4478259, protocol=1, pulse=150, repeats=10)
+
+The Pi-side scripts written against rpi_rf (mimic_remote.py, the search and
+sweep tools) send through RFTransmitter, which has RFDevice's transmit
+methods but plays the compiled table on the gpio or lgpio backend.
+
+send() returns {"frames", "airtime_us", "elapsed", "edge_error_us"}.
+edge_error_us lists how late each edge was against the table, when the
+backend can tell (sim and gpio); otherwise it is None.
+"""
+import time
+
+import rf_waveform
+
+DEFAULT_GPIO = 17
+DEFAULT_REPEATS = 10
+
+
+def play(timings, set_level):
+    """Play a table by busy-waiting. Returns how late each edge was, in microseconds."""
+    errors = []
+    level = 1
+    start = time.perf_counter_ns()
+    due = 0
+    for us in timings:
+        now = time.perf_counter_ns() - start
+        while now < due:
+            now = time.perf_counter_ns() - start
+        set_level(level)
+        errors.append((now - due) / 1000)
+        due += us * 1000
+        level ^= 1
+    while time.perf_counter_ns() - start < due:
+        pass
+    set_level(0)
+    return errors
+
+
+class Backend:
+    name = None
+    measures_edges = False
+
+    def send(self, code, protocol=1, pulse=None, repeats=DEFAULT_REPEATS, bits=rf_waveform.BITS):
+        burst = rf_waveform.compile_burst(code, protocol, pulse, bits, repeats)
+        started = time.monotonic()
+        errors = self.transmit(burst, code, protocol, pulse, repeats)
+        return {
+            "frames": repeats,
+            "airtime_us": rf_waveform.airtime_us(burst),
+            "elapsed": time.monotonic() - started,
+            "edge_error_us": errors,
+        }
+
+    def transmit(self, burst, code, protocol, pulse, repeats):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SimulatedBackend(Backend):
+    """No radio. With realtime=False it returns at once, for fast tests."""
+    name = "sim"
+    measures_edges = True
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self.level = 0
+        self.sent = []
+
+    def _set(self, level):
+        self.level = level
+
+    def transmit(self, burst, code, protocol, pulse, repeats):
+        self.sent.append((code, protocol, pulse, repeats))
+        if not self.realtime:
+            return None
+        return play(burst, self._set)
+
+
+class GpioBackend(Backend):
+    name = "gpio"
+    measures_edges = True
+
+    def __init__(self, gpio=DEFAULT_GPIO):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.gpio = gpio
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(gpio, GPIO.OUT, initial=GPIO.LOW)
+
+    def _set(self, level):
+        self.GPIO.output(self.gpio, level)
+
+    def transmit(self, burst, code, protocol, pulse, repeats):
+        return play(burst, self._set)
+
+    def close(self):
+        self.GPIO.cleanup(self.gpio)
+
+
+class LgpioBackend(Backend):
+    name = "lgpio"
+
+    def __init__(self, gpio=DEFAULT_GPIO, chip=0):
+        import lgpio
+        self.lgpio = lgpio
+        self.gpio = gpio
+        self.handle = lgpio.gpiochip_open(chip)
+        lgpio.gpio_claim_output(self.handle, gpio, 0)
+
+    def transmit(self, burst, code, protocol, pulse, repeats):
+        lg = self.lgpio
+        pulses = [lg.pulse(1 if i % 2 == 0 else 0, 1, us) for i, us in enumerate(burst)]
+        pulses.append(lg.pulse(0, 1, 0))
+        lg.tx_wave(self.handle, self.gpio, pulses)
+        while lg.tx_busy(self.handle, self.gpio, lg.TX_WAVE):
+            time.sleep(0.001)
+        return None
+
+    def close(self):
+        self.lgpio.gpio_free(self.handle, self.gpio)
+        self.lgpio.gpiochip_close(self.handle)
+
+
+class PicoBackend(Backend):
+    name = "pico"
+
+    def __init__(self, port="/dev/ttyACM0", connect_timeout=10):
+        from pico_link import PicoLink
+        self.link = PicoLink(port, max_in_flight=1).start()
+        deadline = time.monotonic() + connect_timeout
+        while not self.link.connected:
+            if time.monotonic() > deadline:
+                self.link.stop()
+                raise RuntimeError(f"Could not connect to the Pico on {port}")
+            time.sleep(0.1)
+
+    def transmit(self, burst, code, protocol, pulse, repeats):
+        from pico_protocol import pack_tx
+        payload = pack_tx(code, protocol, pulse or rf_waveform.PROTOCOLS[protocol][0], repeats)
+        self.link.submit(payload, label=f"{code}").result(timeout=30)
+        return None
+
+    def close(self):
+        self.link.stop()
+
+
+BACKENDS = {cls.name: cls for cls in (SimulatedBackend, GpioBackend, LgpioBackend, PicoBackend)}
+# Backends that drive the Pi's own transmitter pin
+PIN_BACKENDS = ("gpio", "lgpio")
+
+
+def open_backend(name, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+class RFTransmitter:
+    """The transmit side of rpi_rf.RFDevice (tx_repeat, tx_code, cleanup) on a backend."""
+
+    def __init__(self, gpio=DEFAULT_GPIO, backend="gpio", **options):
+        if backend in PIN_BACKENDS:
+            options["gpio"] = gpio
+        self.backend = open_backend(backend, **options)
+        self.tx_repeat = DEFAULT_REPEATS
+
+    def enable_tx(self):
+        return True
+
+    def tx_code(self, code, tx_proto=1, tx_pulselength=None, tx_length=rf_waveform.BITS):
+        self.backend.send(code, tx_proto or 1, tx_pulselength, self.tx_repeat, tx_length)
+        return True
+
+    def cleanup(self):
+        self.backend.close()
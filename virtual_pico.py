@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+A software Pico for running the RF bridge without hardware.
+
+Speaks the same serial protocol as pico_bridge.py (text lines and binary
+frames) on a pseudo-terminal. Each burst takes as long as the real radio
+would take to send it. Faults can be injected to see how the bridge copes:
+
+    python virtual_pico.py --link /tmp/virtual_pico --drop 0.05 --slow 0.1:2 --disconnect-every 50
+
+Then point the bridge (or mimic_pico.py -p) at the link:
+
+    RF_BRIDGE_TRANSMITTERS='{"main": {"port": "/tmp/virtual_pico"}}' python rf_bridge_service.py
+
+Codes sent while RX is on are "heard" back, like the real Pico hearing
+its own transmitter.
+"""
+import argparse
+import os
+import pty
+import random
+import select
+import struct
+import time
+import tty
+
+import pico_protocol as proto
+import rf_waveform
+
+DEFAULT_LINK = "/tmp/virtual_pico"
+DEFAULT_REPEATS = proto.DEFAULT_REPEATS
+BATCH_CHUNK = 2
+VERIFY_COPIES = 2
+SNIFF_SECONDS = 5
+
+
+class Disconnect(Exception):
+    pass
+
+
+class VirtualPico:
+
+    def __init__(self, link, speed=1.0, drop=0.0, slow=0.0, slow_delay=1.0, corrupt=0.0,
+                 unheard=0.0, disconnect_every=0, reconnect_delay=1.0, seed=None):
+        self.link = link
+        self.speed = speed
+        self.drop = drop
+        self.slow = slow
+        self.slow_delay = slow_delay
+        self.corrupt = corrupt
+        self.unheard = unheard
+        self.disconnect_every = disconnect_every
+        self.reconnect_delay = reconnect_delay
+        self.random = random.Random(seed)
+        self.commands = 0
+        self.stats = {"sent": 0, "dropped": 0, "slow": 0, "corrupted": 0, "disconnects": 0}
+        self.rx_active = False
+        self.rx_findings = {}
+        self._master = None
+        self._slave = None
+
+    # --- pty plumbing ---
+
+    def _open_pty(self):
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        tty.setraw(self._master)
+        # Repoint the stable link at the new pty, so clients reconnect to the same path
+        tmp = self.link + ".tmp"
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        os.symlink(os.ttyname(self._slave), tmp)
+        os.replace(tmp, self.link)
+        print(f"🔌 Virtual Pico on {self.link} -> {os.ttyname(self._slave)}")
+
+    def _close_pty(self):
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def write(self, data):
+        os.write(self._master, data)
+
+    def say(self, text):
+        self.write(text.encode() + b"\r\n")
+
+    def reply(self, kind, seq, payload=b""):
+        frame = bytearray(proto.encode_frame(kind, seq, payload))
+        if self.random.random() < self.corrupt:
+            self.stats["corrupted"] += 1
+            frame[-1] ^= 0xFF
+        self.write(bytes(frame))
+
+    def run(self):
+        try:
+            while True:
+                self._open_pty()
+                self.binary = False
+                decoder = proto.FrameDecoder()
+                self.say("PICO RF READY")
+                try:
+                    while True:
+                        ready, _, _ = select.select([self._master], [], [], 1.0)
+                        if not ready:
+                            continue
+                        for item in decoder.feed(os.read(self._master, 4096)):
+                            if isinstance(item, str):
+                                self.handle_line(item)
+                            else:
+                                self.handle_frame(item)
+                except Disconnect:
+                    self.stats["disconnects"] += 1
+                    print(f"💥 Simulated disconnect after {self.commands} commands")
+                    self._close_pty()
+                    time.sleep(self.reconnect_delay)
+                except OSError as e:
+                    print(f"pty error ({e}), reopening")
+                    self._close_pty()
+        finally:
+            self._close_pty()
+            if os.path.lexists(self.link):
+                os.unlink(self.link)
+
+    # --- the "radio" ---
+
+    def transmit(self, items, repeats, chunk=1, stop_after=None):
+        """Take as long as the real burst would. Returns frames sent."""
+        frames = [rf_waveform.compile_frame(code, protocol, pulse) for code, protocol, pulse in items]
+        sent = 0
+        airtime = 0
+        for i in rf_waveform.schedule(len(frames), repeats, chunk):
+            airtime += rf_waveform.airtime_us(frames[i])
+            sent += 1
+            if stop_after is not None and sent >= stop_after:
+                break
+        time.sleep(airtime / 1e6 / self.speed)
+        if self.rx_active:
+            for code, _, _ in items:
+                self.rx_findings[code] = self.rx_findings.get(code, 0) + max(1, sent // len(items) - 1)
+        self.stats["sent"] += 1
+        return sent
+
+    def sweep(self, start, end, step, repeats, protocol=1, pulse=150):
+        """Like the Pico's SWEEP: one code after another until done or ABORT."""
+        if not step or repeats < 1:
+            raise ValueError("bad sweep")
+        code, sent, pending = start, 0, b""
+        while (code <= end) if step > 0 else (code >= end):
+            self.say(f"@{code}")
+            frame = rf_waveform.compile_frame(code, protocol, pulse)
+            time.sleep(rf_waveform.airtime_us(frame) * repeats / 1e6 / self.speed)
+            if self.rx_active:
+                self.rx_findings[code] = self.rx_findings.get(code, 0) + max(1, repeats - 1)
+            while select.select([self._master], [], [], 0)[0]:
+                pending += os.read(self._master, 4096)
+            if b"ABORT" in pending:
+                return sent, code, True
+            sent += 1
+            code += step
+        self.stats["sent"] += 1
+        return sent, code - step, False
+
+    def fault(self):
+        """Count a command and roll the dice. Returns False if it should vanish."""
+        self.commands += 1
+        if self.disconnect_every and self.commands % self.disconnect_every == 0:
+            raise Disconnect()
+        if self.random.random() < self.drop:
+            self.stats["dropped"] += 1
+            return False
+        if self.random.random() < self.slow:
+            self.stats["slow"] += 1
+            time.sleep(self.slow_delay)
+        return True
+
+    def rx_status(self):
+        top = sorted(self.rx_findings.items(), key=lambda item: -item[1])[:20]
+        edges = sum(seen for _, seen in top) * 50
+        out = proto.RX_HEADER.pack(self.rx_active, edges, 0, len(top))
+        return out + b"".join(proto.RX_CODE.pack(code, min(seen, 0xFFFF)) for code, seen in top)
+
+    # --- binary protocol ---
+
+    def handle_frame(self, frame):
+        received = time.monotonic()
+        if not self.fault():
+            return
+        kind, seq, payload = frame.kind, frame.seq, frame.payload
+        try:
+            self.run_command(kind, seq, payload, received)
+        except KeyError:
+            # Unknown protocol number, like the Pico's "unknown protocol" failure
+            self.reply(proto.REPLY_ERROR, seq, bytes([proto.ERR_FAILED]) + b"unknown protocol")
+
+    def run_command(self, kind, seq, payload, received):
+        size = proto.TX_ITEM.size
+
+        def first_edge():
+            return proto.TX_ACK.pack(int((time.monotonic() - received) * 1e6))
+
+        if kind == proto.CMD_PING:
+            self.reply(proto.REPLY_ACK, seq)
+        elif kind == proto.CMD_RX:
+            if len(payload) != 1 or payload[0] not in (proto.RX_STOP, proto.RX_START, proto.RX_STATUS):
+                self.reply(proto.REPLY_ERROR, seq, bytes([proto.ERR_BAD_PAYLOAD]))
+                return
+            if payload[0] == proto.RX_START:
+                self.rx_active, self.rx_findings = True, {}
+            elif payload[0] == proto.RX_STOP:
+                self.rx_active = False
+            self.reply(proto.REPLY_ACK, seq, self.rx_status())
+        elif kind == proto.CMD_TX_VERIFY and len(payload) == size + 2 and payload[-2] and payload[-1]:
+            item = proto.TX_ITEM.unpack_from(payload)
+            repeats, copies = payload[-2], payload[-1]
+            heard = self.random.random() >= self.unheard
+            edge = first_edge()
+            # Copies decode from the second frame on (the first has no sync gap before it)
+            sent = self.transmit([item], repeats, stop_after=copies + 1 if heard else None)
+            hits = min(copies, sent - 1) if heard else 0
+            self.reply(proto.REPLY_ACK, seq, edge + struct.pack("<BBB", hits >= copies, hits, sent))
+        elif kind in (proto.CMD_TX, proto.CMD_BATCH):
+            repeats = None
+            if kind == proto.CMD_TX and len(payload) == size + 1:
+                repeats, payload = payload[-1], payload[:-1]
+            elif kind == proto.CMD_BATCH and len(payload) % size == 1:
+                repeats, payload = payload[0], payload[1:]
+            if (not payload or len(payload) % size or repeats == 0
+                    or (kind == proto.CMD_TX and len(payload) != size)):
+                self.reply(proto.REPLY_ERROR, seq, bytes([proto.ERR_BAD_PAYLOAD]))
+                return
+            items = [proto.TX_ITEM.unpack_from(payload, i) for i in range(0, len(payload), size)]
+            edge = first_edge()
+            self.transmit(items, repeats or DEFAULT_REPEATS, 1 if kind == proto.CMD_TX else BATCH_CHUNK)
+            self.reply(proto.REPLY_ACK, seq, edge)
+        else:
+            self.reply(proto.REPLY_ERROR, seq, bytes([proto.ERR_UNKNOWN_COMMAND]))
+
+    # --- text protocol ---
+
+    def handle_line(self, line):
+        if line == "BINARY":
+            self.binary = True
+            self.say(proto.HANDSHAKE_REPLY)
+        elif line == "REPL":
+            self.binary = False
+            self.say("REPL OK")
+        elif line == "SNIFF":
+            self.say("READY_TO_SNIFF")
+            time.sleep(SNIFF_SECONDS / self.speed)
+            self.say("TIMEOUT")
+        elif line == "RX START":
+            self.rx_active, self.rx_findings = True, {}
+            self.say("RX ON")
+        elif line == "RX STOP":
+            self.rx_active = False
+            self.say("RX OFF")
+        elif line == "RX STATUS":
+            codes = ",".join(f"{code}x{seen}" for code, seen in self.rx_findings.items())
+            self.say(f"RX {'ON' if self.rx_active else 'OFF'} edges=0 overruns=0 codes={codes}")
+        elif line.startswith("SWEEP "):
+            try:
+                values = [int(v) for v in line[6:].split(',')]
+                self.say(f"SWEEP: {values[0]}..{values[1]}")
+                sent, last, aborted = self.sweep(*values)
+                self.say(f"SWEEP {'ABORTED' if aborted else 'DONE'} {sent} {last}")
+                self.say("Done.")
+            except (ValueError, TypeError, KeyError) as e:
+                self.say(f"ERR: bad sweep ({e})")
+        elif line == "ABORT":
+            self.say("Done.")
+        elif line.startswith("VERIFY ") or line.startswith("BATCH ") or "," in line:
+            if not self.fault():
+                return
+            try:
+                if line.startswith("VERIFY "):
+                    values = [int(v) for v in line[7:].split(',')]
+                    self.say(f"TX VERIFY: {values[0]}")
+                    copies = values[4] if len(values) > 4 else VERIFY_COPIES
+                    sent = self.transmit([values[:3]], values[3] if len(values) > 3 else DEFAULT_REPEATS,
+                                         stop_after=copies + 1)
+                    self.say(f"CONFIRMED {copies} copies in {sent} frames")
+                elif line.startswith("BATCH "):
+                    items = [[int(v) for v in part.split(',')][:3] for part in line[6:].split(';')]
+                    self.say(f"TX BATCH: {len(items)}")
+                    self.transmit(items, DEFAULT_REPEATS, BATCH_CHUNK)
+                else:
+                    values = [int(v) for v in line.split(',')]
+                    self.say(f"TX: {values[0]}")
+                    self.transmit([values[:3]], values[3] if len(values) > 3 else DEFAULT_REPEATS)
+                self.say("Done.")
+            except (ValueError, IndexError, KeyError) as e:
+                self.say(f"ERR: bad command ({e})")
+        elif line:
+            self.say(f"ERR: unknown command '{line}'")
+
+
+def parse_slow(text):
+    """'0.1:2' -> (0.1, 2.0)"""
+    rate, _, delay = text.partition(":")
+    return float(rate), float(delay or 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Software Pico RF bridge on a pseudo-terminal')
+    parser.add_argument('--link', default=DEFAULT_LINK, help="Stable path to symlink the pty to")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Run the radio this many times faster than real time")
+    parser.add_argument('--drop', type=float, default=0.0, help="Chance a command gets no reply")
+    parser.add_argument('--slow', type=parse_slow, default=(0.0, 1.0),
+                        help="RATE:SECONDS, chance an ack is delayed and by how long")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="Chance a reply frame fails its CRC")
+    parser.add_argument('--unheard', type=float, default=0.0,
+                        help="Chance a verified burst isn't heard by the receiver")
+    parser.add_argument('--disconnect-every', type=int, default=0,
+                        help="Drop the serial link after every N commands")
+    parser.add_argument('--reconnect-delay', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None, help="Random seed, for repeatable faults")
+    args = parser.parse_args()
+
+    pico = VirtualPico(args.link, speed=args.speed, drop=args.drop, slow=args.slow[0],
+                       slow_delay=args.slow[1], corrupt=args.corrupt, unheard=args.unheard,
+                       disconnect_every=args.disconnect_every, reconnect_delay=args.reconnect_delay,
+                       seed=args.seed)
+    try:
+        pico.run()
+    except KeyboardInterrupt:
+        print(f"\n📋 {pico.commands} commands, {pico.stats}")
+
+
+if __name__ == "__main__":
+    main()